@@ -13,6 +13,7 @@ from __future__ import print_function
 
 from os.path import join, dirname, abspath
 import os
+import sys
 import re
 import logging
 from vunit.ostools import Process, write_file, file_exists, renew_path
@@ -335,8 +336,8 @@ proc vunit_run {} {
                     "-l", join(dirname(batch_file_name), "transcript"),
                     '-do', todo]
 
-            proc = Process(args, cwd=cwd, env=self.get_env())
-            proc.consume_output()
+            proc = Process(args, cwd=cwd, env=self.get_env(), raw_output=True)
+            proc.consume_output_raw(sys.stdout)
         except Process.NonZeroExitCode:
             return False
         return True
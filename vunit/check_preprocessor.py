@@ -9,6 +9,7 @@ Preprocessing of check functions
 """
 
 import re
+from vunit.about import version
 
 
 class CheckPreprocessor(object):
@@ -23,6 +24,13 @@ class CheckPreprocessor(object):
         self._leading_paranthesis = re.compile(r'[\s(]*')
         self._trailing_paranthesis = re.compile(r'[\s)]*')
 
+    @staticmethod
+    def cache_key():
+        """
+        Returns a string which changes whenever the preprocessing could change
+        """
+        return repr(("CheckPreprocessor", version()))
+
     def run(self, code, file_name):  # pylint: disable=unused-argument
         """
         Preprocess code and return result also given the file_name of the original file
@@ -0,0 +1,124 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2017, Lars Asplund lars.anders.asplund@gmail.com
+
+"""
+Manifest of the compiled source files of a library
+"""
+
+import io
+import json
+import logging
+import os
+import uuid
+from os.path import dirname, exists
+from vunit.database import replace_file
+LOGGER = logging.getLogger(__name__)
+
+
+class CompileManifest(object):
+    """
+    Records the content hash of every compiled source file of a library
+    together with the compile id of its direct dependencies when it was compiled
+
+    Every compile gets a new unique compile id. A source file must be
+    recompiled when a dependency has a different compile id than the one
+    recorded, which does not rely on file modification times.
+
+    The manifest is a single file with one JSON entry per line. An entry is
+    appended for every compile and the last entry of a source file is valid.
+    """
+
+    # Rewrite the file when it has more lines than this number plus twice the number of entries
+    _COMPACTION_SLACK = 100
+
+    def __init__(self, file_name):
+        self._file_name = file_name
+        self._entries = None
+        self._num_lines = 0
+        self._has_invalid_lines = False
+
+    def get(self, source_file_name):
+        """
+        Return the (content_hash, compile_id, dependencies) entry of source_file_name
+        or None if it has not been compiled.
+        dependencies is a dictionary mapping file name to compile id
+        """
+        return self._get_entries().get(source_file_name)
+
+    def update(self, source_file_name, content_hash, dependencies):
+        """
+        Record that source_file_name was compiled with content_hash where
+        dependencies maps the file name of direct dependencies to their compile id
+        """
+        entries = self._get_entries()
+        compile_id = uuid.uuid4().hex
+        entries[source_file_name] = (content_hash, compile_id, dependencies)
+
+        if self._has_invalid_lines or self._num_lines > 2 * len(entries) + self._COMPACTION_SLACK:
+            self._write_entries()
+        else:
+            self._write_lines([self._format_entry(source_file_name)], mode="ab")
+            self._num_lines += 1
+        return compile_id
+
+    def _get_entries(self):
+        """
+        Load the entries from file the first time
+        """
+        if self._entries is None:
+            self._entries = {}
+            self._num_lines = 0
+            if exists(self._file_name):
+                self._read_entries()
+        return self._entries
+
+    def _read_entries(self):
+        """
+        Read all entries from file, later entries of a source file replace earlier ones
+        """
+        with io.open(self._file_name, "rb") as fptr:
+            for line in fptr:
+                self._num_lines += 1
+                if not line.endswith(b"\n"):
+                    # Appending to a line without newline would corrupt it
+                    self._has_invalid_lines = True
+                try:
+                    source_file_name, content_hash, compile_id, dependencies = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    # Partially written line after an interrupted compile
+                    LOGGER.debug("Ignoring invalid line in %s", self._file_name)
+                    self._has_invalid_lines = True
+                    continue
+                self._entries[source_file_name] = (content_hash, compile_id, dependencies)
+
+    def _format_entry(self, source_file_name):
+        """
+        Format the entry of source_file_name as a JSON line
+        """
+        content_hash, compile_id, dependencies = self._entries[source_file_name]
+        return json.dumps([source_file_name, content_hash, compile_id, dependencies], sort_keys=True) + "\n"
+
+    def _write_entries(self):
+        """
+        Replace the file with one line per entry
+        """
+        lines = [self._format_entry(source_file_name) for source_file_name in sorted(self._entries)]
+        temp_file_name = self._file_name + ".tmp"
+        self._write_lines(lines, mode="wb", file_name=temp_file_name)
+        replace_file(temp_file_name, self._file_name)
+        self._num_lines = len(lines)
+        self._has_invalid_lines = False
+
+    def _write_lines(self, lines, mode, file_name=None):
+        """
+        Write lines to file_name which defaults to the manifest file
+        """
+        file_name = self._file_name if file_name is None else file_name
+        if not exists(dirname(file_name)):
+            os.makedirs(dirname(file_name))
+
+        with io.open(file_name, mode) as fptr:
+            fptr.write("".join(lines).encode("utf-8"))
@@ -11,6 +11,7 @@ Contains Configuration class which contains configuration of a test run
 import logging
 from os.path import dirname
 from vunit.simulator_factory import SimulatorFactory
+from vunit.hashing import hash_string
 
 
 LOGGER = logging.getLogger(__name__)
@@ -29,11 +30,13 @@ class Configuration(object):  # pylint: disable=too-many-instance-attributes
                  generics=None,
                  sim_options=None,
                  pre_config=None,
-                 post_check=None):
+                 post_check=None,
+                 resources=None):
         self.name = name
         self._design_unit = design_unit
         self.generics = {} if generics is None else generics
         self.sim_options = {} if sim_options is None else sim_options
+        self.resources = {} if resources is None else resources
 
         self.tb_path = dirname(design_unit.file_name)
 
@@ -50,7 +53,18 @@ class Configuration(object):  # pylint: disable=too-many-instance-attributes
                              generics=self.generics.copy(),
                              sim_options=self.sim_options.copy(),
                              pre_config=self.pre_config,
-                             post_check=self.post_check)
+                             post_check=self.post_check,
+                             resources=self.resources.copy())
+
+    def fingerprint(self):
+        """
+        Return a string which changes when the configuration changes in a way that may change the test result
+        """
+        return repr((self.name,
+                     sorted((name, repr(value)) for name, value in self.generics.items()),
+                     sorted((name, repr(value)) for name, value in self.sim_options.items()),
+                     _function_identity(self.pre_config),
+                     _function_identity(self.post_check)))
 
     @property
     def is_default(self):
@@ -103,8 +117,17 @@ class Configuration(object):  # pylint: disable=too-many-instance-attributes
                          name, known_options)
             raise ValueError(name)
 
+        check_sim_option_value(name, value)
         self.sim_options[name] = value
 
+    def set_resource(self, name, value):
+        """
+        Set the amount of a resource required to run the configuration
+        """
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not value >= 0:
+            raise ValueError("Resource %r must be a non-negative number, got %r" % (name, value))
+        self.resources[name] = value
+
     @property
     def vhdl_assert_stop_level(self):
         """
@@ -118,6 +141,30 @@ class Configuration(object):  # pylint: disable=too-many-instance-attributes
         return level
 
 
+def _function_identity(function):
+    """
+    Return the name and a hash of the byte code of a function
+    Values captured by closures or global variables are not considered
+    """
+    if function is None:
+        return None
+
+    code = getattr(function, "__code__", None)
+    return (getattr(function, "__module__", None),
+            getattr(function, "__qualname__", getattr(function, "__name__", type(function).__name__)),
+            None if code is None else hash_string(repr(_code_identity(code))))
+
+
+def _code_identity(code):
+    """
+    Return the byte code, names and constants of code with nested code objects replaced recursively
+    since their representation contains their memory address
+    """
+    consts = tuple(_code_identity(const) if isinstance(const, type(code)) else const
+                   for const in code.co_consts)
+    return code.co_code, code.co_names, consts
+
+
 class ConfigurationVisitor(object):
     """
     An interface to visit simulation run configurations
@@ -166,7 +213,17 @@ class ConfigurationVisitor(object):
             for config in configs.values():
                 config.post_check = value
 
-    def add_config(self, name, generics=None, pre_config=None, post_check=None, sim_options=None):
+    def set_resource(self, name, value):
+        """
+        Set the amount of a resource required
+        """
+        self._check_enabled()
+        for configs in self.get_configuration_dicts():
+            for config in configs.values():
+                config.set_resource(name, value)
+
+    def add_config(self,  # pylint: disable=too-many-arguments
+                   name, generics=None, pre_config=None, post_check=None, sim_options=None, resources=None):
         """
         Add a configuration copying unset fields from the default configuration:
         """
@@ -193,6 +250,21 @@ class ConfigurationVisitor(object):
                 config.generics.update(generics)
 
             if sim_options is not None:
+                for option_name, value in sim_options.items():
+                    check_sim_option_value(option_name, value)
                 config.sim_options.update(sim_options)
 
+            if resources is not None:
+                for resource_name, value in resources.items():
+                    config.set_resource(resource_name, value)
+
             configs[config.name] = config
+
+
+def check_sim_option_value(name, value):
+    """
+    Check the value of sim options which are used by VUnit itself
+    """
+    if name == "timeout":
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not value > 0:
+            raise ValueError("Sim option 'timeout' must be a positive number of seconds, got %r" % value)
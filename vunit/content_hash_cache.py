@@ -0,0 +1,84 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2017, Lars Asplund lars.anders.asplund@gmail.com
+
+"""
+Cache of file content hashes to avoid reading unchanged files
+"""
+
+import os
+from os.path import abspath
+import logging
+from vunit.hashing import hash_string
+import vunit.ostools as ostools
+LOGGER = logging.getLogger(__name__)
+
+
+class ContentHashCache(object):
+    """
+    Computes the hash of file contents
+
+    When a database is given the hashes are stored together with the
+    size, modification time and inode of the file. A file whose stat
+    information is unchanged since the last time is not read again.
+    """
+
+    # Files modified less than this number of seconds before being hashed are not stored
+    # since a later modification within the time stamp resolution would go unnoticed
+    _RACY_TIME = 2.0
+
+    def __init__(self, database=None):
+        self._database = database
+        self._content_hashes = {}
+
+    def content_hash(self, file_name, encoding="utf-8"):
+        """
+        Return the hash of the contents of file_name decoded using encoding
+        """
+        file_name = abspath(file_name)
+        key = (file_name, encoding)
+        if key in self._content_hashes:
+            return self._content_hashes[key]
+
+        if self._database is None:
+            content_hash = hash_string(ostools.read_file(file_name, encoding=encoding))
+        else:
+            content_hash = self._cached_content_hash(file_name, encoding)
+
+        self._content_hashes[key] = content_hash
+        return content_hash
+
+    def _cached_content_hash(self, file_name, encoding):
+        """
+        Return content hash from database if the stat information is unchanged
+        or read the file and update the database
+        """
+        database_key = ("ContentHashCache.content_hash(%s, %s)" % (file_name, encoding)).encode()
+        stat_key = _stat_key(file_name)
+
+        if database_key in self._database:
+            old_stat_key, content_hash = self._database[database_key]
+            if old_stat_key == stat_key:
+                LOGGER.debug("Re-using cached content hash for %s", file_name)
+                return content_hash
+
+        content_hash = hash_string(ostools.read_file(file_name, encoding=encoding))
+
+        if ostools.get_time() - stat_key[1] / 1e9 > self._RACY_TIME:
+            self._database[database_key] = stat_key, content_hash
+        return content_hash
+
+
+def _stat_key(file_name):
+    """
+    Return file size, modification time in nanoseconds and inode
+    """
+    stat = os.stat(file_name)
+    if hasattr(stat, "st_mtime_ns"):
+        mtime_ns = stat.st_mtime_ns
+    else:
+        # Python 2
+        mtime_ns = int(stat.st_mtime * 1e9)
+    return stat.st_size, mtime_ns, stat.st_ino
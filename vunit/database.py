@@ -8,12 +8,21 @@
 A simple file based database
 """
 
-from os.path import join, exists
+from os.path import join, exists, isdir, isfile, dirname
 import os
 import pickle
 import io
 import struct
-from vunit.ostools import renew_path
+import shutil
+import threading
+try:
+    import fcntl
+    msvcrt = None  # pylint: disable=invalid-name
+except ImportError:
+    # Windows
+    fcntl = None  # pylint: disable=invalid-name
+    import msvcrt  # pylint: disable=import-error
+from vunit.ostools import renew_path, IS_WINDOWS_SYSTEM
 
 
 class DataBase(object):
@@ -38,6 +47,9 @@ class DataBase(object):
         self._path = path
 
         if new:
+            if isfile(path):
+                # A LogDataBase
+                os.remove(path)
             renew_path(path)
         elif not exists(path):
             os.makedirs(path)
@@ -121,6 +133,244 @@ class DataBase(object):
     def __contains__(self, key):
         return key in self._keys_to_nodes
 
+    def keys(self):
+        return list(self._keys_to_nodes.keys())
+
+    def close(self):
+        """
+        Nothing to close since the nodes are only open while accessed
+        """
+        pass
+
+
+class LogDataBase(object):
+    """
+    A single file database
+    both keys and values are bytes
+
+    The file starts with a magic header followed by records. Each record
+    contains the key and value lengths as two unsigned integers followed by
+    the key followed by the value. Setting a key appends a new record and
+    the last record of a key is the valid one. An in-memory index maps keys
+    to the location of their current value within the file.
+
+    Several processes may share the file. Records are appended while holding
+    an inter-process lock on a separate lock file and records appended by
+    other processes are added to the index before each access.
+
+    When most of the file consists of overwritten records it is compacted
+    into a new file which atomically replaces the old one. Other processes
+    notice the replacement and re-open the file. An incomplete record at the
+    end of the file, from an interrupted write, is discarded.
+
+    A directory at path is assumed to be a DataBase and is migrated.
+    """
+
+    _MAGIC = b"VUNITLOGDB1"
+    _HEADER = struct.Struct("<II")
+    _MIN_COMPACTION_SIZE = 1024 * 1024
+
+    def __init__(self, path, new=False):
+        """
+        Create database in path
+        - path is a file
+        - new create new database
+        """
+        self._path = path
+        self._fptr = None
+        self._can_compact = True
+
+        # Map keys to value offset and size
+        self._index = {}
+        self._file_size = 0
+        self._garbage_size = 0
+
+        path_dir = dirname(path)
+        if path_dir != "" and not exists(path_dir):
+            os.makedirs(path_dir)
+        self._lock = FileLock(path + ".lock")
+
+        with self._lock:
+            if isdir(path):
+                if new:
+                    shutil.rmtree(path)
+                else:
+                    self._migrate_from_directory()
+
+            if new or not exists(path):
+                self._write_file([])
+
+            self._open()
+            self._discard_incomplete_record()
+
+            if self._should_compact():
+                self._compact()
+
+    def _migrate_from_directory(self):
+        """
+        Migrate a DataBase directory at path into a single file
+        """
+        old_database = DataBase(self._path)
+        items = [(key, old_database[key]) for key in old_database.keys()]
+        shutil.rmtree(self._path)
+        self._write_file(items)
+
+    def _write_file(self, items):
+        """
+        Write a new database file with the items and atomically replace the old one
+        """
+        tmp_file_name = self._path + ".tmp"
+        with io.open(tmp_file_name, "wb") as fptr:
+            fptr.write(self._MAGIC)
+            for key, value in items:
+                fptr.write(self._HEADER.pack(len(key), len(value)))
+                fptr.write(key)
+                fptr.write(value)
+
+        replace_file(tmp_file_name, self._path)
+
+    def _open(self):
+        """
+        Open the database file and build the index
+        """
+        # Append mode such that records are always written to the end of the file
+        self._fptr = io.open(self._path, "a+b", buffering=0)
+        self._fptr.seek(0)
+        if self._fptr.read(len(self._MAGIC)) != self._MAGIC:
+            self.close()
+            raise ValueError("%s is not a database file" % self._path)
+
+        self._index = {}
+        self._garbage_size = 0
+        self._file_size = len(self._MAGIC)
+        self._read_records()
+
+    def _read_records(self):
+        """
+        Add the complete records after the ones already read to the index
+        """
+        self._fptr.seek(self._file_size)
+        data = self._fptr.read()
+
+        offset = 0
+        while offset + self._HEADER.size <= len(data):
+            key_size, value_size = self._HEADER.unpack_from(data, offset)
+            key_offset = offset + self._HEADER.size
+            end = key_offset + key_size + value_size
+            if end > len(data):
+                break
+
+            key = data[key_offset:key_offset + key_size]
+            self._add_to_index(key, self._file_size + key_offset + key_size, value_size)
+            offset = end
+
+        self._file_size += offset
+
+    def _discard_incomplete_record(self):
+        """
+        Discard incomplete record from interrupted write, must hold the lock
+        """
+        if os.fstat(self._fptr.fileno()).st_size > self._file_size:
+            self._fptr.truncate(self._file_size)
+
+    def _is_replaced(self):
+        """
+        Returns True if the database file was replaced by another process
+        """
+        try:
+            stat = os.stat(self._path)
+        except OSError:
+            # Being replaced right now
+            return False
+        fstat = os.fstat(self._fptr.fileno())
+        return (stat.st_dev, stat.st_ino) != (fstat.st_dev, fstat.st_ino)
+
+    def _refresh(self):
+        """
+        Add the records written by other processes to the index
+        """
+        if self._is_replaced():
+            self.close()
+            self._open()
+        elif os.fstat(self._fptr.fileno()).st_size > self._file_size:
+            self._read_records()
+
+    def _add_to_index(self, key, value_offset, value_size):
+        """
+        Add the location of the value of key to the index
+        """
+        if key in self._index:
+            _, old_value_size = self._index[key]
+            self._garbage_size += self._HEADER.size + len(key) + old_value_size
+        self._index[key] = (value_offset, value_size)
+
+    def _should_compact(self):
+        return (self._can_compact and
+                self._garbage_size > self._MIN_COMPACTION_SIZE and
+                self._garbage_size > self._file_size - self._garbage_size)
+
+    def _compact(self):
+        """
+        Write all current items into a new file without the overwritten records, must hold the lock
+        """
+        items = [(key, self._read_value(key)) for key in self._index]
+        self.close()
+        try:
+            self._write_file(items)
+        except OSError:
+            # Windows cannot replace a file which is kept open by another process
+            self._can_compact = False
+        self._open()
+
+    def close(self):
+        """
+        Close the database file
+        """
+        if self._fptr is not None:
+            self._fptr.close()
+            self._fptr = None
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._refresh()
+            self._fptr.write(self._HEADER.pack(len(key), len(value)) + key + value)
+            self._add_to_index(key, self._file_size + self._HEADER.size + len(key), len(value))
+            self._file_size += self._HEADER.size + len(key) + len(value)
+
+            if self._should_compact():
+                self._compact()
+
+    def _read_value(self, key):
+        """
+        Read the current value of key from the file
+        """
+        value_offset, value_size = self._index[key]
+        self._fptr.seek(value_offset)
+        return self._fptr.read(value_size)
+
+    def __getitem__(self, key):
+        with self._lock.thread_lock:
+            self._refresh()
+            if key not in self._index:
+                raise KeyError(key)
+            return self._read_value(key)
+
+    def __contains__(self, key):
+        with self._lock.thread_lock:
+            self._refresh()
+            return key in self._index
+
+    def keys(self):
+        """
+        Return the keys including those set by other processes
+        """
+        with self._lock.thread_lock:
+            self._refresh()
+            return list(self._index.keys())
+
+    def __del__(self):
+        self.close()
+
 
 class PickledDataBase(object):
     """
@@ -138,3 +388,80 @@ class PickledDataBase(object):
 
     def __contains__(self, key):
         return key in self._database
+
+    def keys(self):
+        return self._database.keys()
+
+
+class FileLock(object):
+    """
+    An inter-process lock on a lock file which also excludes the other threads of the process
+    """
+
+    def __init__(self, file_name):
+        self._fptr = io.open(file_name, "a+b", buffering=0)
+        self.thread_lock = threading.Lock()
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        try:
+            lock_file(self._fptr)
+        except BaseException:
+            self.thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, *args):
+        try:
+            unlock_file(self._fptr)
+        finally:
+            self.thread_lock.release()
+
+    def close(self):
+        self._fptr.close()
+
+    def __del__(self):
+        self.close()
+
+
+def lock_file(fptr):
+    """
+    Wait for an exclusive lock on the open file fptr
+    """
+    if fcntl is not None:
+        fcntl.flock(fptr.fileno(), fcntl.LOCK_EX)
+        return
+
+    fptr.seek(0)
+    while True:
+        try:
+            msvcrt.locking(fptr.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except (IOError, OSError):
+            # LK_LOCK gives up after 10 seconds
+            pass
+
+
+def unlock_file(fptr):
+    """
+    Release the lock on the open file fptr
+    """
+    if fcntl is not None:
+        fcntl.flock(fptr.fileno(), fcntl.LOCK_UN)
+    else:
+        fptr.seek(0)
+        msvcrt.locking(fptr.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def replace_file(src, dst):
+    """
+    Atomically replace dst with src
+    """
+    if hasattr(os, "replace"):
+        # Python 3.3+
+        os.replace(src, dst)  # pylint: disable=no-member
+    else:
+        if IS_WINDOWS_SYSTEM and exists(dst):
+            # Python 2 cannot replace an existing file on Windows
+            os.remove(dst)
+        os.rename(src, dst)
@@ -10,30 +10,73 @@
 Functionality to compute a dependency graph
 """
 
+from collections import OrderedDict
+
 
 class DependencyGraph(object):
     """
     A dependency graph
     """
+
+    # The number of get_dependent and get_dependencies results to keep for each direction
+    _MAX_CACHED_RESULTS = 64
+
     def __init__(self):
         self._forward = {}
         self._backward = {}
         self._nodes = []
+        self._sorted_nodes = None
+        self._sort_index = None
+        # Results of get_dependent and get_dependencies keyed by the input nodes
+        self._dependent_cache = OrderedDict()
+        self._dependencies_cache = OrderedDict()
+
+    def _invalidate(self):
+        """
+        Clear cached results after the graph has been modified
+        """
+        self._sorted_nodes = None
+        self._sort_index = None
+        self._dependent_cache.clear()
+        self._dependencies_cache.clear()
 
     def toposort(self):
         """
         Perform a topological sort returning a list of nodes such that
         every node is located after its dependency nodes
+
+        The result is cached until the graph is modified
+        """
+        if self._sorted_nodes is None:
+            sorted_nodes = []
+            self._visit(sorted(self._nodes),
+                        dict((key, sorted(values)) for key, values in self._forward.items()),
+                        sorted_nodes.append)
+            self._sorted_nodes = list(reversed(sorted_nodes))
+            self._sort_index = dict((node, idx) for idx, node in enumerate(self._sorted_nodes))
+        return list(self._sorted_nodes)
+
+    def toposort_index(self):
         """
-        sorted_nodes = []
-        self._visit(sorted(self._nodes),
-                    dict((key, sorted(values)) for key, values in self._forward.items()),
-                    sorted_nodes.append)
-        sorted_nodes = list(reversed(sorted_nodes))
-        return sorted_nodes
+        Return a dictionary mapping every node to its position in the topological sort
+        to allow sorting a subset of the nodes without searching the full toposort
+        """
+        if self._sort_index is None:
+            self.toposort()
+        return self._sort_index
+
+    def sort_nodes(self, nodes):
+        """
+        Return the nodes sorted in topological order
+        """
+        return sorted(nodes, key=self.toposort_index().__getitem__)
 
     def add_node(self, node):
+        """
+        Add a node to the graph
+        """
         self._nodes.append(node)
+        self._invalidate()
 
     def add_dependency(self, start, end):
         """
@@ -51,6 +94,7 @@ class DependencyGraph(object):
 
         self._forward[start].add(end)
         self._backward[end].add(start)
+        self._invalidate()
 
         return new_dependency
 
@@ -58,53 +102,77 @@ class DependencyGraph(object):
     def _visit(nodes, graph, callback):
         """
         Follow graph edges starting from the nodes iteratively
-        returning all the nodes visited
-        """
-        def visit(node):
-            """
-            Visit a single node and all following nodes in the graph
-            that have not already been visisted.
-            Detects circular dependencies
-            """
-            if node in path:
-                start = path_ordered.index(node)
-                raise CircularDependencyException(path_ordered[start:] + [node, ])
-
-            path.add(node)
-            path_ordered.append(node)
-            if node in graph:
-                for other_node in graph[node]:
-                    if other_node not in visited:
-                        visit(other_node)
-            path.remove(node)
-            path_ordered.pop()
-            visited.add(node)
-            callback(node)
+        returning all the nodes visited in depth first post order.
+        Detects circular dependencies
 
+        An explicit stack is used instead of recursion to support deep graphs
+        """
         visited = set()
-        for node in nodes:
-            if node not in visited:
-                path = set()
-                path_ordered = []
-                visit(node)
+        for start_node in nodes:
+            if start_node in visited:
+                continue
+
+            # Mapping from node on the current path to its position within path_ordered
+            path = {start_node: 0}
+            path_ordered = [start_node]
+            stack = [(start_node, iter(graph.get(start_node, ())))]
+
+            while stack:
+                node, other_nodes = stack[-1]
+
+                for other_node in other_nodes:
+                    if other_node in visited:
+                        continue
+
+                    if other_node in path:
+                        raise CircularDependencyException(path_ordered[path[other_node]:] + [other_node, ])
+
+                    path[other_node] = len(path_ordered)
+                    path_ordered.append(other_node)
+                    stack.append((other_node, iter(graph.get(other_node, ()))))
+                    break
+                else:
+                    stack.pop()
+                    del path[node]
+                    path_ordered.pop()
+                    visited.add(node)
+                    callback(node)
 
     def get_dependent(self, nodes):
         """
         Get all nodes which are directly or indirectly dependent on
         the input nodes
         """
-        result = set()
-        self._visit(nodes, self._forward, result.add)
-        return result
+        return self._get_reachable(nodes, self._forward, self._dependent_cache)
 
     def get_dependencies(self, nodes):
         """
         Get all nodes which are directly or indirectly dependencies of
         the input nodes
         """
-        result = set()
-        self._visit(nodes, self._backward, result.add)
-        return result
+        return self._get_reachable(nodes, self._backward, self._dependencies_cache)
+
+    def _get_reachable(self, nodes, graph, cache):
+        """
+        Return the nodes reachable from the input nodes following the graph edges
+
+        The same sets of nodes are queried repeatedly, such as the files of a test bench,
+        so the results of the latest queries are cached by the set of input nodes until
+        the graph is modified. Caching the result of every single node instead would
+        need memory quadratic in the depth of the graph.
+        """
+        nodes = list(nodes)
+        key = frozenset(nodes)
+        if key in cache:
+            result = cache.pop(key)
+        else:
+            result = set()
+            self._visit(nodes, graph, result.add)
+            if len(cache) >= self._MAX_CACHED_RESULTS:
+                # Forget the least recently used result
+                cache.popitem(last=False)
+        cache[key] = result
+        return set(result)
 
     def get_direct_dependencies(self, node):
         """
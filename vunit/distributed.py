@@ -0,0 +1,443 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2017, Lars Asplund lars.anders.asplund@gmail.com
+
+"""
+Distributed test execution where a coordinator hands out test suites to workers on other hosts
+
+The coordinator and the workers communicate over TCP with one JSON message per line.
+A worker connects and announces how many test suites it can run in parallel:
+
+  worker:      {"type": "hello", "slots": 4, "output_path_token": "0f8fad5bd9cb469fa16570867728950e"}
+  coordinator: {"type": "welcome", "shares_output_path": false}
+
+The coordinator writes a random token into a file in its output path and the worker sends
+the token found in its own output path, null if there is none. The worker shares the output
+path with the coordinator when the tokens match, comparing the paths themselves does not work
+since workers on other hosts may use the same local path.
+
+The coordinator hands out test suites by name as long as the worker has free slots,
+this way idle workers always take the next test suite:
+
+  coordinator: {"type": "run", "name": "lib.tb.test"}
+  worker:      {"type": "done", "name": "lib.tb.test", "results": {"lib.tb.test": "passed"}, "output": "..."}
+
+The output is null when the worker shares the output path with the coordinator.
+The results are null when the worker could not run the test suite.
+When all test suites are done the coordinator sends {"type": "stop"}.
+
+The test suites run by a lost worker are handed out again once and are failed if
+they are lost a second time.
+"""
+
+from __future__ import print_function
+
+import socket
+import json
+import threading
+import logging
+import uuid
+from os.path import join
+from collections import deque
+from vunit import ostools
+
+LOGGER = logging.getLogger(__name__)
+
+TOKEN_FILE_NAME = "coordinator_token"
+
+
+def parse_address(address):
+    """
+    Parse a HOST:PORT string into a (host, port) tuple
+    """
+    host, _, port = address.rpartition(":")
+    if not host:
+        raise ValueError("Expected HOST:PORT, got %r" % address)
+    return host, int(port)
+
+
+def _send(sock, message):
+    sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+
+def _receive(fptr):
+    """
+    Return the next message or None when the connection is closed
+    """
+    line = fptr.readline()
+    if not line:
+        return None
+    return json.loads(line.decode("utf-8"))
+
+
+def _read_token(output_path):
+    """
+    Return the coordinator token found in the output path or None
+    """
+    file_name = join(output_path, TOKEN_FILE_NAME)
+    if not ostools.file_exists(file_name):
+        return None
+    return ostools.read_file(file_name)
+
+
+class Coordinator(object):
+    """
+    Hand out test suites to workers connecting over TCP
+    """
+
+    def __init__(self, address, output_path, worker_timeout=60.0):
+        """
+        address -- The (host, port) to listen on, port 0 selects a free port
+        output_path -- The test output path of the coordinator
+        worker_timeout -- Fail the remaining test suites when there have been no workers for this many seconds
+        """
+        self._token = uuid.uuid4().hex
+        ostools.write_file(join(output_path, TOKEN_FILE_NAME), self._token)
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(address)
+        self._server.listen(16)
+
+        self._lock = threading.Lock()
+        self._events = ostools.InterruptableQueue()
+        self._suites = _TestSuites()
+        self._connections = set()
+        self._timer = _WorkerTimer(worker_timeout, self._events)
+
+    @property
+    def address(self):
+        """
+        The (host, port) the coordinator listens on
+        """
+        return self._server.getsockname()
+
+    def run(self, names, on_start, on_done):
+        """
+        Hand out the test suites with names to the workers in order and block until all are done
+
+        on_start(name) -- Called when a test suite is handed out
+        on_done(name, results, output) -- Called when a test suite is done, the results are None when it failed
+                                          to run and the output is None when the worker shares the output path
+        """
+        with self._lock:  # pylint: disable=not-context-manager
+            self._suites.pending.extend(names)
+            self._suites.unfinished.update(names)
+            self._start_timer()
+
+        acceptor = threading.Thread(target=self._accept)
+        acceptor.daemon = True
+        acceptor.start()
+
+        try:
+            num_done = 0
+            while num_done < len(names):
+                event = self._events.get()
+
+                if event[0] == "start":
+                    on_start(event[1])
+
+                elif event[0] == "done":
+                    _, name, results, output = event
+                    num_done += 1
+                    on_done(name, results, output)
+
+                elif event[0] == "timeout":
+                    for name in self._fail_pending():
+                        num_done += 1
+                        on_done(name, None, None)
+        finally:
+            self._stop()
+
+    def _accept(self):
+        """
+        Accept worker connections until the server socket is closed
+        """
+        while True:
+            try:
+                sock, address = self._server.accept()
+            except (socket.error, OSError):
+                return
+            LOGGER.debug("Worker connected from %s:%i", address[0], address[1])
+            thread = threading.Thread(target=self._serve, args=(sock,))
+            thread.daemon = True
+            thread.start()
+
+    def _serve(self, sock):
+        """
+        Serve a single worker connection
+        """
+        connection = None
+        fptr = sock.makefile("rb")
+        try:
+            hello = _receive(fptr)
+            if hello is None or hello["type"] != "hello":
+                return
+
+            connection = _Connection(sock, hello["slots"])
+            _send(sock, {"type": "welcome",
+                         "shares_output_path": hello["output_path_token"] == self._token})
+
+            with self._lock:  # pylint: disable=not-context-manager
+                self._connections.add(connection)
+                self._timer.cancel()
+                self._dispatch()
+
+            while True:
+                message = _receive(fptr)
+                if message is None:
+                    break
+
+                if message["type"] == "done":
+                    name = message["name"]
+                    with self._lock:  # pylint: disable=not-context-manager
+                        if connection.running.pop(name, False) and name in self._suites.unfinished:
+                            self._suites.unfinished.discard(name)
+                            self._events.put(("done", name, message["results"], message["output"]))
+                        self._dispatch()
+
+        except (socket.error, ValueError, KeyError, TypeError) as exc:
+            LOGGER.warning("Lost connection to worker: %s", exc)
+
+        finally:
+            fptr.close()
+            sock.close()
+            if connection is not None:
+                self._lose(connection)
+
+    def _lose(self, connection):
+        """
+        Hand out the test suites of a lost worker again
+        """
+        with self._lock:  # pylint: disable=not-context-manager
+            self._connections.discard(connection)
+            for name in connection.running:
+                if name not in self._suites.unfinished:
+                    continue
+
+                if name in self._suites.requeued:
+                    LOGGER.error("Lost worker running %s a second time", name)
+                    self._suites.unfinished.discard(name)
+                    self._events.put(("done", name, None, None))
+                else:
+                    LOGGER.warning("Lost worker running %s, running it again", name)
+                    self._suites.requeued.add(name)
+                    self._suites.pending.appendleft(name)
+            connection.running = {}
+
+            self._dispatch()
+            if not self._connections:
+                self._start_timer()
+
+    def _dispatch(self):
+        """
+        Hand out pending test suites to workers with free slots, must hold the lock
+        """
+        for connection in list(self._connections):
+            while self._suites.pending and len(connection.running) < connection.slots:
+                name = self._suites.pending.popleft()
+                connection.running[name] = True
+                self._events.put(("start", name))
+                try:
+                    _send(connection.sock, {"type": "run", "name": name})
+                except (socket.error, OSError):
+                    # Handed out again when the serving thread notices the lost connection
+                    break
+
+    def _start_timer(self):
+        """
+        Start timer to fail the remaining test suites when there are no workers, must hold the lock
+        """
+        if self._suites.unfinished:
+            self._timer.start()
+        else:
+            self._timer.cancel()
+
+    def _fail_pending(self):
+        """
+        Return and remove the pending test suites if there are still no workers
+        """
+        with self._lock:  # pylint: disable=not-context-manager
+            if self._connections:
+                return []
+
+            LOGGER.error("No workers connected for %g seconds", self._timer.timeout)
+            names = list(self._suites.pending)
+            self._suites.pending.clear()
+            self._suites.unfinished.difference_update(names)
+            return names
+
+    def _stop(self):
+        """
+        Stop the workers and close all connections
+        """
+        with self._lock:  # pylint: disable=not-context-manager
+            self._timer.cancel()
+            try:
+                # Wake up the blocking accept
+                self._server.shutdown(socket.SHUT_RDWR)
+            except (socket.error, OSError):
+                pass
+            self._server.close()
+            for connection in self._connections:
+                try:
+                    _send(connection.sock, {"type": "stop"})
+                    connection.sock.shutdown(socket.SHUT_RDWR)
+                except (socket.error, OSError):
+                    pass
+
+
+class _TestSuites(object):  # pylint: disable=too-few-public-methods
+    """
+    The test suites handed out by a coordinator
+    """
+    def __init__(self):
+        # Test suites not yet handed out
+        self.pending = deque()
+        # Test suites not yet done
+        self.unfinished = set()
+        # Test suites handed out again after losing a worker
+        self.requeued = set()
+
+
+class _WorkerTimer(object):
+    """
+    Put a timeout event on the event queue when there have been no workers for timeout seconds
+    """
+    def __init__(self, timeout, events):
+        self.timeout = timeout
+        self._events = events
+        self._timer = None
+
+    def start(self):
+        """
+        Start the timer, restarting it if already running
+        """
+        self.cancel()
+        self._timer = threading.Timer(self.timeout, self._events.put, args=(("timeout",),))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def cancel(self):
+        """
+        Cancel the timer if running
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+class _Connection(object):  # pylint: disable=too-few-public-methods
+    """
+    A connection to a worker
+    """
+    def __init__(self, sock, slots):
+        self.sock = sock
+        self.slots = slots
+        # Test suites being run by the worker
+        self.running = {}
+
+
+class Worker(object):
+    """
+    Run test suites handed out by a coordinator
+    """
+
+    def __init__(self, address, output_path, num_threads=1, connect_timeout=None):
+        """
+        address -- The (host, port) of the coordinator
+        output_path -- The test output path of the worker
+        num_threads -- The number of test suites to run in parallel
+        connect_timeout -- Seconds to retry connecting while the coordinator is not yet listening,
+                           None retries until the coordinator answers since it only starts
+                           listening after compiling
+        """
+        self._num_threads = num_threads
+        self._sock = self._connect(address, connect_timeout)
+        self._fptr = self._sock.makefile("rb")
+        self._send_lock = threading.Lock()
+
+        _send(self._sock, {"type": "hello", "slots": num_threads, "output_path_token": _read_token(output_path)})
+        welcome = _receive(self._fptr)
+        if welcome is None or welcome["type"] != "welcome":
+            raise RuntimeError("Unexpected answer from coordinator at %s:%i" % address)
+        self.shares_output_path = welcome["shares_output_path"]
+
+    @staticmethod
+    def _connect(address, timeout):
+        """
+        Connect to the coordinator retrying until timeout seconds have passed or forever if timeout is None
+        """
+        start = ostools.get_time()
+        while True:
+            try:
+                return socket.create_connection(address)
+            except (socket.error, OSError):
+                if timeout is not None and ostools.get_time() - start > timeout:
+                    raise
+
+            LOGGER.debug("Waiting for coordinator at %s:%i", address[0], address[1])
+            if ostools.PROGRAM_STATUS.wait_for_shutdown(1.0):
+                raise KeyboardInterrupt
+
+    def run(self, run_test_suite):
+        """
+        Run test suites until the coordinator stops the worker
+
+        run_test_suite(name) -- Run the test suite with name returning the results
+                                and the output or None if the output path is shared
+        """
+        queue = ostools.InterruptableQueue()
+        threads = []
+        for _ in range(self._num_threads):
+            thread = threading.Thread(target=self._run_thread, args=(queue, run_test_suite))
+            threads.append(thread)
+            thread.start()
+
+        try:
+            while True:
+                message = _receive(self._fptr)
+                if message is None or message["type"] == "stop":
+                    break
+                if message["type"] == "run":
+                    queue.put(message["name"])
+
+        except KeyboardInterrupt:
+            LOGGER.debug("Worker: Caught Ctrl-C shutting down")
+            ostools.PROGRAM_STATUS.shutdown()
+            raise
+
+        finally:
+            for _ in threads:
+                queue.put(None)
+            for thread in threads:
+                thread.join()
+            self.close()
+
+    def _run_thread(self, queue, run_test_suite):
+        """
+        Run test suites from the queue and send back the results
+        """
+        try:
+            while True:
+                name = queue.get()
+                if name is None:
+                    return
+
+                results, output = run_test_suite(name)
+                with self._send_lock:  # pylint: disable=not-context-manager
+                    try:
+                        _send(self._sock, {"type": "done", "name": name, "results": results, "output": output})
+                    except (socket.error, OSError):
+                        LOGGER.error("Lost connection to coordinator")
+                        return
+        except KeyboardInterrupt:
+            return
+
+    def close(self):
+        """
+        Close the connection to the coordinator
+        """
+        self._fptr.close()
+        self._sock.close()
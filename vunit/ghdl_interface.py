@@ -10,12 +10,17 @@ Interface for GHDL simulator
 
 from __future__ import print_function
 import logging
-from os.path import exists, join
+from os.path import exists, join, basename
 import os
 import subprocess
+import sys
 import shlex
+import threading
+from shutil import rmtree
+from tempfile import mkdtemp
 from sys import stdout  # To avoid output catched in non-verbose mode
-from vunit.ostools import Process
+from vunit.ostools import Process, read_file
+from vunit.hashing import hash_string
 from vunit.simulator_interface import SimulatorInterface
 from vunit.exceptions import CompileError
 LOGGER = logging.getLogger(__name__)
@@ -28,6 +33,7 @@ class GHDLInterface(SimulatorInterface):
 
     name = "ghdl"
     supports_gui_flag = True
+    supports_batch_compile = True
 
     compile_options = [
         "ghdl.flags",
@@ -76,7 +82,7 @@ class GHDLInterface(SimulatorInterface):
     def __init__(self, prefix, gui=False, gtkwave_fmt=None, gtkwave_args="", backend="llvm"):
         SimulatorInterface.__init__(self)
         self._prefix = prefix
-        self._project = None
+        self._libraries = None
 
         if gui and (not self.find_executable('gtkwave')):
             raise RuntimeError(
@@ -121,7 +127,7 @@ class GHDLInterface(SimulatorInterface):
         """
         Setup library mapping
         """
-        self._project = project
+        self._libraries = _CompiledLibraries(project)
         for library in project.get_libraries():
             if not exists(library.directory):
                 os.makedirs(library.directory)
@@ -168,29 +174,28 @@ class GHDLInterface(SimulatorInterface):
         cmd = [join(self._prefix, 'ghdl'), '-a', '--workdir=%s' % source_file.library.directory,
                '--work=%s' % source_file.library.name,
                '--std=%s' % self._std_str(source_file.get_vhdl_standard())]
-        for library in self._project.get_libraries():
+        for library in self._libraries.get_libraries():
             cmd += ["-P%s" % library.directory]
         cmd += source_file.compile_options.get("ghdl.flags", [])
         cmd += [source_file.name]
         return cmd
 
-    def _get_sim_command(self, config, output_path):
+    def _get_library_flags(self, config):
         """
-        Return GHDL simulation command
+        Return the flags selecting the VHDL standard and the libraries
         """
-        cmd = [join(self._prefix, 'ghdl')]
-        cmd += ['--elab-run']
-        cmd += ['--std=%s' % self._std_str(self._vhdl_standard)]
+        cmd = ['--std=%s' % self._std_str(self._vhdl_standard)]
         cmd += ['--work=%s' % config.library_name]
-        cmd += ['--workdir=%s' % self._project.get_library(config.library_name).directory]
-        cmd += ['-P%s' % lib.directory for lib in self._project.get_libraries()]
+        cmd += ['--workdir=%s' % self._libraries.get_library(config.library_name).directory]
+        cmd += ['-P%s' % lib.directory for lib in self._libraries.get_libraries()]
+        return cmd
 
-        if self._has_output_flag():
-            cmd += ['-o', join(output_path, "%s-%s" % (config.entity_name,
-                                                       config.architecture_name))]
-        cmd += config.sim_options.get("ghdl.elab_flags", [])
-        cmd += [config.entity_name, config.architecture_name]
-        cmd += config.sim_options.get("ghdl.sim_flags", [])
+    @staticmethod
+    def _get_run_flags(config):
+        """
+        Return the run time flags of the simulation
+        """
+        cmd = config.sim_options.get("ghdl.sim_flags", [])[:]
 
         for name, value in config.generics.items():
             cmd += ['-g%s=%s' % (name, value)]
@@ -201,6 +206,93 @@ class GHDLInterface(SimulatorInterface):
             cmd += ["--ieee-asserts=disable"]
         return cmd
 
+    def _get_sim_command(self, config):
+        """
+        Return GHDL command to elaborate and run the simulation in one step
+        """
+        cmd = [join(self._prefix, 'ghdl')]
+        cmd += ['--elab-run']
+        cmd += self._get_library_flags(config)
+        cmd += config.sim_options.get("ghdl.elab_flags", [])
+        cmd += [config.entity_name, config.architecture_name]
+        cmd += self._get_run_flags(config)
+        return cmd
+
+    def _get_elaborate_command(self, config, executable):
+        """
+        Return GHDL command to elaborate the test bench into an executable
+        """
+        cmd = [join(self._prefix, 'ghdl')]
+        cmd += ['-e']
+        cmd += self._get_library_flags(config)
+        cmd += ['-o', executable]
+        cmd += config.sim_options.get("ghdl.elab_flags", [])
+        cmd += [config.entity_name, config.architecture_name]
+        return cmd
+
+    def _get_elaborated_executable(self, config, output_path):
+        """
+        Return the executable of the elaborated test bench
+
+        The test bench is only elaborated when there is no executable elaborated with the same
+        elaboration flags from the same compiled libraries. Test cases and configurations only
+        differing in run time flags and generics share the executable.
+
+        @raises Process.NonZeroExitCode when the elaboration fails
+        """
+        elaboration_path = join(output_path if self.output_path is None else self.output_path, "elaborated")
+        # Executables of the same test bench and flags elaborated from previously
+        # compiled libraries are kept next to each other and removed when outdated
+        config_path = join(elaboration_path, hash_string(repr((self._prefix,
+                                                               self._backend,
+                                                               self._get_library_flags(config),
+                                                               config.sim_options.get("ghdl.elab_flags", []),
+                                                               config.entity_name,
+                                                               config.architecture_name))))
+        path = join(config_path, self._libraries.fingerprint())
+        executable = join(path, "%s-%s" % (config.entity_name, config.architecture_name))
+
+        with self._libraries.elaboration_lock(path):  # pylint: disable=not-context-manager
+            if exists(executable):
+                return executable
+
+            if not exists(config_path):
+                os.makedirs(config_path)
+
+            # Elaborate into a temporary directory which is renamed when done such that
+            # concurrent worker processes never see a partially written executable
+            tmp_path = mkdtemp(dir=elaboration_path)
+            try:
+                proc = Process(self._get_elaborate_command(config, join(tmp_path, basename(executable))),
+                               cwd=tmp_path, raw_output=True)
+                proc.consume_output_raw(sys.stdout)
+                try:
+                    os.rename(tmp_path, path)
+                except OSError:
+                    # Elaborated by another worker process in the mean time
+                    if not exists(executable):
+                        raise
+                else:
+                    self._remove_outdated_executables(config_path, path)
+            finally:
+                if exists(tmp_path):
+                    rmtree(tmp_path)
+
+        return executable
+
+    @staticmethod
+    def _remove_outdated_executables(config_path, path):
+        """
+        Remove the executables in config_path other than path which were elaborated
+        from previously compiled libraries
+        """
+        for file_name in os.listdir(config_path):
+            outdated_path = join(config_path, file_name)
+            if outdated_path != path:
+                LOGGER.debug("Removing outdated elaborated executable %s", outdated_path)
+                # Ignore executables still being run by other processes on Windows
+                rmtree(outdated_path, ignore_errors=True)
+
     def simulate(self,  # pylint: disable=too-many-locals
                  output_path,
                  test_suite_name,
@@ -211,11 +303,7 @@ class GHDLInterface(SimulatorInterface):
         if not exists(output_path):
             os.makedirs(output_path)
 
-        cmd = self._get_sim_command(config, output_path)
-
-        if elaborate_only:
-            cmd += ["--no-run"]
-
+        wave_flags = []
         if self._gtkwave_fmt is not None:
             data_file_name = join(output_path, "wave.%s" % self._gtkwave_fmt)
 
@@ -223,17 +311,27 @@ class GHDLInterface(SimulatorInterface):
                 os.remove(data_file_name)
 
             if self._gtkwave_fmt == "ghw":
-                cmd += ['--wave=%s' % data_file_name]
+                wave_flags += ['--wave=%s' % data_file_name]
             elif self._gtkwave_fmt == "vcd":
-                cmd += ['--vcd=%s' % data_file_name]
+                wave_flags += ['--vcd=%s' % data_file_name]
 
         else:
             data_file_name = None
 
         status = True
         try:
-            proc = Process(cmd)
-            proc.consume_output()
+            if self._has_output_flag():
+                # Elaborate once and run the executable for each test
+                executable = self._get_elaborated_executable(config, output_path)
+                cmd = None if elaborate_only else [executable] + self._get_run_flags(config) + wave_flags
+            else:
+                cmd = self._get_sim_command(config) + wave_flags
+                if elaborate_only:
+                    cmd += ["--no-run"]
+
+            if cmd is not None:
+                proc = Process(cmd, raw_output=True)
+                proc.consume_output_raw(sys.stdout)
         except Process.NonZeroExitCode:
             status = False
 
@@ -243,3 +341,45 @@ class GHDLInterface(SimulatorInterface):
             subprocess.call(cmd)
 
         return status
+
+
+class _CompiledLibraries(object):
+    """
+    The libraries of the project and the state of the executables elaborated from them
+    """
+
+    def __init__(self, project):
+        self._project = project
+        self._lock = threading.Lock()
+        self._elaboration_locks = {}
+        self._fingerprint = None
+
+    def get_libraries(self):
+        return self._project.get_libraries()
+
+    def get_library(self, library_name):
+        return self._project.get_library(library_name)
+
+    def fingerprint(self):
+        """
+        Return a hash of the GHDL library files which are re-written when any file is analyzed
+        """
+        with self._lock:  # pylint: disable=not-context-manager
+            if self._fingerprint is None:
+                contents = []
+                for library in self._project.get_libraries():
+                    if not exists(library.directory):
+                        continue
+                    for file_name in sorted(os.listdir(library.directory)):
+                        if file_name.endswith(".cf"):
+                            contents.append("%s %s\n%s" % (library.name, file_name,
+                                                           read_file(join(library.directory, file_name))))
+                self._fingerprint = hash_string("".join(contents))
+            return self._fingerprint
+
+    def elaboration_lock(self, path):
+        """
+        Return the lock held by the threads elaborating an executable into path
+        """
+        with self._lock:  # pylint: disable=not-context-manager
+            return self._elaboration_locks.setdefault(path, threading.Lock())
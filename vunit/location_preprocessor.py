@@ -11,6 +11,7 @@ to enable better messages
 
 
 import re
+from vunit.about import version
 
 
 class LocationPreprocessor(object):
@@ -53,6 +54,13 @@ class LocationPreprocessor(object):
         if subprogram in self._subprograms_with_arguments:
             self._subprograms_with_arguments.remove(subprogram)
 
+    def cache_key(self):
+        """
+        Returns a string which changes whenever the preprocessing could change
+        """
+        return repr(("LocationPreprocessor", version(),
+                     self._subprograms_with_arguments, self._subprograms_without_arguments))
+
     @staticmethod
     def _find_closing_parenthesis(args):
         """
@@ -37,12 +37,18 @@ class ModelSimInterface(VsimSimulatorMixin, SimulatorInterface):  # pylint: disa
     Mentor Graphics ModelSim interface
 
     The interface supports both running each simulation in separate vsim processes or
-    re-using the same vsim process to avoid startup-overhead (persistent=True)
+    re-using the same vsim process to avoid startup-overhead (persistent=True).
+    Source files can also be compiled in a re-used vsim process (persistent_compile=True)
+    and a loaded design can be restarted for following test cases of the same
+    configuration (reuse_design=True). A restart only updates the runner_cfg generic,
+    values elaborated from it keep the values of the first test case.
     """
     name = "modelsim"
     supports_gui_flag = True
     package_users_depend_on_bodies = False
 
+    supports_batch_compile = True
+
     compile_options = [
         "modelsim.vcom_flags",
         "modelsim.vlog_flags",
@@ -64,6 +70,9 @@ class ModelSimInterface(VsimSimulatorMixin, SimulatorInterface):  # pylint: disa
         return cls(prefix=cls.find_prefix(),
                    modelsim_ini=join(output_path, "modelsim.ini"),
                    persistent=persistent,
+                   persistent_compile=args.persistent_compile,
+                   recycle_after=args.recycle_sim_after,
+                   reuse_design=args.reuse_design and persistent,
                    coverage=args.coverage,
                    gui=args.gui)
 
@@ -85,9 +94,12 @@ class ModelSimInterface(VsimSimulatorMixin, SimulatorInterface):  # pylint: disa
         """
         return True
 
-    def __init__(self, prefix, modelsim_ini="modelsim.ini", persistent=False, gui=False, coverage=None):
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 prefix, modelsim_ini="modelsim.ini", persistent=False, gui=False, coverage=None,
+                 persistent_compile=False, reuse_design=False, recycle_after=None):
         SimulatorInterface.__init__(self)
-        VsimSimulatorMixin.__init__(self, prefix, persistent, gui, modelsim_ini)
+        VsimSimulatorMixin.__init__(self, prefix, persistent, gui, modelsim_ini, persistent_compile, reuse_design,
+                                    recycle_after)
         self._libraries = []
         self._coverage = coverage
         self._coverage_files = set()
@@ -14,9 +14,11 @@ from __future__ import print_function
 
 import time
 import subprocess
+import signal
 import threading
 import shutil
 import sys
+import codecs
 try:
     # Python 3.x
     from queue import Queue, Empty
@@ -29,6 +31,7 @@ import os
 import io
 
 import logging
+import weakref
 LOGGER = logging.getLogger(__name__)
 
 IS_WINDOWS_SYSTEM = os.name == 'nt'
@@ -39,40 +42,82 @@ class ProgramStatus(object):
     Maintain global program status to support graceful shutdown
     """
     def __init__(self):
+        self._shutdown_event = threading.Event()
         self._lock = threading.Lock()
-        self._shutting_down = False
+        self._listeners = weakref.WeakSet()
 
     @property
     def is_shutting_down(self):
-        with self._lock:  # pylint: disable=not-context-manager
-            return self._shutting_down
+        return self._shutdown_event.is_set()
 
     def check_for_shutdown(self):
         if self.is_shutting_down:
             raise KeyboardInterrupt
 
+    def wait_for_shutdown(self, timeout):
+        """
+        Block until shutdown or timeout seconds have passed, returns True on shutdown
+        """
+        self._shutdown_event.wait(timeout)
+        return self.is_shutting_down
+
+    def add_listener(self, listener):
+        """
+        Call the on_shutdown method of listener at shutdown, the listener is weakly referenced
+        """
+        with self._lock:  # pylint: disable=not-context-manager
+            self._listeners.add(listener)
+
     def shutdown(self):
+        """
+        Signal shutdown and wake up all listeners
+        """
         with self._lock:  # pylint: disable=not-context-manager
-            self._shutting_down = True
+            self._shutdown_event.set()
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            listener.on_shutdown()
 
 PROGRAM_STATUS = ProgramStatus()
 
+# Blocking waits are done in slices of this many seconds such that Ctrl-C
+# is handled also where blocking waits cannot be interrupted by signals
+# such as on Windows and Python 2. Other wake ups are event driven.
+INTERRUPT_CHECK_INTERVAL = 1.0
+
 
 class InterruptableQueue(object):
     """
-    A Queue which can be interrupted
+    A Queue which can be interrupted by PROGRAM_STATUS.shutdown
     """
 
+    # Put into the queue to wake up getters at shutdown
+    _SHUTDOWN = object()
+
     def __init__(self):
         self._queue = Queue()
+        PROGRAM_STATUS.add_listener(self)
 
     def get(self):
+        """
+        Block until there is a value, raises KeyboardInterrupt at shutdown
+        """
         while True:
             PROGRAM_STATUS.check_for_shutdown()
             try:
-                return self._queue.get(timeout=0.1)
+                # Shutdown wakes the getters immediately through on_shutdown. The timeout is only
+                # there for Ctrl-C in the main thread, whose signal handler cannot run while it is
+                # blocked on the lock of the queue on Windows and Python 2.
+                value = self._queue.get(timeout=INTERRUPT_CHECK_INTERVAL)
             except Empty:
-                pass
+                continue
+
+            if value is self._SHUTDOWN:
+                # Leave it for other getters
+                self._queue.put(value)
+                raise KeyboardInterrupt
+            return value
 
     def put(self, value):
         self._queue.put(value)
@@ -80,6 +125,74 @@ class InterruptableQueue(object):
     def empty(self):
         return self._queue.empty()
 
+    def on_shutdown(self):
+        self._queue.put(self._SHUTDOWN)
+
+
+class ProcessWatch(object):
+    """
+    Watch the processes started by a thread such that another thread can kill them
+
+    Processes started by the thread within the with statement are watched,
+    kill() kills them and any process started by the thread afterwards until the with statement is left
+    """
+
+    _local = threading.local()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._processes = []
+        self._watching = False
+        self._previous = None
+        self.killed = False
+
+    def __enter__(self):
+        self._previous = getattr(self._local, "watch", None)
+        self._local.watch = self
+        with self._lock:  # pylint: disable=not-context-manager
+            self._watching = True
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+        self._local.watch = self._previous
+
+    def stop(self):
+        """
+        Stop watching such that kill() does nothing
+        """
+        with self._lock:  # pylint: disable=not-context-manager
+            self._watching = False
+            self._processes = []
+
+    @classmethod
+    def add_to_current(cls, process):
+        """
+        Add the process to the watch of the current thread if any
+        """
+        watch = getattr(cls._local, "watch", None)
+        if watch is None:
+            return
+
+        with watch._lock:  # pylint: disable=protected-access
+            watch._processes.append(process)  # pylint: disable=protected-access
+            kill = watch.killed
+        if kill:
+            process.kill_group()
+
+    def kill(self):
+        """
+        Kill the process groups of the watched processes, does nothing when no longer watching
+        """
+        with self._lock:  # pylint: disable=not-context-manager
+            if not self._watching:
+                return
+            self.killed = True
+            processes = list(self._processes)
+
+        for process in processes:
+            process.kill_group()
+
 
 class Process(object):
     """
@@ -90,8 +203,16 @@ class Process(object):
     class NonZeroExitCode(Exception):
         pass
 
-    def __init__(self, args, cwd=None, env=None):
+    # Size of the chunks read from the process output in raw mode
+    RAW_CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, args, cwd=None, env=None, raw_output=False):
+        """
+        raw_output -- Read the output in large binary chunks to be consumed by consume_output_raw
+                      instead of line by line
+        """
         self._args = args
+        self._raw_output = raw_output
 
         # Create process with new process group
         # Sending a signal to a process group will send it to all children
@@ -105,7 +226,7 @@ class Process(object):
                 stdout=subprocess.PIPE,
                 stdin=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                universal_newlines=True,
+                universal_newlines=not raw_output,
                 # Create new process group on Windows
                 creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
         else:
@@ -117,27 +238,46 @@ class Process(object):
                 stdout=subprocess.PIPE,
                 stdin=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                universal_newlines=True,
+                universal_newlines=not raw_output,
                 # Create new process group on POSIX, setpgrp does not exist on Windows
                 preexec_fn=os.setpgrp)  # pylint: disable=no-member
 
         LOGGER.debug("Started process with pid=%i: '%s'", self._process.pid, (" ".join(args)))
+        ProcessWatch.add_to_current(self)
 
         self._queue = InterruptableQueue()
-        self._reader = AsynchronousFileReader(self._process.stdout, self._queue)
+        if raw_output:
+            self._reader = AsynchronousRawReader(self._process.stdout, self._queue, self.RAW_CHUNK_SIZE)
+            self._raw = _RawOutput()
+        else:
+            self._reader = AsynchronousFileReader(self._process.stdout, self._queue)
         self._reader.start()
 
     def write(self, *args, **kwargs):
         """ Write to stdin """
         if not self._process.stdin.closed:
+            if self._raw_output:
+                args = tuple(self._encode(arg) for arg in args)
             self._process.stdin.write(*args, **kwargs)
 
     def writeline(self, line):
         """ Write a line to stdin """
         if not self._process.stdin.closed:
-            self._process.stdin.write(line + "\n")
+            line = line + "\n"
+            if self._raw_output:
+                line = self._encode(line)
+            self._process.stdin.write(line)
             self._process.stdin.flush()
 
+    @staticmethod
+    def _encode(text):
+        """
+        Encode text written to stdin of a process in raw mode
+        """
+        if isinstance(text, bytes):
+            return text
+        return text.encode("utf-8")
+
     def next_line(self):
         """
         Return either the next line or the exit code
@@ -155,14 +295,20 @@ class Process(object):
 
     def wait(self):
         """
-        Wait while without completely blocking to avoid
-        deadlock when shutting down
+        Wait for the process to exit, raises KeyboardInterrupt at shutdown
+
+        The process closes its output when it exits so first wait for the
+        reader thread to end, join returns as soon as it does, and then block
+        in Popen.wait which returns without polling once the process has exited.
+        Processes are killed at shutdown which also ends their output.
         """
-        while self._process.poll() is None:
+        while self._reader.is_alive():
             PROGRAM_STATUS.check_for_shutdown()
-            time.sleep(0.05)
             LOGGER.debug("Waiting for process with pid=%i to stop", self._process.pid)
-        return self._process.returncode
+            self._reader.join(INTERRUPT_CHECK_INTERVAL)
+
+        PROGRAM_STATUS.check_for_shutdown()
+        return self._process.wait()
 
     def is_alive(self):
         """
@@ -198,10 +344,97 @@ class Process(object):
                 if retcode != 0:
                     raise Process.NonZeroExitCode
 
-        except:
+        except BaseException:
+            self.terminate()
+            raise
+        self.terminate()
+
+    def consume_output_raw(self, output=None, marker=None):
+        """
+        Consume the output of a process created with raw_output=True.
+        The output is read in large chunks and written to output without
+        creating an object per line. Only the marker is searched for.
+
+        @param output A file like object the output is written to as UTF-8 text, discarded if None
+        @param marker Stop consuming at the first line containing the marker
+        @returns The line containing the marker which is not written to output,
+                 None when the process has exited without printing the marker
+        @raises Process.NonZeroExitCode when the process does not exit with code zero
+        """
+        assert self._raw_output
+
+        try:
+            line = self._consume_raw(output, None if marker is None else self._encode(marker))
+            if line is not None:
+                return line
+
+            retcode = None
+            while retcode is None:
+                retcode = self.wait()
+                if retcode != 0:
+                    raise Process.NonZeroExitCode
+
+        except BaseException:
             self.terminate()
             raise
         self.terminate()
+        return None
+
+    def _consume_raw(self, output, marker):
+        """
+        Write output until the line containing marker or the end of output
+        Incomplete lines are held back such that the marker is only searched for in complete lines
+        """
+        raw = self._raw
+        data = raw.pending
+        raw.pending = b""
+
+        while True:
+            end = data.rfind(b"\n") + 1
+            if raw.eof or len(data) - end > self.RAW_CHUNK_SIZE:
+                # Do not hold back the last line at the end or when it is very long
+                end = len(data)
+            complete, data = data[:end], data[end:]
+
+            if marker is not None:
+                pos = complete.find(marker)
+                if pos != -1:
+                    line_start = complete.rfind(b"\n", 0, pos) + 1
+                    line_end = complete.find(b"\n", pos)
+                    if line_end == -1:
+                        line_end = len(complete)
+                    raw.write(output, complete[:line_start])
+                    raw.pending = complete[line_end + 1:] + data
+                    return complete[line_start:line_end].decode("utf-8", "ignore").rstrip("\r")
+
+            raw.write(output, complete)
+
+            if raw.eof:
+                raw.write(output, b"", final=True)
+                return None
+
+            chunk = self._queue.get()
+            if chunk is None:
+                raw.eof = True
+            else:
+                data += chunk
+
+    def kill_group(self):
+        """
+        Kill the process and all processes in its process group
+        """
+        if self._process.poll() is not None:
+            return
+
+        LOGGER.debug("Killing process group of pid=%i", self._process.pid)
+        if IS_WINDOWS_SYSTEM:
+            self._process.kill()
+        else:
+            try:
+                os.killpg(self._process.pid, signal.SIGKILL)  # pylint: disable=no-member
+            except OSError:
+                # Already exited
+                pass
 
     def terminate(self):
         """
@@ -235,6 +468,27 @@ class Process(object):
         self.terminate()
 
 
+class _RawOutput(object):
+    """
+    The state of consuming the output of a process in raw mode
+    """
+
+    def __init__(self):
+        # Output read but not yet consumed by consume_output_raw
+        self.pending = b""
+        self.eof = False
+        self._decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder("utf-8")(errors="ignore"), translate=True)
+
+    def write(self, output, data, final=False):
+        """
+        Decode data as UTF-8 text and write it to output, does nothing if output is None
+        Decoding continues across calls such that characters may be split between them
+        """
+        if output is not None and (data or final):
+            output.write(self._decoder.decode(data, final))
+
+
 class AsynchronousFileReader(threading.Thread):
     """
     Helper class to implement asynchronous reading of a file
@@ -273,6 +527,37 @@ class AsynchronousFileReader(threading.Thread):
         return not self.is_alive() and self._queue.empty()
 
 
+class AsynchronousRawReader(threading.Thread):
+    """
+    Helper class to implement asynchronous reading of a file
+    in a separate thread. Pushes chunks of bytes on a queue to
+    be consumed in another thread.
+    """
+
+    def __init__(self, fd, queue, chunk_size):
+        threading.Thread.__init__(self)
+        self._fd = fd
+        self._queue = queue
+        self._chunk_size = chunk_size
+
+    def run(self):
+        """The body of the tread: read chunks and put them on the queue."""
+        # os.read returns what is available instead of waiting for a full chunk
+        for chunk in iter(lambda: os.read(self._fd.fileno(), self._chunk_size), b''):
+            if PROGRAM_STATUS.is_shutting_down:
+                break
+            self._queue.put(chunk)
+        self._queue.put(None)
+
+    def eof(self):
+        """Check whether there is no more content to expect."""
+        return not self.is_alive() and self._queue.empty()
+
+
+# Both VHDL and Verilog standardize on ISO-8859-1 which is latin-1
+HDL_FILE_ENCODING = "latin-1"
+
+
 def read_file(file_name, encoding="utf-8"):
     """ To stub during testing """
     try:
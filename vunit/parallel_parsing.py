@@ -0,0 +1,54 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2017, Lars Asplund lars.anders.asplund@gmail.com
+
+"""
+Parsing of HDL files in worker processes to fill the parse caches
+"""
+
+from multiprocessing import Pool
+from vunit.vhdl_parser import VHDLParser
+from vunit.parsing.verilog.parser import VerilogParser
+
+
+def parse_files_in_processes(vhdl_misses, verilog_misses, num_processes):
+    """
+    Parse the files using a pool of num_processes processes
+
+    :param vhdl_misses: A list of (file_name, content_hash) tuples
+    :param verilog_misses: A list of (file_name, include_dirs, defines) tuples
+    :returns: The VHDL and Verilog parse results which are None for files which failed to parse
+    """
+    pool = Pool(num_processes)
+    try:
+        vhdl_results = pool.map(_parse_vhdl_file, [file_name for file_name, _ in vhdl_misses])
+        verilog_results = pool.map(_parse_verilog_file, verilog_misses)
+    finally:
+        pool.terminate()
+        pool.join()
+    return vhdl_results, verilog_results
+
+
+def _parse_vhdl_file(file_name):
+    """
+    Parse a VHDL file within a worker process
+    Parse errors are reported when the file is parsed again by the main process
+    """
+    try:
+        return VHDLParser.parse(None, file_name)
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+
+def _parse_verilog_file(args):
+    """
+    Parse a Verilog file within a worker process
+    Parse errors are reported when the file is parsed again by the main process
+    """
+    file_name, include_dirs, defines = args
+    try:
+        return VerilogParser().parse_uncached(None, file_name, include_dirs, defines)
+    except Exception:  # pylint: disable=broad-except
+        return None
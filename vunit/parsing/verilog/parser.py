@@ -13,12 +13,12 @@ Verilog parsing functionality
 
 import logging
 from os.path import dirname, exists, abspath
-from vunit.ostools import read_file
+from vunit.ostools import read_file, HDL_FILE_ENCODING
 from vunit.parsing.tokenizer import TokenStream, EOFException, LocationException
 from vunit.parsing.verilog.tokenizer import VerilogTokenizer
 from vunit.parsing.verilog.preprocess import VerilogPreprocessor, find_included_file, Macro
 from vunit.parsing.verilog.tokens import *
-from vunit.hashing import hash_string
+from vunit.content_hash_cache import ContentHashCache
 
 LOGGER = logging.getLogger(__name__)
 
@@ -28,24 +28,37 @@ class VerilogParser(object):
     Parse a single Verilog file
     """
 
-    def __init__(self, database=None):
+    def __init__(self, database=None, content_hash_cache=None):
         self._tokenizer = VerilogTokenizer()
         self._preprocessor = VerilogPreprocessor(self._tokenizer)
         self._database = database
-        self._content_cache = {}
+        self._content_hash_cache = ContentHashCache() if content_hash_cache is None else content_hash_cache
 
     def parse(self, code, file_name, include_paths=None, defines=None):
         """
         Parse verilog code
+        The code is read from file_name when None and not found in the cache
         """
 
         defines = {} if defines is None else defines
         include_paths = [] if include_paths is None else include_paths
 
-        cached = self._lookup_parse_cache(file_name, include_paths, defines)
+        cached = self.lookup(file_name, include_paths, defines)
         if cached is not None:
             return cached
 
+        result, included_files = self.parse_uncached(code, file_name, include_paths, defines)
+        self.store(file_name, result, included_files, defines)
+        return result
+
+    def parse_uncached(self, code, file_name, include_paths, defines):
+        """
+        Parse verilog code without using the cache
+        Returns the parse result and the (include string, file name) pairs of all included files
+        """
+        if code is None:
+            code = read_file(file_name, encoding=HDL_FILE_ENCODING)
+
         initial_defines = dict((key, Macro(key, self._tokenizer.tokenize(value)))
                                for key, value in defines.items())
         tokens = self._tokenizer.tokenize(code, file_name=file_name)
@@ -57,12 +70,7 @@ class VerilogParser(object):
 
         included_files_for_design_file = [name for _, name in included_files if name is not None]
         result = VerilogDesignFile.parse(pp_tokens, included_files_for_design_file)
-
-        if self._database is None:
-            return result
-
-        self._store_result(file_name, result, included_files, defines)
-        return result
+        return result, included_files
 
     @staticmethod
     def _key(file_name):
@@ -71,15 +79,17 @@ class VerilogParser(object):
         """
         return ("CachedVerilogParser.parse(%s)" % abspath(file_name)).encode()
 
-    def _store_result(self, file_name, result, included_files, defines):
+    def store(self, file_name, result, included_files, defines):
         """
         Store parse result into back into cache
         """
+        if self._database is None:
+            return
+
         new_included_files = [(short_name, full_name, self._content_hash(full_name))
                               for short_name, full_name in included_files]
         key = self._key(file_name)
         self._database[key] = self._content_hash(file_name), new_included_files, defines, result
-        return result
 
     def _content_hash(self, file_name):
         """
@@ -87,13 +97,12 @@ class VerilogParser(object):
         """
         if file_name is None or not exists(file_name):
             return None
-        if file_name not in self._content_cache:
-            self._content_cache[file_name] = "sha1:" + hash_string(read_file(file_name))
-        return self._content_cache[file_name]
+        return "sha1:" + self._content_hash_cache.content_hash(file_name)
 
-    def _lookup_parse_cache(self, file_name, include_paths, defines):
+    def lookup(self, file_name, include_paths, defines):
         """
         Use verilog code from cache
+        Returns None when there is no valid cached parse result
         """
         # pylint: disable=too-many-return-statements
 
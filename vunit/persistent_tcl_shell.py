@@ -10,8 +10,11 @@ A persistent TCL shell to avoid startup overhead in TCL-based simulators
 
 from __future__ import print_function
 import threading
+import itertools
 import logging
-from vunit.ostools import Process
+import sys
+import io
+from vunit.ostools import Process, ProcessWatch
 
 LOGGER = logging.getLogger(__name__)
 
@@ -19,49 +22,159 @@ LOGGER = logging.getLogger(__name__)
 class PersistentTclShell(object):
     """
     A persistent TCL shell
+
+    Each thread uses its own process. Processes can be started in the background
+    before they are needed and are handed to the first threads using the shell.
     """
 
-    def __init__(self, create_process):
+    def __init__(self, create_process, max_tests=None):
+        """
+        create_process(ident) -- Create a new process, ident is unique for each process
+        max_tests -- Replace the process of a thread after it has run this many tests
+        """
         self._processes = {}
-        self._lock = threading.Lock()
-        self._create_process = create_process
+        self._idle = []
+        self._num_starting = 0
+        # Incremented on teardown to discard processes which are still starting
+        self._generation = 0
+        self._recycling = _Recycling(max_tests)
+        self._condition = threading.Condition()
+
+        idents = itertools.count(1)
+
+        def new_process():
+            """
+            Create a new process, must hold the lock
+            """
+            return create_process(next(idents))
+
+        self._new_process = new_process
 
     def _process(self):
         """
-        Create the vsim process
+        Return the vsim process of the current thread
         """
         ident = threading.current_thread().ident
 
-        with self._lock:  # pylint: disable=not-context-manager
-            try:
-                process = self._processes[ident]
-                if process.is_alive():
-                    return process
-            except KeyError:
-                pass
+        with self._condition:  # pylint: disable=not-context-manager
+            process = self._processes.get(ident, None)
+            if process is not None and process.is_alive():
+                # Allow the current test to kill the re-used process when timing out
+                ProcessWatch.add_to_current(process)
+                return process
 
-            process = self._create_process(ident)
+            process = self._take_idle_process()
+            if process is not None:
+                self._processes[ident] = process
+                ProcessWatch.add_to_current(process)
+                return process
+
+            process = self._new_process()
             self._processes[ident] = process
 
+        self._wait_until_ready(process)
+        return process
+
+    def _take_idle_process(self):
+        """
+        Return a started process which is still alive waiting for the processes being started
+        Returns None when there are no started processes, must hold the lock
+        """
+        while True:
+            self._idle = [process for process in self._idle if process.is_alive()]
+            if self._idle:
+                return self._idle.pop(0)
+
+            if self._num_starting == 0:
+                return None
+
+            self._condition.wait()
+
+    @staticmethod
+    def _wait_until_ready(process):
+        """
+        Wait until the process is ready to execute commands
+        """
         process.writeline("puts #VUNIT_RETURN")
+        output = io.StringIO()
         try:
-            consumer = SilentOutputConsumer()
-            process.consume_output(consumer)
+            process.consume_output_raw(output, "#VUNIT_RETURN")
         except Process.NonZeroExitCode:
             # Print output if background vsim process startup failed
             LOGGER.error("Failed to start re-usable background process")
-            print(consumer.output)
+            print(output.getvalue())
             raise
-        return process
 
-    def execute(self, cmd):
+    def start_in_background(self, num_processes):
+        """
+        Start processes in the background which are handed to the first threads using the shell
+        """
+        with self._condition:  # pylint: disable=not-context-manager
+            self._num_starting += num_processes
+            generation = self._generation
+
+        for _ in range(num_processes):
+            thread = threading.Thread(target=self._start_idle_process, args=(generation,))
+            thread.daemon = True
+            thread.start()
+
+    def _start_idle_process(self, generation):
+        """
+        Start a process and add it to the idle processes when it is ready
+        """
+        process = None
+        try:
+            with self._condition:  # pylint: disable=not-context-manager
+                process = self._new_process()
+            self._wait_until_ready(process)
+        except (Process.NonZeroExitCode, OSError):
+            process = None
+        finally:
+            with self._condition:  # pylint: disable=not-context-manager
+                self._num_starting -= 1
+                if process is not None:
+                    if generation == self._generation:
+                        self._idle.append(process)
+                    else:
+                        self._quit([process])
+                self._condition.notify_all()
+
+    def set_num_tests(self, num_tests):
+        """
+        Set the number of tests left to run such that no process is started to
+        replace a recycled process when there are no more tests
+        """
+        with self._condition:  # pylint: disable=not-context-manager
+            self._recycling.num_tests_left = num_tests
+
+    def test_done(self):
+        """
+        Count a test run by the process of the current thread and replace the process
+        after it has run max_tests tests to bound its memory usage
+        """
+        ident = threading.current_thread().ident
+        with self._condition:  # pylint: disable=not-context-manager
+            process = self._processes.get(ident, None)
+            if not self._recycling.test_done(process):
+                return
+            del self._processes[ident]
+            start_replacement = self._recycling.tests_left()
+
+        LOGGER.debug("Recycling re-usable background process after %i tests", self._recycling.max_tests)
+        self._quit([process])
+        if start_replacement:
+            self.start_in_background(1)
+
+    def execute(self, cmd, output=None):
         """
         Execute a command to the persistent TCL shell
+
+        @param output A file like object the output is written to, sys.stdout if None
         """
         process = self._process()
         process.writeline(cmd)
         process.writeline("puts #VUNIT_RETURN")
-        process.consume_output(output_consumer)
+        process.consume_output_raw(sys.stdout if output is None else output, "#VUNIT_RETURN")
 
     def read_var(self, varname):
         """
@@ -69,59 +182,69 @@ class PersistentTclShell(object):
         """
         process = self._process()
         process.writeline("puts #VUNIT_READVAR=${%s}" % varname)
-        consumer = ReadVarOutputConsumer()
-        process.consume_output(consumer)
-        return consumer.var
+        line = process.consume_output_raw(sys.stdout, "#VUNIT_READVAR=")
+        return None if line is None else line.split("#VUNIT_READVAR=")[-1].strip()
+
+    @staticmethod
+    def _quit(processes):
+        """
+        Quit the processes and wait until they have exited
+        """
+        for proc in processes:
+            if proc.is_alive():
+                proc.writeline("quit -force -code 0")
+
+        for proc in processes:
+            if proc.is_alive():
+                proc.wait()
 
     def teardown(self):
         """
         Teardown all active processes before shutdown
         """
-        with self._lock:  # pylint: disable=not-context-manager
-            for proc in self._processes.values():
-                if proc.is_alive():
-                    proc.writeline("quit -force -code 0")
-
-            for proc in self._processes.values():
-                if proc.is_alive():
-                    proc.wait()
+        with self._condition:  # pylint: disable=not-context-manager
+            self._quit(list(self._processes.values()) + self._idle)
             self._processes = {}
+            self._idle = []
+            self._recycling.clear()
+            self._generation += 1
 
     def __del__(self):
         self.teardown()
 
 
-def output_consumer(line):
+class _Recycling(object):
     """
-    Consume output until reaching #VUNIT_RETURN
+    Count the tests run by each process to recycle it after max_tests tests
     """
-    if line.endswith("#VUNIT_RETURN"):
-        return True
-
-    print(line)
 
+    def __init__(self, max_tests):
+        self.max_tests = max_tests
+        # None when the number of tests left to run is not known
+        self.num_tests_left = None
+        self._num_tests = {}
 
-class SilentOutputConsumer(object):
-    """
-    Consume output until reaching #VUNIT_RETURN, silent
-    """
-    def __init__(self):
-        self.output = ""
+    def test_done(self, process):
+        """
+        Count a test run by process, returns True when the process shall be recycled
+        """
+        if self.num_tests_left is not None:
+            self.num_tests_left -= 1
 
-    def __call__(self, line):
-        if line.endswith("#VUNIT_RETURN"):
-            return True
-        else:
-            self.output += line + "\n"
+        if self.max_tests is None or process is None:
+            return False
 
+        num_tests = self._num_tests.pop(process, 0) + 1
+        if num_tests < self.max_tests:
+            self._num_tests[process] = num_tests
+            return False
+        return True
 
-class ReadVarOutputConsumer(object):
-    """
-    Consume output from modelsim and print with indentation
-    """
-    def __init__(self):
-        self.var = None
+    def tests_left(self):
+        """
+        Returns True unless all tests are known to be done
+        """
+        return self.num_tests_left is None or self.num_tests_left > 0
 
-    def __call__(self, line):
-        self.var = line.split("#VUNIT_READVAR=")[-1].strip()
-        return True
+    def clear(self):
+        self._num_tests = {}
@@ -11,19 +11,23 @@ Functionality to represent and operate on a HDL code project
 """
 
 
-from os.path import join, basename, dirname, splitext
+from os.path import join, splitext
 import traceback
 import logging
 from collections import OrderedDict
 from vunit.hashing import hash_string
 from vunit.dependency_graph import (DependencyGraph,
                                     CircularDependencyException)
-from vunit.vhdl_parser import VHDLParser, VHDLReference
+from vunit.vhdl_parser import VHDLParser, CachedVHDLParser, VHDLReference
 from vunit.parsing.verilog.parser import VerilogParser
 from vunit.exceptions import CompileError
 from vunit.simulator_factory import SimulatorFactory
 from vunit.design_unit import DesignUnit, VHDLDesignUnit, Entity, Module
+from vunit.content_hash_cache import ContentHashCache
+from vunit.compile_manifest import CompileManifest
+from vunit.parallel_parsing import parse_files_in_processes
 import vunit.ostools as ostools
+from vunit.ostools import HDL_FILE_ENCODING
 LOGGER = logging.getLogger(__name__)
 
 
@@ -36,10 +40,15 @@ class Project(object):
     def __init__(self,
                  depend_on_package_body=False,
                  vhdl_parser=None,
-                 verilog_parser=None):
+                 verilog_parser=None,
+                 content_hash_cache=None):
         """
         depend_on_package_body - Package users depend also on package body
+        content_hash_cache - Cache of source file content hashes
         """
+        self._compile_state = _CompileState(
+            ContentHashCache() if content_hash_cache is None else content_hash_cache,
+            depend_on_package_body)
         self._vhdl_parser = VHDLParser() if vhdl_parser is None else vhdl_parser
         self._verilog_parser = VerilogParser() if verilog_parser is None else verilog_parser
         self._libraries = OrderedDict()
@@ -47,7 +56,6 @@ class Project(object):
         self._lower_libray_names_dict = {}
         self._source_files_in_order = []
         self._manual_dependencies = []
-        self._depend_on_package_body = depend_on_package_body
 
     def _validate_library_name(self, library_name):
         """
@@ -81,6 +89,7 @@ class Project(object):
 
         self._libraries[logical_name] = library
         self._lower_libray_names_dict[logical_name.lower()] = library.name
+        self._compile_state.dependency_graphs.clear()
 
     def add_source_file(self,    # pylint: disable=too-many-arguments
                         file_name, library_name, file_type='vhdl', include_dirs=None, defines=None,
@@ -104,23 +113,73 @@ class Project(object):
                 library,
                 vhdl_parser=self._vhdl_parser,
                 vhdl_standard=library.vhdl_standard if vhdl_standard is None else vhdl_standard,
-                no_parse=no_parse)
+                no_parse=no_parse,
+                content_hash_cache=self._compile_state.content_hash_cache)
             library.add_vhdl_design_units(source_file.design_units)
         elif file_type == "verilog":
-            source_file = VerilogSourceFile(file_name, library, self._verilog_parser, include_dirs, defines, no_parse)
+            source_file = VerilogSourceFile(file_name, library, self._verilog_parser, include_dirs, defines, no_parse,
+                                            content_hash_cache=self._compile_state.content_hash_cache)
             library.add_verilog_design_units(source_file.design_units)
         else:
             raise ValueError(file_type)
 
         library.add_source_file(source_file)
         self._source_files_in_order.append(source_file)
+        self._compile_state.dependency_graphs.clear()
         return source_file
 
+    def fill_parse_cache(self, files, num_processes):
+        """
+        Parse files without cached parse results using num_processes processes
+        such that subsequent add_source_file calls re-use the parse results
+
+        :param files: A list of (file_name, file_type, include_dirs, defines) tuples
+        """
+        if num_processes <= 1:
+            return
+
+        vhdl_misses, verilog_misses = self._find_parse_cache_misses(files)
+        if len(vhdl_misses) + len(verilog_misses) <= 1:
+            return
+
+        LOGGER.debug("Parsing %i files using %i processes", len(vhdl_misses) + len(verilog_misses), num_processes)
+        vhdl_results, verilog_results = parse_files_in_processes(vhdl_misses, verilog_misses, num_processes)
+
+        for (file_name, content_hash), design_file in zip(vhdl_misses, vhdl_results):
+            if design_file is not None:
+                self._vhdl_parser.store(file_name, content_hash, design_file)
+
+        for (file_name, _, defines), result in zip(verilog_misses, verilog_results):
+            if result is not None:
+                design_file, included_files = result
+                self._verilog_parser.store(file_name, design_file, included_files, defines)
+
+    def _find_parse_cache_misses(self, files):
+        """
+        Return the VHDL and Verilog files of fill_parse_cache without cached parse results
+        VHDL files are only returned when the VHDL parser caches parse results
+        """
+        content_hash_cache = self._compile_state.content_hash_cache
+        vhdl_misses = []
+        verilog_misses = []
+        for file_name, file_type, include_dirs, defines in files:
+            if file_type == "vhdl" and isinstance(self._vhdl_parser, CachedVHDLParser):
+                content_hash = content_hash_cache.content_hash(file_name, encoding=HDL_FILE_ENCODING)
+                if self._vhdl_parser.lookup(file_name, content_hash) is None:
+                    vhdl_misses.append((file_name, content_hash))
+            elif file_type == "verilog":
+                include_dirs = [] if include_dirs is None else include_dirs
+                defines = {} if defines is None else defines
+                if self._verilog_parser.lookup(file_name, include_dirs, defines) is None:
+                    verilog_misses.append((file_name, include_dirs, defines))
+        return vhdl_misses, verilog_misses
+
     def add_manual_dependency(self, source_file, depends_on):
         """
         Add manual dependency where 'source_file' depends_on 'depends_on'
         """
         self._manual_dependencies.append((source_file, depends_on))
+        self._compile_state.dependency_graphs.clear()
 
     @staticmethod
     def _find_primary_secondary_design_unit_dependencies(source_file):
@@ -251,6 +310,18 @@ class Project(object):
     def create_dependency_graph(self, implementation_dependencies=False):
         """
         Create a DependencyGraph object of the HDL code project
+
+        The graph is re-used until a library, source file or manual dependency
+        is added and must not be modified by the caller
+        """
+        dependency_graphs = self._compile_state.dependency_graphs
+        if implementation_dependencies not in dependency_graphs:
+            dependency_graphs[implementation_dependencies] = self._create_dependency_graph(implementation_dependencies)
+        return dependency_graphs[implementation_dependencies]
+
+    def _create_dependency_graph(self, implementation_dependencies):
+        """
+        Create a new DependencyGraph object of the HDL code project
         """
         def add_dependency(start, end):
             """
@@ -281,7 +352,7 @@ class Project(object):
                       for source_file in self.get_source_files_in_order()
                       if source_file.file_type == 'vhdl']
 
-        depend_on_package_bodies = self._depend_on_package_body or implementation_dependencies
+        depend_on_package_bodies = self._compile_state.depend_on_package_body or implementation_dependencies
         add_dependencies(
             lambda source_file: self._find_other_vhdl_design_unit_dependencies(source_file, depend_on_package_bodies),
             vhdl_files)
@@ -310,32 +381,37 @@ class Project(object):
         LOGGER.error("Found circular dependency:\n%s",
                      " ->\n".join(source_file.name for source_file in exception.path))
 
-    def get_files_in_compile_order(self, incremental=True, dependency_graph=None):
+    def get_files_in_compile_order(self, incremental=True, dependency_graph=None, target_files=None):
         """
         Get a list of all files in compile order
         incremental -- Only return files that need recompile if True
+        target_files -- Only return files required to simulate the target files if not None
         """
         if dependency_graph is None:
             dependency_graph = self.create_dependency_graph()
 
-        files = []
-        for source_file in self.get_source_files_in_order():
-            if (not incremental) or self._needs_recompile(dependency_graph, source_file):
-                files.append(source_file)
-
-        # Get files that are affected by recompiling the modified files
         try:
+            required_files = None
+            if target_files is not None:
+                required_files = self.create_dependency_graph(implementation_dependencies=True).get_dependencies(
+                    set(target_files))
+
+            files = []
+            for source_file in self.get_source_files_in_order():
+                if required_files is not None and source_file not in required_files:
+                    continue
+                if (not incremental) or self._needs_recompile(dependency_graph, source_file):
+                    files.append(source_file)
+
+            # Get files that are affected by recompiling the modified files
             affected_files = dependency_graph.get_dependent(files)
-            compile_order = dependency_graph.toposort()
+            if required_files is not None:
+                affected_files &= required_files
+            return dependency_graph.sort_nodes(affected_files)
         except CircularDependencyException as exc:
             self._handle_circular_dependency(exc)
             raise CompileError
 
-        def comparison_key(source_file):
-            return compile_order.index(source_file)
-
-        return sorted(affected_files, key=comparison_key)
-
     def get_dependencies_in_compile_order(self, target_files=None, implementation_dependencies=False):
         """
         Get a list of dependencies of target files including the
@@ -350,17 +426,11 @@ class Project(object):
 
         try:
             affected_files = dependency_graph.get_dependencies(set(target_files))
-            compile_order = dependency_graph.toposort()
+            return dependency_graph.sort_nodes(affected_files)
         except CircularDependencyException as exc:
             self._handle_circular_dependency(exc)
             raise CompileError
 
-        def comparison_key(source_file):
-            return compile_order.index(source_file)
-
-        sorted_files = sorted(affected_files, key=comparison_key)
-        return sorted_files
-
     def get_source_files_in_order(self):
         """
         Get a list of source files in the order they were added to the project
@@ -379,55 +449,81 @@ class Project(object):
     def _needs_recompile(self, dependency_graph, source_file):
         """
         Returns True if the source_file needs to be recompiled
-        given the dependency_graph, the file contents and the last modification time
+        given the dependency_graph, the file contents and the compile manifest
         """
-        content_hash = source_file.content_hash
-        content_hash_file_name = self._hash_file_name_of(source_file)
-        if not ostools.file_exists(content_hash_file_name):
-            LOGGER.debug("%s has no vunit_hash file at %s and must be recompiled",
-                         source_file.name, content_hash_file_name)
+        entry = self._get_compile_manifest(source_file).get(source_file.name)
+        if entry is None:
+            LOGGER.debug("%s has no compile manifest entry and must be recompiled",
+                         source_file.name)
             return True
 
-        old_content_hash = ostools.read_file(content_hash_file_name)
-        if old_content_hash != content_hash:
+        old_content_hash, _, old_dependencies = entry
+        if old_content_hash != source_file.content_hash:
             LOGGER.debug("%s has different hash than last time and must be recompiled",
                          source_file.name)
             return True
 
         for other_file in dependency_graph.get_direct_dependencies(source_file):
-            other_content_hash_file_name = self._hash_file_name_of(other_file)
+            other_entry = self._get_compile_manifest(other_file).get(other_file.name)
 
-            if not ostools.file_exists(other_content_hash_file_name):
+            if other_entry is None:
                 continue
 
-            if more_recent(other_content_hash_file_name, content_hash_file_name):
-                LOGGER.debug("%s has dependency compiled earlier and must be recompiled",
+            if old_dependencies.get(other_file.name) != other_entry[1]:
+                LOGGER.debug("%s has dependency compiled since it was compiled and must be recompiled",
                              source_file.name)
                 return True
 
-        LOGGER.debug("%s has same hash file and must not be recompiled",
+        LOGGER.debug("%s has same hash and dependencies and must not be recompiled",
                      source_file.name)
 
         return False
 
-    def _hash_file_name_of(self, source_file):
+    def _get_compile_manifest(self, source_file):
         """
-        Returns the name of the hash file associated with the source_file
+        Returns the compile manifest of the library of the source_file
         """
-        library = self.get_library(source_file.library.name)
-        prefix = hash_string(dirname(source_file.name))
-        return join(library.directory, prefix, basename(source_file.name) + ".vunit_hash")
+        return self._compile_state.get_compile_manifest(self.get_library(source_file.library.name).directory)
 
     def update(self, source_file):
         """
-        Mark that source_file has been recompiled, triggers a re-write of the hash file
-        to update the timestamp
+        Mark that source_file has been recompiled, records the content hash and
+        the compile id of its direct dependencies in the compile manifest
         """
+        dependencies = {}
+        for other_file in self.create_dependency_graph().get_direct_dependencies(source_file):
+            other_entry = self._get_compile_manifest(other_file).get(other_file.name)
+            if other_entry is not None:
+                dependencies[other_file.name] = other_entry[1]
+
         new_content_hash = source_file.content_hash
-        ostools.write_file(self._hash_file_name_of(source_file), new_content_hash)
+        self._get_compile_manifest(source_file).update(source_file.name, new_content_hash, dependencies)
         LOGGER.debug('Wrote %s content_hash=%s', source_file.name, new_content_hash)
 
 
+class _CompileState(object):
+    """
+    The content hashes, dependency graphs and compile manifests used to find the files to recompile
+    """
+
+    def __init__(self, content_hash_cache, depend_on_package_body):
+        self.content_hash_cache = content_hash_cache
+        # Package users depend also on package body
+        self.depend_on_package_body = depend_on_package_body
+        # Dependency graphs keyed by implementation_dependencies, cleared when the project changes
+        self.dependency_graphs = {}
+        # Compile manifests keyed by library directory
+        self._compile_manifests = {}
+
+    def get_compile_manifest(self, directory):
+        """
+        Returns the compile manifest of the library in directory
+        """
+        if directory not in self._compile_manifests:
+            self._compile_manifests[directory] = CompileManifest(join(directory, "vunit_manifest"))
+        return self._compile_manifests[directory]
+
+
 class Library(object):  # pylint: disable=too-many-instance-attributes
     """
     Represents a VHDL library
@@ -691,14 +787,15 @@ class VerilogSourceFile(SourceFile):
     Represents a Verilog source file
     """
     def __init__(self,  # pylint: disable=too-many-arguments
-                 name, library, verilog_parser, include_dirs=None, defines=None, no_parse=False):
+                 name, library, verilog_parser, include_dirs=None, defines=None, no_parse=False,
+                 content_hash_cache=None):
         SourceFile.__init__(self, name, library, 'verilog')
         self.package_dependencies = []
         self.module_dependencies = []
         self.include_dirs = include_dirs if include_dirs is not None else []
         self.defines = defines.copy() if defines is not None else {}
-        code = ostools.read_file(self.name, encoding=HDL_FILE_ENCODING)
-        self._content_hash = hash_string(code)
+        self._content_hash_cache = ContentHashCache() if content_hash_cache is None else content_hash_cache
+        self._content_hash = self._content_hash_cache.content_hash(self.name, encoding=HDL_FILE_ENCODING)
 
         for path in self.include_dirs:
             self._content_hash = hash_string(self._content_hash + hash_string(path))
@@ -708,17 +805,19 @@ class VerilogSourceFile(SourceFile):
             self._content_hash = hash_string(self._content_hash + hash_string(value))
 
         if not no_parse:
-            self.parse(code, verilog_parser, include_dirs)
+            self.parse(verilog_parser, include_dirs)
 
-    def parse(self, code, parser, include_dirs):
+    def parse(self, parser, include_dirs):
         """
         Parse Verilog code and adding dependencies and design units
+        The code is only read by the parser when there is no cached parse result
         """
         try:
-            design_file = parser.parse(code, self.name, include_dirs, self.defines)
+            design_file = parser.parse(None, self.name, include_dirs, self.defines)
             for included_file_name in design_file.included_files:
-                self._content_hash = hash_string(self._content_hash +
-                                                 ostools.read_file(included_file_name, encoding=HDL_FILE_ENCODING))
+                self._content_hash = hash_string(
+                    self._content_hash +
+                    self._content_hash_cache.content_hash(included_file_name, encoding=HDL_FILE_ENCODING))
             for module in design_file.modules:
                 self.design_units.append(Module(module.name, self, module.parameters))
 
@@ -745,17 +844,18 @@ class VHDLSourceFile(SourceFile):
     """
     Represents a VHDL source file
     """
-    def __init__(self, name, library, vhdl_parser, vhdl_standard, no_parse=False):
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 name, library, vhdl_parser, vhdl_standard, no_parse=False, content_hash_cache=None):
         SourceFile.__init__(self, name, library, 'vhdl')
         self.dependencies = []
         self.depending_components = []
         self._vhdl_standard = vhdl_standard
         check_vhdl_standard(vhdl_standard)
-        code = ostools.read_file(self.name, encoding=HDL_FILE_ENCODING)
-        self._content_hash = hash_string(code)
+        content_hash_cache = ContentHashCache() if content_hash_cache is None else content_hash_cache
+        self._content_hash = content_hash_cache.content_hash(self.name, encoding=HDL_FILE_ENCODING)
 
         if not no_parse:
-            self.parse(code, vhdl_parser)
+            self.parse(vhdl_parser)
 
     def get_vhdl_standard(self):
         """
@@ -763,12 +863,13 @@ class VHDLSourceFile(SourceFile):
         """
         return self._vhdl_standard
 
-    def parse(self, code, parser):
+    def parse(self, parser):
         """
         Parse VHDL code and adding dependencies and design units
+        The code is only read by the parser when there is no cached parse result
         """
         try:
-            design_file = parser.parse(code, self.name, self._content_hash)
+            design_file = parser.parse(None, self.name, self._content_hash)
             self.design_units = self._find_design_units(design_file)
             self.dependencies = self._find_dependencies(design_file)
             self.depending_components = design_file.component_instantiations
@@ -850,16 +951,6 @@ class VHDLSourceFile(SourceFile):
         return hash_string(self._content_hash + self._compile_options_hash() + hash_string(self._vhdl_standard))
 
 
-def more_recent(file_name, than_file_name):
-    """
-    Returns True if the modification time of file_name is more recent
-    than_file_name
-    """
-    mtime = ostools.get_modification_time(file_name)
-    than_mtime = ostools.get_modification_time(than_file_name)
-    return mtime > than_mtime
-
-
 # lower case representation of supported extensions
 VHDL_EXTENSIONS = (".vhd", ".vhdl", ".vho")
 VERILOG_EXTENSIONS = (".v", ".vp", ".sv", ".vams", ".vo")
@@ -890,7 +981,3 @@ def check_vhdl_standard(vhdl_standard, from_str=None):
     valid_standards = ('93', '2002', '2008')
     if vhdl_standard not in valid_standards:
         raise ValueError("Unknown VHDL standard '%s' %snot one of %r" % (vhdl_standard, from_str, valid_standards))
-
-
-# Both VHDL and Verilog standardize on ISO-8859-1 which is latin-1
-HDL_FILE_ENCODING = "latin-1"
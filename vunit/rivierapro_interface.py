@@ -54,6 +54,8 @@ class RivieraProInterface(VsimSimulatorMixin, SimulatorInterface):
         return cls(prefix=cls.find_prefix(),
                    library_cfg=join(output_path, "library.cfg"),
                    persistent=persistent,
+                   persistent_compile=args.persistent_compile,
+                   recycle_after=args.recycle_sim_after,
                    coverage=args.coverage,
                    gui=args.gui)
 
@@ -92,9 +94,12 @@ class RivieraProInterface(VsimSimulatorMixin, SimulatorInterface):
         """
         return True
 
-    def __init__(self, prefix, library_cfg="library.cfg", persistent=False, gui=False, coverage=None):
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 prefix, library_cfg="library.cfg", persistent=False, gui=False, coverage=None,
+                 persistent_compile=False, recycle_after=None):
         SimulatorInterface.__init__(self)
-        VsimSimulatorMixin.__init__(self, prefix, persistent, gui, library_cfg)
+        VsimSimulatorMixin.__init__(self, prefix, persistent, gui, library_cfg, persistent_compile,
+                                    recycle_after=recycle_after)
         self._create_library_cfg()
         self._libraries = []
         self._coverage = coverage
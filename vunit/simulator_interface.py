@@ -11,8 +11,13 @@ Generic simulator interface
 from __future__ import print_function
 import sys
 import os
-from vunit.ostools import Process, simplify_path
+import threading
+import traceback
+import logging
+from bisect import insort
+from vunit.ostools import Process, simplify_path, InterruptableQueue, PROGRAM_STATUS
 from vunit.exceptions import CompileError
+LOGGER = logging.getLogger(__name__)
 
 
 class SimulatorInterface(object):
@@ -26,6 +31,15 @@ class SimulatorInterface(object):
     compile_options = []
     sim_options = []
 
+    # True when several files can safely be compiled into the same library at the same time
+    supports_concurrent_compile = False
+
+    # True when the compile command accepts several files which are compiled in the given order
+    supports_batch_compile = False
+
+    # The maximum number of files in a batched compile command
+    max_batch_size = 64
+
     def __init__(self):
         self.output_path = None
 
@@ -109,6 +123,12 @@ class SimulatorInterface(object):
                    [constraint(path0) for constraint in constraints]):
                 return path0
 
+    def get_identity(self):
+        """
+        Return a string identifying the simulator and its installation
+        """
+        return "%s %s" % (self.name, self.find_prefix())
+
     @classmethod
     def get_osvvm_coverage_api(cls):
         """
@@ -129,19 +149,33 @@ class SimulatorInterface(object):
         """
         pass
 
+    def _prestart_simulations(self, num_simulations, compiled=False, num_test_suites=None):
+        """
+        Hook for simulator interface to start num_simulations simulator processes
+        in the background while compiling the project or right away when the project
+        has already been compiled by another process
+
+        num_test_suites -- The number of test suites to simulate if known
+        """
+        pass
+
     def add_simulator_specific(self, project):
         """
         Hook for the simulator interface to add simulator specific things to the project
         """
         pass
 
-    def compile_project(self, project, continue_on_error=False):
+    def compile_project(self,  # pylint: disable=too-many-arguments
+                        project, continue_on_error=False, num_threads=1, target_files=None, batch_compile=False):
         """
         Compile the project
+        target_files -- Only compile the files required to simulate the target files if not None
+        batch_compile -- Compile consecutive files with identical compile commands in a single command
         """
         self.add_simulator_specific(project)
         self.setup_library_mapping(project)
-        self.compile_source_files(project, continue_on_error)
+        self.compile_source_files(project, continue_on_error, num_threads=num_threads, target_files=target_files,
+                                  batch_compile=batch_compile)
 
     def simulate(self, output_path, test_suite_name, config, elaborate_only):
         """
@@ -155,54 +189,266 @@ class SimulatorInterface(object):
         """
         pass
 
-    def compile_source_files(self, project, continue_on_error=False):
+    def compile_source_files(self,  # pylint: disable=too-many-arguments
+                             project, continue_on_error=False, num_threads=1, target_files=None,
+                             batch_compile=False):
         """
         Use compile_source_file_command to compile all source_files
         """
         dependency_graph = project.create_dependency_graph()
+        source_files = project.get_files_in_compile_order(dependency_graph=dependency_graph,
+                                                          target_files=target_files)
+
+        if num_threads > 1:
+            if batch_compile and self.supports_batch_compile:
+                LOGGER.warning("Batch compilation is not supported when compiling files in parallel, "
+                               "compiling one file at a time in %i threads", num_threads)
+            all_ok = self._compile_source_files_in_parallel(project, dependency_graph, source_files,
+                                                            continue_on_error, num_threads)
+        else:
+            all_ok = self._compile_source_files_in_sequence(project, dependency_graph, source_files,
+                                                            continue_on_error,
+                                                            batch_compile and self.supports_batch_compile)
+
+        if not all_ok:
+            if continue_on_error:
+                print("Failed to compile some files")
+            raise CompileError
+
+    def _compile_source_files_in_sequence(self,  # pylint: disable=too-many-arguments
+                                          project, dependency_graph, source_files, continue_on_error,
+                                          batch_compile=False):
+        """
+        Compile the source_files one at a time in compile order
+
+        With batch_compile consecutive files with identical compile commands are
+        first compiled in a single command, files of a failing batch are compiled
+        again one at a time to find out which of them failed.
+        """
         all_ok = True
-        failures = []
-        source_files = project.get_files_in_compile_order(dependency_graph=dependency_graph)
         source_files_to_skip = set()
+        max_batch_size = self.max_batch_size if batch_compile else 1
+        for batch in self._create_compile_batches(source_files, source_files_to_skip, max_batch_size):
+            if len(batch) > 1 and self._compile_batch(project, batch):
+                continue
+
+            for source_file in batch:
+                if source_file in source_files_to_skip:
+                    print("Skipping %s due to failed dependencies" % simplify_path(source_file.name))
+                    continue
+
+                if not self._compile_source_file(project, source_file):
+                    source_files_to_skip.update(dependency_graph.get_dependent([source_file]))
+                    all_ok = False
+                    if not continue_on_error:
+                        return all_ok
+
+        return all_ok
+
+    def _compile_source_file(self, project, source_file):
+        """
+        Compile a single source file returning True when successful
+        """
+        print('Compiling %s into %s ...' % (simplify_path(source_file.name), source_file.library.name))
+        try:
+            command = None
+            command = self.compile_source_file_command(source_file)
+            success = self._run_compile_command(command)
+
+        except CompileError:
+            success = False
+
+        if success:
+            project.update(source_file)
+        else:
+            self._print_compile_failure(source_file, command)
+        return success
+
+    def _compile_batch(self, project, source_files):
+        """
+        Compile the source_files in a single command returning True when successful
+        """
+        for source_file in source_files:
+            print('Compiling %s into %s ...' % (simplify_path(source_file.name), source_file.library.name))
+
+        template = self._compile_command_template(source_files[0])
+        idx = template.index(None)
+        command = template[:idx] + [source_file.name for source_file in source_files] + template[idx + 1:]
+        if not self._run_compile_command(command):
+            print("Failed to compile %i files with a single command, compiling them one at a time"
+                  % len(source_files))
+            return False
+
         for source_file in source_files:
+            project.update(source_file)
+        return True
+
+    def _compile_command_template(self, source_file):
+        """
+        Return the compile command of the source_file with None in place of the file name
+        or None if there is no such command
+        """
+        try:
+            command = self.compile_source_file_command(source_file)
+        except CompileError:
+            return None
+
+        template = [None if arg == source_file.name else arg for arg in command]
+        if template.count(None) != 1:
+            return None
+        return template
+
+    def _create_compile_batches(self, source_files, source_files_to_skip, max_batch_size):
+        """
+        Split the source_files in compile order into batches of consecutive
+        files which only differ in file name in their compile commands
+
+        Batches are created lazily such that files which are skipped due
+        to a failure in a previous batch are left out
+        """
+        batch = []
+        previous_template = None
+        for source_file in source_files:
+            template = self._compile_command_template(source_file) if max_batch_size > 1 else None
+            if batch and (template is None or template != previous_template or len(batch) >= max_batch_size):
+                yield batch
+                batch = []
+
             if source_file in source_files_to_skip:
                 print("Skipping %s due to failed dependencies" % simplify_path(source_file.name))
                 continue
 
-            print('Compiling %s into %s ...' % (simplify_path(source_file.name), source_file.library.name))
+            batch.append(source_file)
+            previous_template = template
+
+        if batch:
+            yield batch
+
+    def _compile_source_files_in_parallel(self,  # pylint: disable=too-many-arguments
+                                          project, dependency_graph, source_files, continue_on_error, num_threads):
+        """
+        Compile the source_files using num_threads worker threads
+
+        A file is started as soon as all of its direct dependencies have
+        been compiled. Ready files are started in compile order. Unless
+        the simulator supports concurrent compilation into the same
+        library at most one file per library is compiled at a time.
+        """
+        schedule = _CompileSchedule(dependency_graph, source_files)
+        all_ok = True
+        stop = False
+        num_running = 0
+
+        work_queue = InterruptableQueue()
+        done_queue = InterruptableQueue()
+        threads = [threading.Thread(target=self._compile_worker, args=(work_queue, done_queue))
+                   for _ in range(num_threads)]
+
+        try:
+            for thread in threads:
+                thread.start()
+
+            while True:
+                while not stop and num_running < num_threads:
+                    source_file = schedule.start_next(self.supports_concurrent_compile)
+                    if source_file is None:
+                        break
+                    work_queue.put(source_file)
+                    num_running += 1
+
+                if num_running == 0:
+                    break
+
+                num_running -= 1
+                if not self._collect_compile_result(project, schedule, *done_queue.get()):
+                    all_ok = False
+                    if not continue_on_error:
+                        stop = True
+
+        except KeyboardInterrupt:
+            LOGGER.debug("compile_source_files: Caught Ctrl-C shutting down")
+            PROGRAM_STATUS.shutdown()
+            raise
+
+        finally:
+            for _ in threads:
+                work_queue.put(None)
+            for thread in threads:
+                thread.join()
+
+        return all_ok
+
+    def _collect_compile_result(self,  # pylint: disable=too-many-arguments
+                                project, schedule, source_file, command, success, output):
+        """
+        Print the output of a source file compiled by a worker thread and update the
+        project and the schedule with the result, returns True when successful
+        """
+        print('Compiling %s into %s ...' % (simplify_path(source_file.name), source_file.library.name))
+        for line in output:
+            print(line)
+
+        if success:
+            project.update(source_file)
+            schedule.compiled(source_file)
+            return True
+
+        self._print_compile_failure(source_file, command)
+        for other_file in schedule.failed(source_file):
+            print("Skipping %s due to failed dependencies" % simplify_path(other_file.name))
+        return False
+
+    def _compile_worker(self, work_queue, done_queue):
+        """
+        Compile source files from the work_queue until receiving None,
+        posting the result and captured output of each file to the done_queue
+        """
+        while True:
             try:
-                command = None
-                command = self.compile_source_file_command(source_file)
-                success = run_command(command, env=self.get_env())
+                source_file = work_queue.get()
+            except KeyboardInterrupt:
+                return
+
+            if source_file is None:
+                return
 
+            output = []
+            command = None
+            try:
+                command = self.compile_source_file_command(source_file)
+                success = self._run_compile_command(command, callback=output.append)
             except CompileError:
                 success = False
+            except KeyboardInterrupt:
+                return
+            except Exception:  # pylint: disable=broad-except
+                output.append(traceback.format_exc())
+                success = False
 
-            if success:
-                project.update(source_file)
-            else:
-                source_files_to_skip.update(dependency_graph.get_dependent([source_file]))
-                failures.append(source_file)
-
-                if command is None:
-                    print("Failed to compile %s. File type not supported by %s simulator"
-                          % (simplify_path(source_file.name), self.name))
-                else:
-                    print("Failed to compile %s with command:\n%s"
-                          % (simplify_path(source_file.name), " ".join(command)))
-
-                all_ok = False
-                if not continue_on_error:
-                    break
+            done_queue.put((source_file, command, success, output))
 
-        if not all_ok:
-            if continue_on_error:
-                print("Failed to compile some files")
-            raise CompileError
+    def _print_compile_failure(self, source_file, command):
+        """
+        Print why the source_file failed to compile
+        """
+        if command is None:
+            print("Failed to compile %s. File type not supported by %s simulator"
+                  % (simplify_path(source_file.name), self.name))
+        else:
+            print("Failed to compile %s with command:\n%s"
+                  % (simplify_path(source_file.name), " ".join(command)))
 
     def compile_source_file_command(self, source_file):  # pylint: disable=unused-argument
         raise NotImplementedError
 
+    def _run_compile_command(self, command, **kwargs):
+        """
+        Run a command returned by compile_source_file_command returning True when successful
+
+        Allows inheriting classes to overload this to run the command in another way
+        """
+        return run_command(command, env=self.get_env(), **kwargs)
+
     def set_output_path(self, output_path):
         self.output_path = output_path
 
@@ -217,6 +463,73 @@ class SimulatorInterface(object):
         return None  # Default environment
 
 
+class _CompileSchedule(object):
+    """
+    Decides which source files may be compiled next by the parallel compilation
+
+    A file is ready when all of its direct dependencies within the source
+    files have been compiled, ready files are started in compile order
+    """
+
+    def __init__(self, dependency_graph, source_files):
+        self._dependency_graph = dependency_graph
+        self._compile_order = dict((source_file, idx) for idx, source_file in enumerate(source_files))
+        self._num_dependencies_left = {}
+        self._direct_dependents = dict((source_file, []) for source_file in source_files)
+        for source_file in source_files:
+            dependencies = [other_file
+                            for other_file in dependency_graph.get_direct_dependencies(source_file)
+                            if other_file in self._compile_order]
+            self._num_dependencies_left[source_file] = len(dependencies)
+            for other_file in dependencies:
+                self._direct_dependents[other_file].append(source_file)
+
+        self._ready = [self._key(source_file) for source_file in source_files
+                       if self._num_dependencies_left[source_file] == 0]
+        self._busy_libraries = set()
+        self._skipped = set()
+
+    def _key(self, source_file):
+        return self._compile_order[source_file], source_file
+
+    def start_next(self, supports_concurrent_compile):
+        """
+        Return the next ready source file which may be compiled now or None
+        """
+        for item in self._ready:
+            source_file = item[1]
+            if (not supports_concurrent_compile) and source_file.library.name in self._busy_libraries:
+                continue
+
+            self._ready.remove(item)
+            self._busy_libraries.add(source_file.library.name)
+            return source_file
+        return None
+
+    def compiled(self, source_file):
+        """
+        The source file was compiled successfully, its dependents may become ready
+        """
+        self._busy_libraries.discard(source_file.library.name)
+        for other_file in self._direct_dependents[source_file]:
+            self._num_dependencies_left[other_file] -= 1
+            if self._num_dependencies_left[other_file] == 0 and other_file not in self._skipped:
+                insort(self._ready, self._key(other_file))
+
+    def failed(self, source_file):
+        """
+        The source file failed to compile, returns the newly skipped dependent source files in compile order
+        """
+        self._busy_libraries.discard(source_file.library.name)
+        skipped = [other_file for other_file in self._dependency_graph.get_dependent([source_file])
+                   if other_file != source_file and other_file in self._compile_order
+                   and other_file not in self._skipped]
+        skipped.sort(key=self._key)
+        self._skipped.update(skipped)
+        self._ready = [item for item in self._ready if item[1] not in self._skipped]
+        return skipped
+
+
 def isfile(file_name):
     """
     Case insensitive os.path.isfile
@@ -227,13 +540,13 @@ def isfile(file_name):
     return os.path.basename(file_name) in os.listdir(os.path.dirname(file_name))
 
 
-def run_command(command, cwd=None, env=None):
+def run_command(command, cwd=None, env=None, callback=print):
     """
-    Run a command
+    Run a command, calling callback for each line of output
     """
     try:
         proc = Process(command, cwd=cwd, env=env)
-        proc.consume_output()
+        proc.consume_output(callback=callback)
         return True
     except Process.NonZeroExitCode:
         pass
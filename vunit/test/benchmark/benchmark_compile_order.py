@@ -0,0 +1,103 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2017, Lars Asplund lars.anders.asplund@gmail.com
+
+"""
+Scaling benchmark of the compile order computation on synthetic projects
+
+Run as: python -m vunit.test.benchmark.benchmark_compile_order [--sizes 10000 50000]
+"""
+
+from __future__ import print_function
+
+import argparse
+import random
+import sys
+import time
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from vunit.ostools import write_file
+from vunit.project import Project
+
+
+def create_project(path, num_files, max_dependencies=3, seed=0):
+    """
+    Create a project of num_files VHDL packages where each package uses
+    up to max_dependencies randomly selected earlier packages
+    """
+    rand = random.Random(seed)
+    project = Project()
+    project.add_library("lib", join(path, "lib"))
+    for idx in range(num_files):
+        dependencies = set(rand.randrange(idx) for _ in range(min(idx, max_dependencies)))
+        code = "".join("use work.pkg%i.all;\n" % dep for dep in sorted(dependencies))
+        code += "package pkg%i is\nend package;\n" % idx
+        file_name = join(path, "pkg%i.vhd" % idx)
+        write_file(file_name, code)
+        project.add_source_file(file_name, "lib")
+    return project
+
+
+def timed(function):
+    """
+    Return the elapsed time of calling function
+    """
+    start = time.time()
+    function()
+    return time.time() - start
+
+
+def benchmark(num_files):
+    """
+    Benchmark compile order queries of a synthetic project with num_files files
+    Returns a dictionary of the elapsed time of each query
+    """
+    path = mkdtemp()
+    try:
+        project = create_project(path, num_files)
+        source_files = project.get_source_files_in_order()
+        targets = source_files[::max(1, num_files // 100)]
+        return {
+            "create_dependency_graph": timed(project.create_dependency_graph),
+            "get_files_in_compile_order": timed(lambda: project.get_files_in_compile_order(incremental=False)),
+            "get_dependencies_in_compile_order": timed(
+                lambda: [project.get_dependencies_in_compile_order([target]) for target in targets]),
+        }
+    finally:
+        rmtree(path)
+
+
+def main():
+    """
+    Run the benchmark for all sizes, returns non-zero if the time per file grows
+    more than max_growth times between the smallest and largest size
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--max-growth", type=float, default=3.0)
+    args = parser.parse_args()
+
+    sizes = sorted(args.sizes)
+    results = dict((num_files, benchmark(num_files)) for num_files in sizes)
+
+    failed = False
+    for name in sorted(results[sizes[0]]):
+        print("%s:" % name)
+        for num_files in sizes:
+            elapsed = results[num_files][name]
+            print("  %6i files: %8.3f s %8.2f us/file" % (num_files, elapsed, 1e6 * elapsed / num_files))
+
+        first = results[sizes[0]][name] / sizes[0]
+        last = results[sizes[-1]][name] / sizes[-1]
+        if first > 0 and last / first > args.max_growth:
+            print("  time per file grew %.1f times" % (last / first))
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2017, Lars Asplund lars.anders.asplund@gmail.com
+
+"""
+Benchmark of the per test overhead of the test runner using a no-op simulator stub
+
+Run as: python -m vunit.test.benchmark.benchmark_test_overhead [--num-tests 1000] [--num-threads 1 4]
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import time
+from shutil import rmtree
+from tempfile import mkdtemp
+from vunit.ostools import Process
+from vunit.test_runner import TestRunner
+from vunit.test_report import TestReport, PASSED
+from vunit.test_list import TestList
+
+
+class NoOpTestSuite(object):
+    """
+    A test suite stub which passes immediately or after running an empty simulator process
+    """
+
+    def __init__(self, name, launch_process):
+        self.name = name
+        self.test_cases = [name]
+        self._launch_process = launch_process
+
+    def run(self, output_path):  # pylint: disable=unused-argument
+        """
+        Run the no-op simulation
+        """
+        if self._launch_process:
+            Process([sys.executable, "-c", ""]).consume_output(lambda line: None)
+        return {self.name: PASSED}
+
+
+def benchmark(num_tests, num_threads, launch_process):
+    """
+    Return the elapsed time of running num_tests no-op test suites
+    """
+    path = mkdtemp()
+    stdout = sys.stdout
+    try:
+        test_list = TestList()
+        for idx in range(num_tests):
+            test_list.add_suite(NoOpTestSuite("lib.tb.test%i" % idx, launch_process))
+
+        # Suppress the progress printed for every test
+        sys.stdout = open(os.devnull, "w")
+        runner = TestRunner(TestReport(), path, num_threads=num_threads)
+        start = time.time()
+        runner.run(test_list)
+        return time.time() - start
+    finally:
+        if sys.stdout is not stdout:
+            sys.stdout.close()
+            sys.stdout = stdout
+        rmtree(path)
+
+
+def main():
+    """
+    Print the per test overhead with and without launching an empty process
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--num-tests", type=int, default=1000)
+    parser.add_argument("--num-threads", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    for launch_process in (False, True):
+        print("%s:" % ("empty process per test" if launch_process else "no process"))
+        for num_threads in args.num_threads:
+            elapsed = benchmark(args.num_tests, num_threads, launch_process)
+            print("  %2i threads: %8.3f s %8.2f ms/test" % (num_threads, elapsed, 1e3 * elapsed / args.num_tests))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
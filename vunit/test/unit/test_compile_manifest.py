@@ -0,0 +1,72 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2017, Lars Asplund lars.anders.asplund@gmail.com
+
+"""
+Test the compile manifest
+"""
+
+import unittest
+from os.path import join, dirname, exists
+from shutil import rmtree
+from vunit.compile_manifest import CompileManifest
+from vunit.ostools import renew_path
+
+
+class TestCompileManifest(unittest.TestCase):
+    """
+    Test the compile manifest
+    """
+
+    def setUp(self):
+        self.output_path = join(dirname(__file__), "test_compile_manifest_out")
+        renew_path(self.output_path)
+        self.file_name = join(self.output_path, "lib", "vunit_manifest")
+
+    def tearDown(self):
+        if exists(self.output_path):
+            rmtree(self.output_path)
+
+    def test_get_missing_entry(self):
+        self.assertEqual(CompileManifest(self.file_name).get("file.vhd"), None)
+
+    def test_update_is_persistent(self):
+        manifest = CompileManifest(self.file_name)
+        compile_id1 = manifest.update("file1.vhd", "hash1", {})
+        compile_id2 = manifest.update("file2.vhd", "hash2", {"file1.vhd": compile_id1})
+        self.assertNotEqual(compile_id1, compile_id2)
+
+        manifest = CompileManifest(self.file_name)
+        self.assertEqual(manifest.get("file1.vhd"), ("hash1", compile_id1, {}))
+        self.assertEqual(manifest.get("file2.vhd"), ("hash2", compile_id2, {"file1.vhd": compile_id1}))
+
+    def test_last_update_is_valid(self):
+        manifest = CompileManifest(self.file_name)
+        manifest.update("file.vhd", "hash1", {})
+        compile_id = manifest.update("file.vhd", "hash2", {})
+        self.assertEqual(CompileManifest(self.file_name).get("file.vhd"), ("hash2", compile_id, {}))
+
+    def test_ignores_partially_written_line(self):
+        manifest = CompileManifest(self.file_name)
+        compile_id1 = manifest.update("file1.vhd", "hash1", {})
+        with open(self.file_name, "a") as fptr:
+            fptr.write('["file2.vhd", "ha')
+
+        manifest = CompileManifest(self.file_name)
+        self.assertEqual(manifest.get("file2.vhd"), None)
+        compile_id3 = manifest.update("file3.vhd", "hash3", {})
+
+        manifest = CompileManifest(self.file_name)
+        self.assertEqual(manifest.get("file1.vhd"), ("hash1", compile_id1, {}))
+        self.assertEqual(manifest.get("file3.vhd"), ("hash3", compile_id3, {}))
+
+    def test_compacts_file(self):
+        manifest = CompileManifest(self.file_name)
+        for _ in range(200):
+            compile_id = manifest.update("file.vhd", "hash", {})
+
+        with open(self.file_name, "r") as fptr:
+            self.assertLess(len(fptr.readlines()), 200)
+        self.assertEqual(CompileManifest(self.file_name).get("file.vhd"), ("hash", compile_id, {}))
@@ -61,3 +61,57 @@ class TestConfiguration(unittest.TestCase):
 
         self.assertEqual(config_tb_path.generics["tb_path"], (out() + "/").replace("\\", "/"))
         self.assertNotIn("tb_path", config.generics)
+
+    def test_set_resource(self):
+        config = Configuration('name', Entity('tb_entity'))
+        config.set_resource("memory", 12)
+        config.set_resource("licenses", 0.5)
+        self.assertEqual(config.resources, {"memory": 12, "licenses": 0.5})
+
+        copy = config.copy()
+        copy.set_resource("memory", 1)
+        self.assertEqual(config.resources["memory"], 12)
+
+        self.assertRaises(ValueError, config.set_resource, "memory", -1)
+        self.assertRaises(ValueError, config.set_resource, "memory", float("nan"))
+        self.assertRaises(ValueError, config.set_resource, "memory", "1")
+        self.assertRaises(ValueError, config.set_resource, "memory", True)
+
+    def test_set_timeout_sim_option(self):
+        config = Configuration('name', Entity('tb_entity'))
+        config.set_sim_option("timeout", 2.5)
+        self.assertEqual(config.sim_options["timeout"], 2.5)
+        self.assertRaises(ValueError, config.set_sim_option, "timeout", 0)
+        self.assertRaises(ValueError, config.set_sim_option, "timeout", -1)
+        self.assertRaises(ValueError, config.set_sim_option, "timeout", "10")
+        self.assertRaises(ValueError, config.set_sim_option, "timeout", True)
+
+    def test_fingerprint(self):
+        design_unit = Entity('tb_entity')
+        design_unit.generic_names = ["runner_cfg", "value"]
+        config = Configuration('name', design_unit)
+        fingerprint = config.fingerprint()
+        self.assertEqual(config.copy().fingerprint(), fingerprint)
+
+        config.set_generic("value", 1)
+        self.assertNotEqual(config.fingerprint(), fingerprint)
+        fingerprint = config.fingerprint()
+
+        config.set_sim_option("disable_ieee_warnings", True)
+        self.assertNotEqual(config.fingerprint(), fingerprint)
+        fingerprint = config.fingerprint()
+
+        def post_check(output_path):
+            return output_path is not None
+
+        def other_post_check(output_path):
+            return output_path is None
+
+        config.post_check = post_check
+        self.assertNotEqual(config.fingerprint(), fingerprint)
+        fingerprint = config.fingerprint()
+        self.assertEqual(config.copy().fingerprint(), fingerprint)
+
+        other_post_check.__name__ = other_post_check.__qualname__ = "post_check"
+        config.post_check = other_post_check
+        self.assertNotEqual(config.fingerprint(), fingerprint)
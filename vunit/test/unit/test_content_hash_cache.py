@@ -0,0 +1,83 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2017, Lars Asplund lars.anders.asplund@gmail.com
+
+"""
+Test the content hash cache
+"""
+
+import unittest
+import os
+from os.path import join, dirname, exists
+from shutil import rmtree
+from vunit.content_hash_cache import ContentHashCache
+from vunit.hashing import hash_string
+from vunit.ostools import renew_path, write_file, read_file
+from vunit.test.mock_2or3 import mock
+
+
+class TestContentHashCache(unittest.TestCase):
+    """
+    Test the content hash cache
+    """
+
+    def setUp(self):
+        self.output_path = join(dirname(__file__), "test_content_hash_cache_out")
+        renew_path(self.output_path)
+        self.file_name = join(self.output_path, "file.vhd")
+        self.database = {}
+
+    def tearDown(self):
+        if exists(self.output_path):
+            rmtree(self.output_path)
+
+    def _write(self, contents, age=10.0):
+        """
+        Write file with a modification time age seconds in the past
+        """
+        write_file(self.file_name, contents)
+        mtime = os.stat(self.file_name).st_mtime - age
+        os.utime(self.file_name, (mtime, mtime))
+
+    def _content_hash(self, cache):
+        """
+        Return content hash and the number of times the file was read
+        """
+        with mock.patch("vunit.ostools.read_file", side_effect=read_file) as read_file_mock:
+            content_hash = cache.content_hash(self.file_name)
+        return content_hash, read_file_mock.call_count
+
+    def test_content_hash(self):
+        self._write("hello")
+        self.assertEqual(self._content_hash(ContentHashCache()), (hash_string("hello"), 1))
+        self.assertEqual(self._content_hash(ContentHashCache(self.database)), (hash_string("hello"), 1))
+
+    def test_unchanged_file_is_not_read_again(self):
+        self._write("hello")
+        self._content_hash(ContentHashCache(self.database))
+        self.assertEqual(self._content_hash(ContentHashCache(self.database)), (hash_string("hello"), 0))
+
+    def test_changed_file_is_read_again(self):
+        self._write("hello")
+        self._content_hash(ContentHashCache(self.database))
+        self._write("hello world")
+        self.assertEqual(self._content_hash(ContentHashCache(self.database)), (hash_string("hello world"), 1))
+
+    def test_recently_modified_file_is_not_stored(self):
+        self._write("hello", age=0.0)
+        self._content_hash(ContentHashCache(self.database))
+        self.assertEqual(self.database, {})
+        self.assertEqual(self._content_hash(ContentHashCache(self.database)), (hash_string("hello"), 1))
+
+    def test_without_database_file_is_always_read(self):
+        self._write("hello")
+        self._content_hash(ContentHashCache())
+        self.assertEqual(self._content_hash(ContentHashCache()), (hash_string("hello"), 1))
+
+    def test_content_hash_is_remembered_within_instance(self):
+        self._write("hello")
+        cache = ContentHashCache()
+        self._content_hash(cache)
+        self.assertEqual(self._content_hash(cache), (hash_string("hello"), 0))
@@ -9,8 +9,9 @@ Test the database related classes
 """
 
 import unittest
-from os.path import join, dirname
-from vunit.database import DataBase, PickledDataBase
+from multiprocessing import Process
+from os.path import join, dirname, getsize, isfile, isdir
+from vunit.database import DataBase, LogDataBase, PickledDataBase
 from vunit.ostools import renew_path
 
 
@@ -93,3 +94,138 @@ class TestPickedDataBase(TestDataBase):
 
     def create_database(self, new=False):
         return PickledDataBase(TestDataBase.create_database(self, new))
+
+
+class TestLogDataBase(TestDataBase):
+    """
+    Test the single file database
+
+    Re-uses test from TestDataBase class
+    """
+
+    def create_database(self, new=False):
+        return LogDataBase(join(self.output_path, "database"), new=new)
+
+    def test_discards_incomplete_record(self):
+        database = self.create_database()
+        database[self.key1] = self.value1
+        database[self.key2] = self.value2
+        database.close()
+
+        file_name = join(self.output_path, "database")
+        with open(file_name, "rb") as fptr:
+            data = fptr.read()
+        with open(file_name, "wb") as fptr:
+            fptr.write(data[:-1])
+
+        database = self.create_database()
+        self.assertEqual(database[self.key1], self.value1)
+        self.assertTrue(self.key2 not in database)
+        database[self.key2] = self.value1
+        database.close()
+
+        database = self.create_database()
+        self.assertEqual(database[self.key1], self.value1)
+        self.assertEqual(database[self.key2], self.value1)
+
+    def test_compaction(self):
+        database = self.create_database()
+        value = b"x" * 1024
+        for _ in range(3000):
+            database[self.key1] = value
+            database[self.key2] = self.value2
+        database.close()
+
+        file_name = join(self.output_path, "database")
+        self.assertTrue(getsize(file_name) < 2 * LogDataBase._MIN_COMPACTION_SIZE)  # pylint: disable=protected-access
+
+        database = self.create_database()
+        self.assertEqual(database[self.key1], value)
+        self.assertEqual(database[self.key2], self.value2)
+
+    def test_handles_on_the_same_file_see_each_others_writes(self):
+        database1 = self.create_database()
+        database2 = self.create_database()
+        database1[self.key1] = self.value1
+        database2[self.key2] = self.value2
+        self.assertEqual(database1[self.key2], self.value2)
+        self.assertEqual(database2[self.key1], self.value1)
+        database1.close()
+        database2.close()
+
+        database = self.create_database()
+        self.assertEqual(database[self.key1], self.value1)
+        self.assertEqual(database[self.key2], self.value2)
+
+    def test_handles_on_the_same_file_survive_compaction(self):
+        database1 = self.create_database()
+        database2 = self.create_database()
+        value = b"x" * 1024
+        for _ in range(3000):
+            database1[self.key1] = value
+        database2[self.key2] = self.value2
+        self.assertEqual(database2[self.key1], value)
+        database1.close()
+        database2.close()
+
+        file_name = join(self.output_path, "database")
+        self.assertTrue(getsize(file_name) < 2 * LogDataBase._MIN_COMPACTION_SIZE)  # pylint: disable=protected-access
+        database = self.create_database()
+        self.assertEqual(database[self.key1], value)
+        self.assertEqual(database[self.key2], self.value2)
+
+    def test_concurrent_writes_from_several_processes(self):
+        path = join(self.output_path, "database")
+        self.create_database().close()
+        processes = [Process(target=write_keys, args=(path, prefix)) for prefix in ["a", "b"]]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+
+        database = self.create_database()
+        for prefix in ["a", "b"]:
+            for idx in range(200):
+                key = ("%s%i" % (prefix, idx)).encode()
+                self.assertEqual(database[key], key * 10)
+
+    def test_migrates_from_directory_database(self):
+        path = join(self.output_path, "database")
+        old_database = DataBase(path)
+        old_database[self.key1] = self.value1
+        old_database[self.key2] = self.value2
+
+        database = self.create_database()
+        self.assertEqual(database[self.key1], self.value1)
+        self.assertEqual(database[self.key2], self.value2)
+        self.assertTrue(isfile(path))
+
+    def test_new_database_replaces_directory_database(self):
+        path = join(self.output_path, "database")
+        old_database = DataBase(path)
+        old_database[self.key1] = self.value1
+
+        database = self.create_database(new=True)
+        self.assertTrue(self.key1 not in database)
+        self.assertTrue(isfile(path))
+
+    def test_new_directory_database_replaces_database(self):
+        path = join(self.output_path, "database")
+        database = self.create_database()
+        database[self.key1] = self.value1
+        database.close()
+
+        old_database = DataBase(path, new=True)
+        self.assertTrue(self.key1 not in old_database)
+        self.assertTrue(isdir(path))
+
+
+def write_keys(path, prefix):
+    """
+    Write keys to the database at path from another process
+    """
+    database = LogDataBase(path)
+    for idx in range(200):
+        key = ("%s%i" % (prefix, idx)).encode()
+        database[key] = key * 10
@@ -9,6 +9,7 @@ Test the DependencyGraph
 """
 
 import unittest
+import sys
 from vunit.dependency_graph import (DependencyGraph,
                                     CircularDependencyException)
 
@@ -75,6 +76,53 @@ class TestDependencyGraph(unittest.TestCase):
         result = graph.toposort()
         self._check_result(result, dependencies)
 
+    def test_toposort_index(self):
+        nodes = ['a', 'b', 'c', 'd', 'e', 'f']
+        dependencies = [('a', 'b'), ('a', 'c'), ('b', 'd'), ('e', 'f')]
+        graph = DependencyGraph()
+        self._add_nodes_and_dependencies(graph, nodes, dependencies)
+        result = graph.toposort()
+        self.assertEqual(graph.toposort_index(), dict((node, idx) for idx, node in enumerate(result)))
+        self.assertEqual(graph.sort_nodes(['f', 'd', 'a', 'e']), [node for node in result if node in 'adef'])
+
+        graph.add_node('g')
+        graph.add_dependency('g', 'a')
+        self.assertEqual(graph.sort_nodes(['a', 'g']), ['g', 'a'])
+
+    def test_deep_graph_does_not_exceed_recursion_limit(self):
+        num_nodes = 2 * sys.getrecursionlimit()
+        nodes = list(range(num_nodes))
+        dependencies = [(idx, idx + 1) for idx in range(num_nodes - 1)]
+        graph = DependencyGraph()
+        self._add_nodes_and_dependencies(graph, nodes, dependencies)
+        self.assertEqual(graph.toposort(), nodes)
+        self.assertEqual(graph.get_dependent(set([0])), set(nodes))
+        self.assertEqual(graph.get_dependencies(set([num_nodes - 1])), set(nodes))
+
+    def test_get_dependent_is_updated_after_additions(self):
+        nodes = ['a', 'b', 'c']
+        dependencies = [('a', 'b')]
+        graph = DependencyGraph()
+        self._add_nodes_and_dependencies(graph, nodes, dependencies)
+        self.assertEqual(graph.get_dependent(set('a')), set(('a', 'b')))
+        graph.get_dependent(set('a')).add('d')
+        self.assertEqual(graph.get_dependent(set('a')), set(('a', 'b')))
+        graph.add_dependency('b', 'c')
+        self.assertEqual(graph.get_dependent(set('a')), set(('a', 'b', 'c')))
+        self.assertEqual(graph.get_dependencies(set('c')), set(('a', 'b', 'c')))
+
+    def test_get_dependent_keeps_a_bounded_number_of_results(self):
+        graph = DependencyGraph()
+        num_nodes = 2 * DependencyGraph._MAX_CACHED_RESULTS  # pylint: disable=protected-access
+        self._add_nodes_and_dependencies(graph, list(range(num_nodes)),
+                                         [(idx, idx + 1) for idx in range(num_nodes - 1)])
+        for _ in range(2):
+            for idx in range(num_nodes):
+                self.assertEqual(graph.get_dependent([idx]), set(range(idx, num_nodes)))
+                self.assertEqual(graph.get_dependencies([idx]), set(range(idx + 1)))
+        self.assertEqual(len(graph._dependent_cache),  # pylint: disable=protected-access
+                         DependencyGraph._MAX_CACHED_RESULTS)  # pylint: disable=protected-access
+
     def test_get_direct_dependencies_should_return_empty_set_when_no_dependendencies(self):
         nodes = ['a', 'b', 'c']
         dependencies = []
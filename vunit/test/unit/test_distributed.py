@@ -0,0 +1,226 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2017, Lars Asplund lars.anders.asplund@gmail.com
+
+"""
+Test the distributed test execution
+"""
+
+import unittest
+import threading
+import socket
+from os.path import join, dirname, exists
+from shutil import rmtree
+from vunit.distributed import Coordinator, Worker, parse_address, TOKEN_FILE_NAME
+from vunit.test_runner import TestRunner, create_output_path
+from vunit.test_report import TestReport, PASSED, FAILED
+from vunit.ostools import renew_path, read_file, write_file
+from vunit.test.mock_2or3 import mock
+
+
+class TestDistributed(unittest.TestCase):
+    """
+    Test the distributed test execution
+    """
+
+    def setUp(self):
+        self.output_path = join(dirname(__file__), "test_distributed_out")
+        renew_path(self.output_path)
+
+    def tearDown(self):
+        if exists(self.output_path):
+            rmtree(self.output_path)
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address("localhost:1234"), ("localhost", 1234))
+        self.assertRaises(ValueError, parse_address, "1234")
+        self.assertRaises(ValueError, parse_address, "localhost:port")
+
+    def test_hands_out_test_suites_to_several_workers(self):
+        coordinator = Coordinator(("127.0.0.1", 0), join(self.output_path, "coordinator"))
+        names = ["test%i" % idx for idx in range(20)]
+        run_by = {}
+        lock = threading.Lock()
+
+        def run_worker(worker_name, num_threads):
+            """
+            Run a worker recording which test suites it has run
+            """
+            worker = Worker(coordinator.address, join(self.output_path, "worker"), num_threads=num_threads)
+            self.assertFalse(worker.shares_output_path)
+
+            def run_test_suite(name):
+                with lock:
+                    run_by[name] = worker_name
+                return {name: "passed"}, "output of %s" % name
+
+            worker.run(run_test_suite)
+
+        threads = [threading.Thread(target=run_worker, args=("worker%i" % idx, idx + 1)) for idx in range(3)]
+        for thread in threads:
+            thread.start()
+
+        started = []
+        done = {}
+
+        def on_done(name, results, output):
+            done[name] = (results, output)
+
+        coordinator.run(names, started.append, on_done)
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(started), sorted(names))
+        self.assertEqual(sorted(run_by.keys()), sorted(names))
+        for name in names:
+            self.assertEqual(done[name], ({name: "passed"}, "output of %s" % name))
+
+    def test_reschedules_test_suites_of_lost_worker(self):
+        coordinator = Coordinator(("127.0.0.1", 0), self.output_path)
+        names = ["test1", "test2"]
+        lost_worker_started = threading.Event()
+
+        def run_lost_worker():
+            """
+            A worker which disconnects after receiving a test suite
+            """
+            sock = socket.create_connection(coordinator.address)
+            fptr = sock.makefile("rb")
+            sock.sendall(b'{"type": "hello", "slots": 1, "output_path_token": null}\n')
+            fptr.readline()
+            fptr.readline()
+            fptr.close()
+            sock.close()
+            lost_worker_started.set()
+
+        def run_worker():
+            lost_worker_started.wait()
+            worker = Worker(coordinator.address, self.output_path)
+            self.assertTrue(worker.shares_output_path)
+            worker.run(lambda name: ({name: "passed"}, None))
+
+        threads = [threading.Thread(target=run_lost_worker), threading.Thread(target=run_worker)]
+        for thread in threads:
+            thread.start()
+
+        done = {}
+
+        def on_done(name, results, output):
+            done[name] = (results, output)
+
+        coordinator.run(names, lambda name: None, on_done)
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(done, {"test1": ({"test1": "passed"}, None),
+                                "test2": ({"test2": "passed"}, None)})
+
+    def test_fails_test_suites_without_workers(self):
+        coordinator = Coordinator(("127.0.0.1", 0), self.output_path, worker_timeout=0.1)
+        done = {}
+
+        def on_done(name, results, output):
+            done[name] = (results, output)
+
+        coordinator.run(["test1", "test2"], lambda name: None, on_done)
+        self.assertEqual(done, {"test1": (None, None),
+                                "test2": (None, None)})
+
+    def test_worker_shares_output_path_only_with_same_coordinator_token(self):
+        coordinator = Coordinator(("127.0.0.1", 0), self.output_path)
+        other_path = join(self.output_path, "other")
+        # As a worker on another host using the same local path as an earlier coordinator
+        write_file(join(other_path, TOKEN_FILE_NAME), "token of another coordinator")
+        output_paths = [other_path, join(self.output_path, "missing"), self.output_path]
+        shares_output_path = {}
+        all_connected = threading.Event()
+        lock = threading.Lock()
+
+        def run_worker(output_path):
+            """
+            Run a worker recording if it shares the output path and wait for the others to connect
+            """
+            worker = Worker(coordinator.address, output_path)
+            with lock:
+                shares_output_path[output_path] = worker.shares_output_path
+                if len(shares_output_path) == len(output_paths):
+                    all_connected.set()
+
+            def run_test_suite(name):
+                all_connected.wait()
+                return {name: "passed"}, None
+
+            worker.run(run_test_suite)
+
+        threads = [threading.Thread(target=run_worker, args=(output_path,)) for output_path in output_paths]
+        for thread in threads:
+            thread.start()
+        coordinator.run(["test%i" % idx for idx in range(len(output_paths))],
+                        lambda name: None, lambda name, results, output: None)
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(shares_output_path, {other_path: False,
+                                              join(self.output_path, "missing"): False,
+                                              self.output_path: True})
+
+    @mock.patch("vunit.distributed.ostools.PROGRAM_STATUS.wait_for_shutdown", autospec=True, return_value=False)
+    @mock.patch("vunit.distributed.ostools.get_time", autospec=True)
+    @mock.patch("vunit.distributed.socket.create_connection", autospec=True)
+    def test_worker_waits_for_coordinator_compiling(self, create_connection, get_time, _):
+        sock = mock.Mock()
+        create_connection.side_effect = [socket.error()] * 3 + [sock]
+        get_time.side_effect = [0.0, 100.0, 200.0, 300.0]
+        self.assertIs(Worker._connect(("localhost", 1234), None), sock)  # pylint: disable=protected-access
+
+        create_connection.side_effect = [socket.error()] * 3 + [sock]
+        get_time.side_effect = [0.0, 100.0, 200.0, 300.0]
+        self.assertRaises(socket.error, Worker._connect,  # pylint: disable=protected-access
+                          ("localhost", 1234), 150.0)
+
+    def test_test_runner(self):
+        coordinator_path = join(self.output_path, "coordinator")
+        worker_path = join(self.output_path, "worker")
+        coordinator = Coordinator(("127.0.0.1", 0), coordinator_path)
+        report = TestReport()
+        coordinator_runner = TestRunner(report, coordinator_path, coordinator=coordinator)
+
+        def run_worker():
+            worker = Worker(coordinator.address, worker_path, num_threads=2)
+            worker_runner = TestRunner(TestReport(), worker_path, num_threads=2)
+            worker_runner.run_worker(create_test_suites(), worker)
+
+        thread = threading.Thread(target=run_worker)
+        thread.start()
+        coordinator_runner.run(create_test_suites())
+        thread.join()
+
+        self.assertTrue(report.result_of("test1").passed)
+        self.assertTrue(report.result_of("test2").failed)
+        self.assertEqual(read_file(join(create_output_path(coordinator_path, "test1"), "output.txt")),
+                         "output of test1\n")
+        self.assertEqual(read_file(join(create_output_path(coordinator_path, "test2"), "output.txt")),
+                         "output of test2\n")
+
+
+class FakeTestSuite(object):
+    """
+    A test suite printing its name
+    """
+    def __init__(self, name, passed):
+        self.name = name
+        self.test_cases = [name]
+        self._passed = passed
+
+    def run(self, output_path):  # pylint: disable=unused-argument
+        """
+        Print the name and return the results
+        """
+        print("output of %s" % self.name)
+        return {self.name: PASSED if self._passed else FAILED}
+
+
+def create_test_suites():
+    return [FakeTestSuite("test1", True), FakeTestSuite("test2", False)]
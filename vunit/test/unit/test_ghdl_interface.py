@@ -18,6 +18,7 @@ from vunit.test.mock_2or3 import mock
 from vunit.project import Project
 from vunit.ostools import renew_path, write_file
 from vunit.exceptions import CompileError
+from vunit.configuration import Configuration
 
 
 class TestGHDLInterface(unittest.TestCase):
@@ -154,6 +155,22 @@ warranty; not even for MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE."""
             [join("prefix", 'ghdl'), '-a', '--workdir=lib_path', '--work=lib', '--std=08',
              '-Plib_path', 'custom', 'flags', 'file.vhd'], env=simif.get_env())
 
+    @mock.patch("vunit.simulator_interface.run_command", autospec=True, return_value=True)
+    def test_compile_project_in_batches(self, run_command):  # pylint: disable=no-self-use
+        simif = GHDLInterface(prefix="prefix")
+        write_file("file1.vhd", "")
+        write_file("file2.vhd", "")
+
+        project = Project()
+        project.add_library("lib", "lib_path")
+        file1 = project.add_source_file("file1.vhd", "lib", file_type="vhdl")
+        file2 = project.add_source_file("file2.vhd", "lib", file_type="vhdl")
+        project.add_manual_dependency(file2, depends_on=file1)
+        simif.compile_project(project, batch_compile=True)
+        run_command.assert_called_once_with(
+            [join("prefix", 'ghdl'), '-a', '--workdir=lib_path', '--work=lib', '--std=08',
+             '-Plib_path', 'file1.vhd', 'file2.vhd'], env=simif.get_env())
+
     def test_compile_project_verilog_error(self):
         simif = GHDLInterface(prefix="prefix")
         write_file("file.v", "")
@@ -163,6 +180,94 @@ warranty; not even for MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE."""
         project.add_source_file("file.v", "lib", file_type="verilog")
         self.assertRaises(CompileError, simif.compile_project, project)
 
+    @mock.patch("vunit.ghdl_interface.Process", autospec=True)
+    def test_elaborates_once_and_runs_executable_per_test(self, process):
+        simif = GHDLInterface(prefix="prefix", backend="llvm")
+        simif.set_output_path("simulator_output_path")
+        simif.setup_library_mapping(self._create_project())
+        process.side_effect = create_elaborated_executable
+
+        self.assertTrue(simif.simulate("output1", "lib.tb.test1",
+                                       make_config(generics={"value": 1}), elaborate_only=False))
+        self.assertTrue(simif.simulate("output2", "lib.tb.test2",
+                                       make_config(generics={"value": 2}), elaborate_only=False))
+
+        commands = [call[0][0] for call in process.call_args_list]
+        self.assertEqual(len(commands), 3)
+        self.assertEqual(commands[0][:2], [join("prefix", 'ghdl'), '-e'])
+        executable = commands[1][0]
+        self.assertEqual(commands[1], [executable, '-gvalue=1', '--assert-level=error'])
+        self.assertEqual(commands[2], [executable, '-gvalue=2', '--assert-level=error'])
+        self.assertTrue(exists(executable))
+
+    @mock.patch("vunit.ghdl_interface.Process", autospec=True)
+    def test_elaborates_again_when_elab_flags_differ(self, process):
+        simif = GHDLInterface(prefix="prefix", backend="llvm")
+        simif.set_output_path("simulator_output_path")
+        simif.setup_library_mapping(self._create_project())
+        process.side_effect = create_elaborated_executable
+
+        self.assertTrue(simif.simulate("output1", "lib.tb.test", make_config(), elaborate_only=True))
+        self.assertTrue(simif.simulate("output2", "lib.tb.test",
+                                       make_config(sim_options={"ghdl.elab_flags": ["--syn-binding"]}),
+                                       elaborate_only=True))
+
+        commands = [call[0][0] for call in process.call_args_list]
+        self.assertEqual([cmd[1] for cmd in commands], ['-e', '-e'])
+        self.assertIn('--syn-binding', commands[1])
+
+    @mock.patch("vunit.ghdl_interface.Process", autospec=True)
+    def test_removes_executable_elaborated_from_outdated_libraries(self, process):
+        simif = GHDLInterface(prefix="prefix", backend="llvm")
+        simif.set_output_path("simulator_output_path")
+        project = self._create_project()
+        simif.setup_library_mapping(project)
+        process.side_effect = create_elaborated_executable
+
+        elaboration_path = join("simulator_output_path", "elaborated")
+
+        def executable_paths():
+            """
+            Return the paths of the elaborated executables
+            """
+            return [join(config_path, file_name)
+                    for config_path in os.listdir(elaboration_path)
+                    for file_name in os.listdir(join(elaboration_path, config_path))]
+
+        self.assertTrue(simif.simulate("output1", "lib.tb.test", make_config(), elaborate_only=True))
+        old_paths = executable_paths()
+        self.assertEqual(len(old_paths), 1)
+
+        write_file(join("lib_path", "work-obj08.cf"), "re-analyzed")
+        simif.setup_library_mapping(project)
+        self.assertTrue(simif.simulate("output2", "lib.tb.test", make_config(), elaborate_only=True))
+        new_paths = executable_paths()
+        self.assertEqual(len(new_paths), 1)
+        self.assertNotEqual(old_paths, new_paths)
+        self.assertEqual(len(process.call_args_list), 2)
+
+    @mock.patch("vunit.ghdl_interface.Process", autospec=True)
+    def test_mcode_elaborates_and_runs_in_one_step(self, process):
+        simif = GHDLInterface(prefix="prefix", backend="mcode")
+        simif.setup_library_mapping(self._create_project())
+
+        self.assertTrue(simif.simulate("output", "lib.tb.test",
+                                       make_config(generics={"value": 1}), elaborate_only=False))
+        process.assert_called_once_with(
+            [join("prefix", 'ghdl'), '--elab-run', '--std=08', '--work=lib', '--workdir=lib_path',
+             '-Plib_path', 'tb', 'arch', '-gvalue=1', '--assert-level=error'], raw_output=True)
+
+    @staticmethod
+    def _create_project():
+        """
+        Create a project with a VHDL file in library lib
+        """
+        project = Project()
+        project.add_library("lib", "lib_path")
+        write_file("file.vhd", "")
+        project.add_source_file("file.vhd", "lib", file_type="vhdl")
+        return project
+
     def setUp(self):
         self.output_path = join(dirname(__file__), "test_ghdl_interface_out")
         renew_path(self.output_path)
@@ -174,3 +279,26 @@ warranty; not even for MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE."""
         os.chdir(self.cwd)
         if exists(self.output_path):
             rmtree(self.output_path)
+
+
+def make_config(sim_options=None, generics=None):
+    """
+    Utility to reduce boiler plate in tests
+    """
+    cfg = mock.Mock(spec=Configuration)
+    cfg.library_name = "lib"
+    cfg.entity_name = "tb"
+    cfg.architecture_name = "arch"
+    cfg.vhdl_assert_stop_level = "error"
+    cfg.sim_options = {} if sim_options is None else sim_options
+    cfg.generics = {} if generics is None else generics
+    return cfg
+
+
+def create_elaborated_executable(cmd, **kwargs):  # pylint: disable=unused-argument
+    """
+    Create the output file of a mocked GHDL elaboration
+    """
+    if '-o' in cmd:
+        write_file(cmd[cmd.index('-o') + 1], "")
+    return mock.DEFAULT
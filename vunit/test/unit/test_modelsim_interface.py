@@ -17,6 +17,8 @@ from vunit.modelsim_interface import ModelSimInterface
 from vunit.test.mock_2or3 import mock
 from vunit.project import Project
 from vunit.ostools import renew_path, write_file
+from vunit.exceptions import CompileError
+from vunit.configuration import Configuration
 
 
 class TestModelSimInterface(unittest.TestCase):
@@ -294,6 +296,92 @@ class TestModelSimInterface(unittest.TestCase):
                                              '-L', 'lib',
                                              '+define+defname=defval'], env=simif.get_env())
 
+    @mock.patch("vunit.vsim_simulator_mixin.PersistentTclShell", autospec=True)
+    @mock.patch("vunit.simulator_interface.run_command", autospec=True, return_value=True)
+    @mock.patch("vunit.modelsim_interface.Process", autospec=True)
+    def test_compile_project_persistent(self, process, run_command, persistent_tcl_shell):
+        write_file("modelsim.ini", """
+[Library]
+                   """)
+        modelsim_ini = join(self.output_path, "modelsim.ini")
+        simif = ModelSimInterface(prefix="prefix",
+                                  modelsim_ini=modelsim_ini,
+                                  persistent=False,
+                                  persistent_compile=True)
+        shell = persistent_tcl_shell.return_value
+        shell.read_var.return_value = "0"
+        project = Project()
+        project.add_library("lib", "lib_path")
+        write_file("file.vhd", "")
+        project.add_source_file("file.vhd", "lib", file_type="vhdl", vhdl_standard="2008")
+        simif.compile_project(project)
+        process.assert_called_once_with([join("prefix", "vlib"), "-unix", "lib_path"], env=simif.get_env())
+        self.assertFalse(run_command.called)
+        self.assertEqual(shell.execute.call_args[0],
+                         ("set vunit_compile_failed [catch {vcom {-quiet} {-modelsimini} {%s} "
+                          "{-2008} {-work} {lib} {file.vhd}}]" % modelsim_ini,))
+        shell.read_var.assert_called_once_with("vunit_compile_failed")
+        shell.teardown.assert_called_once_with()
+
+        shell.read_var.return_value = "1"
+        write_file("file2.vhd", "")
+        project.add_source_file("file2.vhd", "lib", file_type="vhdl", vhdl_standard="2008")
+        self.assertRaises(CompileError, simif.compile_project, project)
+
+    @mock.patch("vunit.vsim_simulator_mixin.PersistentTclShell", autospec=True)
+    @mock.patch("vunit.simulator_interface.run_command", autospec=True, return_value=True)
+    @mock.patch("vunit.modelsim_interface.Process", autospec=True)
+    def test_prestarts_simulations(self, process, run_command, persistent_tcl_shell):  # pylint: disable=unused-argument
+        write_file("modelsim.ini", """
+[Library]
+                   """)
+        simif = ModelSimInterface(prefix="prefix",
+                                  modelsim_ini=join(self.output_path, "modelsim.ini"),
+                                  persistent=True)
+        shell = persistent_tcl_shell.return_value
+
+        simif._prestart_simulations(2)  # pylint: disable=protected-access
+        self.assertFalse(shell.start_in_background.called)
+        project = Project()
+        project.add_library("lib", "lib_path")
+        simif.compile_project(project)
+        shell.start_in_background.assert_called_once_with(2)
+
+        shell.reset_mock()
+        simif._prestart_simulations(3, compiled=True)  # pylint: disable=protected-access
+        shell.start_in_background.assert_called_once_with(3)
+        self.assertFalse(shell.set_num_tests.called)
+
+        simif._prestart_simulations(3, compiled=True, num_test_suites=5)  # pylint: disable=protected-access
+        shell.set_num_tests.assert_called_once_with(5)
+
+    @mock.patch("vunit.vsim_simulator_mixin.PersistentTclShell", autospec=True)
+    def test_reuses_loaded_design_for_same_configuration(self, persistent_tcl_shell):
+        write_file("modelsim.ini", """
+[Library]
+                   """)
+        shell = FakeTclShell()
+        persistent_tcl_shell.return_value = shell
+        simif = ModelSimInterface(prefix="prefix",
+                                  modelsim_ini=join(self.output_path, "modelsim.ini"),
+                                  persistent=True,
+                                  reuse_design=True)
+
+        self.assertTrue(simif.simulate("output1", "lib.tb.test1", make_config("enabled_test_cases : test1"), False))
+        self.assertEqual(shell.commands.count("set failed [vunit_load]"), 1)
+
+        self.assertTrue(simif.simulate("output2", "lib.tb.test2", make_config("enabled_test_cases : test2"), False))
+        self.assertEqual(shell.commands.count("set failed [vunit_load]"), 1)
+        self.assertEqual(shell.commands.count("quit -sim"), 0)
+        restarts = [command for command in shell.commands if "vunit_restart_with_runner_cfg" in command]
+        self.assertEqual(len(restarts), 1)
+        self.assertIn("{enabled_test_cases : test2   ", restarts[0])
+
+        self.assertTrue(simif.simulate("output3", "lib.tb.test3",
+                                       make_config("enabled_test_cases : test3", generics={"value": 1}), False))
+        self.assertEqual(shell.commands.count("set failed [vunit_load]"), 2)
+        self.assertEqual(shell.commands.count("quit -sim"), 1)
+
     def setUp(self):
         self.output_path = join(dirname(__file__), "test_modelsim_out")
         renew_path(self.output_path)
@@ -305,3 +393,48 @@ class TestModelSimInterface(unittest.TestCase):
         os.chdir(self.cwd)
         if exists(self.output_path):
             rmtree(self.output_path)
+
+
+class FakeTclShell(object):
+    """
+    Records the commands and keeps the variables set by them
+    """
+    def __init__(self):
+        self.commands = []
+        self._variables = {}
+
+    def execute(self, cmd, output=None):  # pylint: disable=unused-argument
+        """
+        Record the command, setting vunit_loaded_design and quitting the simulation like vsim would
+        """
+        self.commands.append(cmd)
+        if cmd.startswith("set vunit_loaded_design {"):
+            self._variables["vunit_loaded_design"] = cmd[len("set vunit_loaded_design {"):-1]
+        elif cmd.startswith("if {![info exists vunit_loaded_design]}"):
+            self._variables.setdefault("vunit_loaded_design", "none")
+        elif cmd.startswith("if {[info exists vunit_loaded_design]"):
+            if self._variables.get("vunit_loaded_design", "none") != "none":
+                self.commands.append("quit -sim")
+                self._variables["vunit_loaded_design"] = "none"
+
+    def read_var(self, varname):
+        return self._variables.get(varname, "0")
+
+    def test_done(self):
+        pass
+
+
+def make_config(runner_cfg, generics=None):
+    """
+    Utility to reduce boiler plate in tests
+    """
+    cfg = mock.Mock(spec=Configuration)
+    cfg.library_name = "lib"
+    cfg.entity_name = "tb"
+    cfg.architecture_name = "arch"
+    cfg.vhdl_assert_stop_level = "error"
+    cfg.sim_options = {}
+    cfg.generics = {} if generics is None else generics.copy()
+    cfg.generics["runner_cfg"] = runner_cfg
+    cfg.copy.side_effect = lambda: make_config(runner_cfg, generics)
+    return cfg
@@ -9,11 +9,20 @@ Test the os-dependent functionality wrappers
 """
 
 
-from unittest import TestCase
+from unittest import TestCase, skipIf
 from shutil import rmtree
 from os.path import exists, dirname, join, abspath
 import sys
-from vunit.ostools import Process, renew_path
+import io
+import threading
+from vunit.ostools import (Process,
+                           ProcessWatch,
+                           renew_path,
+                           ProgramStatus,
+                           InterruptableQueue,
+                           get_time,
+                           IS_WINDOWS_SYSTEM)
+from vunit.test.mock_2or3 import mock
 
 
 class TestOSTools(TestCase):
@@ -93,3 +102,119 @@ sleep(1000)
         process = Process([sys.executable, python_script])
         process.consume_output(output.append)
         self.assertEqual(output, ["ac"])
+
+    def test_consume_output_raw(self):
+        python_script = self.make_file("program.py", """\
+from sys import stdout
+stdout.write("1\\r\\n" + "x" * 100000 + "\\n")
+stdout.write("3")
+""")
+        output = io.StringIO()
+        process = Process([sys.executable, python_script], raw_output=True)
+        self.assertEqual(process.consume_output_raw(output), None)
+        self.assertEqual(output.getvalue(), "1\n" + "x" * 100000 + "\n3")
+
+    def test_consume_output_raw_until_marker(self):
+        python_script = self.make_file("program.py", """\
+import sys
+for line in iter(sys.stdin.readline, ""):
+    line = line.strip()
+    if line == "quit":
+        break
+    sys.stdout.write("output of %s\\n# %s=value\\nafter\\n" % (line, line))
+    sys.stdout.flush()
+""")
+        output = io.StringIO()
+        process = Process([sys.executable, python_script], raw_output=True)
+        process.writeline("cmd1")
+        self.assertEqual(process.consume_output_raw(output, "cmd1="), "# cmd1=value")
+        self.assertEqual(output.getvalue(), "output of cmd1\n")
+        process.writeline("cmd2")
+        self.assertEqual(process.consume_output_raw(output, "cmd2="), "# cmd2=value")
+        self.assertEqual(output.getvalue(), "output of cmd1\nafter\noutput of cmd2\n")
+        process.writeline("quit")
+        self.assertEqual(process.consume_output_raw(output), None)
+        self.assertEqual(output.getvalue(), "output of cmd1\nafter\noutput of cmd2\nafter\n")
+
+    def test_consume_output_raw_error(self):
+        python_script = self.make_file("program.py", """\
+from sys import stdout
+print("error")
+exit(1)
+""")
+        output = io.StringIO()
+        process = Process([sys.executable, python_script], raw_output=True)
+        self.assertRaises(Process.NonZeroExitCode, process.consume_output_raw, output)
+        self.assertEqual(output.getvalue(), "error\n")
+
+    def test_interruptable_queue(self):
+        queue = InterruptableQueue()
+        queue.put(1)
+        queue.put(2)
+        self.assertEqual(queue.get(), 1)
+        self.assertEqual(queue.get(), 2)
+        self.assertTrue(queue.empty())
+
+    def test_interruptable_queue_get_is_woken_up_by_shutdown(self):
+        program_status = ProgramStatus()
+        with mock.patch("vunit.ostools.PROGRAM_STATUS", program_status):
+            queue = InterruptableQueue()
+            interrupted = []
+
+            def get():
+                try:
+                    queue.get()
+                except KeyboardInterrupt:
+                    interrupted.append(get_time())
+
+            threads = [threading.Thread(target=get) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+
+            start = get_time()
+            program_status.shutdown()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(interrupted), 2)
+        self.assertTrue(all(stop - start < 0.5 for stop in interrupted))
+
+    def test_process_wait_raises_at_shutdown(self):
+        program_status = ProgramStatus()
+        program_status.shutdown()
+        process = Process([sys.executable, "-c", "import time; time.sleep(10)"])
+        try:
+            with mock.patch("vunit.ostools.PROGRAM_STATUS", program_status):
+                self.assertRaises(KeyboardInterrupt, process.wait)
+        finally:
+            process.terminate()
+
+    @skipIf(IS_WINDOWS_SYSTEM, "Requires process groups")
+    def test_process_watch_kills_process_group(self):
+        python_script = self.make_file("program.py", """\
+import subprocess
+import sys
+subprocess.call([sys.executable, "-c", "import time; time.sleep(60)"])
+""")
+        with ProcessWatch() as watch:
+            process = Process([sys.executable, python_script])
+            timer = threading.Timer(0.1, watch.kill)
+            timer.start()
+            start = get_time()
+            # Only returns when the child holding the output pipe is also killed
+            self.assertRaises(Process.NonZeroExitCode, process.consume_output, None)
+            timer.join()
+            self.assertLess(get_time() - start, 10.0)
+            self.assertTrue(watch.killed)
+
+            # Processes started after the kill are killed immediately
+            process = Process([sys.executable, python_script])
+            self.assertRaises(Process.NonZeroExitCode, process.consume_output, None)
+
+    def test_process_watch_does_not_kill_after_leaving(self):
+        with ProcessWatch() as watch:
+            pass
+        process = Process([sys.executable, "-c", "print('done')"])
+        watch.kill()
+        self.assertFalse(watch.killed)
+        process.consume_output(None)
@@ -0,0 +1,120 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2017, Lars Asplund lars.anders.asplund@gmail.com
+
+"""
+Test the persistent TCL shell
+"""
+
+import unittest
+import threading
+from vunit.persistent_tcl_shell import PersistentTclShell
+from vunit.test.mock_2or3 import mock
+
+
+class TestPersistentTclShell(unittest.TestCase):
+    """
+    Test the persistent TCL shell
+    """
+
+    def setUp(self):
+        self.processes = []
+        self.lock = threading.Lock()
+
+    def create_process(self, ident):
+        """
+        Create a fake process which is always ready
+        """
+        process = mock.Mock()
+        process.ident = ident
+        process.is_alive.return_value = True
+        process.consume_output_raw.return_value = "#VUNIT_RETURN"
+        with self.lock:
+            self.processes.append(process)
+        return process
+
+    def test_creates_process_per_thread_on_first_use(self):
+        shell = PersistentTclShell(self.create_process)
+        shell.execute("cmd1")
+        shell.execute("cmd2")
+        self.assertEqual(len(self.processes), 1)
+
+        thread = threading.Thread(target=shell.execute, args=("cmd3",))
+        thread.start()
+        thread.join()
+        self.assertEqual(len(self.processes), 2)
+        self.assertEqual(self.processes[1].writeline.call_args_list[-2], mock.call("cmd3"))
+
+    def test_hands_out_processes_started_in_background(self):
+        shell = PersistentTclShell(self.create_process)
+        shell.start_in_background(2)
+        executed = threading.Semaphore(0)
+        done = threading.Event()
+
+        def execute():
+            """
+            Keep the thread alive until both threads have executed such that
+            the identity of the first thread is not re-used by the second
+            """
+            shell.execute("cmd")
+            executed.release()
+            done.wait()
+
+        threads = [threading.Thread(target=execute) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for _ in threads:
+            executed.acquire()
+        done.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.processes), 2)
+        for process in self.processes:
+            process.writeline.assert_any_call("cmd")
+
+    def test_does_not_hand_out_dead_processes(self):
+        def create_process(ident):
+            """
+            The first process dies after starting
+            """
+            process = self.create_process(ident)
+            process.is_alive.return_value = ident != 1
+            return process
+
+        shell = PersistentTclShell(create_process)
+        shell.start_in_background(1)
+
+        shell.execute("cmd")
+        self.assertEqual(len(self.processes), 2)
+        self.processes[1].writeline.assert_any_call("cmd")
+
+    def test_replaces_process_after_max_tests(self):
+        shell = PersistentTclShell(self.create_process, max_tests=2)
+
+        shell.execute("cmd")
+        shell.test_done()
+        shell.execute("cmd")
+        shell.test_done()
+        self.processes[0].writeline.assert_called_with("quit -force -code 0")
+
+        shell.execute("cmd")
+        self.assertEqual(len(self.processes), 2)
+        self.processes[1].writeline.assert_any_call("cmd")
+
+    def test_replaces_process_only_when_tests_are_left(self):
+        shell = PersistentTclShell(self.create_process, max_tests=1)
+        shell.set_num_tests(2)
+
+        shell.execute("cmd")
+        shell.test_done()
+        shell.execute("cmd")
+        self.assertEqual(len(self.processes), 2)
+        self.processes[1].writeline.assert_any_call("cmd")
+
+        with mock.patch.object(shell, "start_in_background", autospec=True) as start_in_background:
+            shell.test_done()
+        self.processes[1].writeline.assert_called_with("quit -force -code 0")
+        self.assertFalse(start_in_background.called)
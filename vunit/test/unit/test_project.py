@@ -17,10 +17,14 @@ from os.path import join, exists, dirname
 import os
 from time import sleep
 import itertools
+import json
 from vunit.test.mock_2or3 import mock
 from vunit.exceptions import CompileError
 from vunit.ostools import renew_path, write_file
 from vunit.project import Project, file_type_of
+from vunit.compile_manifest import CompileManifest
+from vunit.vhdl_parser import CachedVHDLParser
+from vunit.parsing.verilog.parser import VerilogParser
 
 
 class TestProject(unittest.TestCase):  # pylint: disable=too-many-public-methods
@@ -572,12 +576,14 @@ endpackage
         self.assert_should_recompile([file1, file2, file3])
         self.assert_should_recompile([file1, file2, file3])
 
-    def test_updating_creates_hash_files(self):
+    def test_updating_creates_compile_manifest(self):
         files = self.create_dummy_three_file_project()
 
         for source_file in files:
             self.update(source_file)
-            self.assertTrue(exists(self.hash_file_name_of(source_file)))
+            self.assertTrue(exists(self.manifest_file_name_of(source_file)))
+            entry = CompileManifest(self.manifest_file_name_of(source_file)).get(source_file.name)
+            self.assertEqual(entry[0], source_file.content_hash)
 
     def test_should_not_recompile_updated_files(self):
         file1, file2, file3 = self.create_dummy_three_file_project()
@@ -658,7 +664,7 @@ endpackage
         self.update(file1)
         self.assert_should_recompile([file2, file3])
 
-    def test_should_recompile_files_missing_hash(self):
+    def test_should_recompile_files_missing_manifest_entry(self):
         file1, file2, file3 = self.create_dummy_three_file_project()
 
         self.update(file1)
@@ -666,9 +672,23 @@ endpackage
         self.update(file3)
         self.assert_should_recompile([])
 
-        os.remove(self.hash_file_name_of(file2))
+        self.remove_manifest_entry(file2)
+        file1, file2, file3 = self.create_dummy_three_file_project()
         self.assert_should_recompile([file2, file3])
 
+    def test_should_recompile_dependent_files_compiled_before_dependency(self):
+        file1, file2, file3 = self.create_dummy_three_file_project()
+
+        self.update(file2)
+        self.update(file3)
+        self.update(file1)
+        self.assert_should_recompile([file2, file3])
+
+        self.update(file2)
+        self.update(file3)
+        file1, file2, file3 = self.create_dummy_three_file_project()
+        self.assert_should_recompile([])
+
     def test_finds_component_instantiation_dependencies(self):
         self.project.add_library("toplib", "work_path")
         top = self.add_source_file("toplib", "top.vhd", """\
@@ -741,6 +761,16 @@ end architecture;
         self.assertTrue(deps[1] == self.project.get_source_files_in_order()[1])
         self.assertTrue(deps[2] == self.project.get_source_files_in_order()[2])
 
+    def test_get_files_in_compile_order_with_target(self):
+        self.create_dummy_three_file_project()
+        file1, file2, file3 = self.project.get_source_files_in_order()
+        self.assertEqual(self.project.get_files_in_compile_order(target_files=[file2]), [file1, file2])
+        self.assertEqual(self.project.get_files_in_compile_order(target_files=[file1]), [file1])
+        self.assertEqual(self.project.get_files_in_compile_order(target_files=[file3]), [file1, file2, file3])
+
+        self.update(file1)
+        self.assertEqual(self.project.get_files_in_compile_order(target_files=[file2]), [file2])
+
     def test_compiles_same_file_into_different_libraries(self):
         pkgs = []
         second_pkgs = []
@@ -768,8 +798,8 @@ package second_pkg is
 end package second_pkg;
 """))
 
-        self.assertNotEqual(self.hash_file_name_of(pkgs[0]),
-                            self.hash_file_name_of(pkgs[1]))
+        self.assertNotEqual(self.manifest_file_name_of(pkgs[0]),
+                            self.manifest_file_name_of(pkgs[1]))
         self.assertEqual(len(self.project.get_files_in_compile_order()), 5)
         self.assert_compiles(other_pkg, before=pkgs[0])
         self.assert_compiles(other_pkg, before=pkgs[1])
@@ -1159,6 +1189,61 @@ end architecture;
                                                   no_parse=no_parse)
             self.assertEqual(len(source_file.design_units), int(not no_parse))
 
+    def test_dependency_graph_is_reused_until_project_changes(self):
+        file1, _, _ = self.create_dummy_three_file_project()
+        graph = self.project.create_dependency_graph()
+        self.assertIs(self.project.create_dependency_graph(), graph)
+        self.assertIsNot(self.project.create_dependency_graph(implementation_dependencies=True), graph)
+
+        file4 = self.add_source_file("lib", "file4.vhd", """\
+entity module4 is
+end entity;
+
+architecture arch of module4 is
+begin
+  module1_inst : entity work.module1;
+end architecture;
+""")
+        new_graph = self.project.create_dependency_graph()
+        self.assertIsNot(new_graph, graph)
+        self.assertEqual(new_graph.get_direct_dependencies(file4), set([file1]))
+
+        self.project.add_manual_dependency(file1, depends_on=file4)
+        self.assertIsNot(self.project.create_dependency_graph(), new_graph)
+
+    def test_fill_parse_cache(self):
+        vhdl_parser = CachedVHDLParser(database={})
+        verilog_parser = VerilogParser(database={})
+        project = Project(vhdl_parser=vhdl_parser, verilog_parser=verilog_parser)
+        project.add_library("lib", "work_path")
+        write_file("file1.vhd", """
+entity ent1 is
+end entity;
+""")
+        write_file("file2.vhd", """
+entity ent2 is
+end entity;
+""")
+        write_file("file3.v", """
+module mod;
+endmodule
+""")
+        files = [("file1.vhd", "vhdl", None, None),
+                 ("file2.vhd", "vhdl", None, None),
+                 ("file3.v", "verilog", [], {})]
+        project.fill_parse_cache(files, num_processes=2)
+
+        with mock.patch("vunit.vhdl_parser.VHDLDesignFile.parse") as vhdl_parse, \
+                mock.patch.object(verilog_parser, "parse_uncached") as verilog_parse:
+            source_files = [project.add_source_file(file_name, "lib", file_type=file_type)
+                            for file_name, file_type, _, _ in files]
+            self.assertFalse(vhdl_parse.called)
+            self.assertFalse(verilog_parse.called)
+
+        self.assertEqual([[design_unit.name for design_unit in source_file.design_units]
+                          for source_file in source_files],
+                         [["ent1"], ["ent2"], ["mod"]])
+
     def add_source_file(self, library_name, file_name, contents, defines=None):
         """
         Convenient wrapper arround project.add_source_file
@@ -1170,11 +1255,22 @@ end architecture;
                                                    defines=defines)
         return source_file
 
-    def hash_file_name_of(self, source_file):
+    @staticmethod
+    def manifest_file_name_of(source_file):
+        """
+        Get the compile manifest file name of a source_file
+        """
+        return join(source_file.library.directory, "vunit_manifest")
+
+    def remove_manifest_entry(self, source_file):
         """
-        Get the hash file name of a source_file
+        Remove all entries of source_file from its compile manifest file
         """
-        return self.project._hash_file_name_of(source_file)  # pylint: disable=protected-access
+        file_name = self.manifest_file_name_of(source_file)
+        with open(file_name, "r") as fptr:
+            lines = fptr.readlines()
+        with open(file_name, "w") as fptr:
+            fptr.writelines(line for line in lines if json.loads(line)[0] != source_file.name)
 
     def update(self, source_file):
         """
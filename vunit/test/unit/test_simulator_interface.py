@@ -110,6 +110,141 @@ class TestSimulatorInterface(unittest.TestCase):
             self.assertRaises(CompileError, simif.compile_source_files, project)
         self.assertEqual(project.get_files_in_compile_order(incremental=True), [source_file])
 
+    def test_compile_source_files_in_parallel(self):
+        simif = create_simulator_interface()
+        simif.supports_concurrent_compile = True
+        project = Project()
+        project.add_library("lib", "lib_path")
+        write_file("file1.vhd", "")
+        file1 = project.add_source_file("file1.vhd", "lib", file_type="vhdl")
+        write_file("file2.vhd", "")
+        file2 = project.add_source_file("file2.vhd", "lib", file_type="vhdl")
+        write_file("file3.vhd", "")
+        file3 = project.add_source_file("file3.vhd", "lib", file_type="vhdl")
+        project.add_manual_dependency(file3, depends_on=file1)
+        project.add_manual_dependency(file3, depends_on=file2)
+
+        simif.compile_source_file_command.side_effect = lambda source_file: [source_file.name]
+        commands = []
+
+        def run_command_side_effect(command, **kwargs):  # pylint: disable=unused-argument
+            commands.append(command[0])
+            return True
+
+        with mock.patch("vunit.simulator_interface.run_command", autospec=True) as run_command:
+            run_command.side_effect = run_command_side_effect
+            simif.compile_source_files(project, num_threads=2)
+
+        self.assertEqual(len(commands), 3)
+        self.assertEqual(commands[-1], file3.name)
+        self.assertEqual(project.get_files_in_compile_order(incremental=True), [])
+
+    def test_compile_source_files_in_parallel_continue_on_error(self):
+        simif = create_simulator_interface()
+        project = Project()
+        project.add_library("lib", "lib_path")
+        write_file("file1.vhd", "")
+        file1 = project.add_source_file("file1.vhd", "lib", file_type="vhdl")
+        write_file("file2.vhd", "")
+        file2 = project.add_source_file("file2.vhd", "lib", file_type="vhdl")
+        write_file("file3.vhd", "")
+        project.add_source_file("file3.vhd", "lib", file_type="vhdl")
+        project.add_manual_dependency(file2, depends_on=file1)
+
+        simif.compile_source_file_command.side_effect = lambda source_file: [source_file.name]
+
+        def run_command_side_effect(command, **kwargs):  # pylint: disable=unused-argument
+            return command != [file1.name]
+
+        with mock.patch("vunit.simulator_interface.run_command", autospec=True) as run_command:
+            run_command.side_effect = run_command_side_effect
+            self.assertRaises(CompileError, simif.compile_source_files, project,
+                              continue_on_error=True, num_threads=4)
+            self.assertEqual(len(run_command.mock_calls), 2)
+        self.assertEqual(project.get_files_in_compile_order(incremental=True), [file1, file2])
+
+    def test_compile_source_files_in_batches(self):
+        simif = create_simulator_interface()
+        simif.supports_batch_compile = True
+        project = Project()
+        project.add_library("lib", "lib_path")
+        project.add_library("lib2", "lib2_path")
+        source_files = []
+        for name, library_name in [("file1.vhd", "lib"), ("file2.vhd", "lib"), ("file3.vhd", "lib2")]:
+            write_file(name, "")
+            source_files.append(project.add_source_file(name, library_name, file_type="vhdl"))
+        project.add_manual_dependency(source_files[1], depends_on=source_files[0])
+        project.add_manual_dependency(source_files[2], depends_on=source_files[1])
+
+        def compile_source_file_command(source_file):
+            return ["compile", source_file.library.name, source_file.name, "flag"]
+
+        simif.compile_source_file_command.side_effect = compile_source_file_command
+
+        with mock.patch("vunit.simulator_interface.run_command", autospec=True) as run_command:
+            run_command.return_value = True
+            simif.compile_source_files(project, batch_compile=True)
+            self.assertEqual(run_command.mock_calls,
+                             [mock.call(["compile", "lib", "file1.vhd", "file2.vhd", "flag"], env=simif.get_env()),
+                              mock.call(["compile", "lib2", "file3.vhd", "flag"], env=simif.get_env())])
+        self.assertEqual(project.get_files_in_compile_order(incremental=True), [])
+
+    def test_compile_source_files_in_batches_falls_back_to_one_at_a_time(self):
+        simif = create_simulator_interface()
+        simif.supports_batch_compile = True
+        project = Project()
+        project.add_library("lib", "lib_path")
+        source_files = []
+        for name in ["file1.vhd", "file2.vhd", "file3.vhd", "file4.vhd"]:
+            write_file(name, "")
+            source_files.append(project.add_source_file(name, "lib", file_type="vhdl"))
+        for source_file, dependency in zip(source_files[1:], source_files):
+            project.add_manual_dependency(source_file, depends_on=dependency)
+
+        simif.compile_source_file_command.side_effect = lambda source_file: ["compile", source_file.name]
+
+        with mock.patch("vunit.simulator_interface.run_command", autospec=True) as run_command:
+            run_command.side_effect = lambda command, **kwargs: "file2.vhd" not in command
+            self.assertRaises(CompileError, simif.compile_source_files, project,
+                              continue_on_error=True, batch_compile=True)
+            self.assertEqual(run_command.mock_calls,
+                             [mock.call(["compile", "file1.vhd", "file2.vhd", "file3.vhd", "file4.vhd"],
+                                        env=simif.get_env()),
+                              mock.call(["compile", "file1.vhd"], env=simif.get_env()),
+                              mock.call(["compile", "file2.vhd"], env=simif.get_env())])
+        self.assertEqual(project.get_files_in_compile_order(incremental=True), source_files[1:])
+
+    def test_compile_source_files_in_batches_when_not_supported(self):
+        simif = create_simulator_interface()
+        simif.compile_source_file_command.side_effect = lambda source_file: ["compile", source_file.name]
+        project = Project()
+        project.add_library("lib", "lib_path")
+        for name in ["file1.vhd", "file2.vhd"]:
+            write_file(name, "")
+            project.add_source_file(name, "lib", file_type="vhdl")
+
+        with mock.patch("vunit.simulator_interface.run_command", autospec=True) as run_command:
+            run_command.return_value = True
+            simif.compile_source_files(project, batch_compile=True)
+            self.assertEqual(len(run_command.mock_calls), 2)
+
+    @mock.patch("vunit.simulator_interface.LOGGER", autospec=True)
+    def test_compile_source_files_in_parallel_warns_about_batches(self, logger):
+        simif = create_simulator_interface()
+        simif.supports_batch_compile = True
+        simif.compile_source_file_command.side_effect = lambda source_file: ["compile", source_file.name]
+        project = Project()
+        project.add_library("lib", "lib_path")
+        for name in ["file1.vhd", "file2.vhd"]:
+            write_file(name, "")
+            project.add_source_file(name, "lib", file_type="vhdl")
+
+        with mock.patch("vunit.simulator_interface.run_command", autospec=True) as run_command:
+            run_command.return_value = True
+            simif.compile_source_files(project, num_threads=2, batch_compile=True)
+            self.assertEqual(len(run_command.mock_calls), 2)
+        self.assertEqual(len(logger.warning.mock_calls), 1)
+
     @mock.patch("os.environ", autospec=True)
     def test_find_prefix(self, environ):
 
@@ -228,6 +228,19 @@ if run("Test_2")
         self.assertEqual(get_config_of(tests, "lib.tb_entity.value=2").generics,
                          {"value": 2, "global_value": "global value"})
 
+    def test_add_config_with_resources(self):
+        design_unit = Entity('tb_entity')
+        test_bench = TestBench(design_unit)
+        test_bench.set_resource("memory", 1)
+        test_bench.add_config(name="gate_level", resources=dict(memory=12, licenses=2))
+        test_bench.add_config(name="rtl")
+
+        tests = self.create_tests(test_bench)
+        self.assertEqual(get_config_of(tests, "lib.tb_entity.gate_level").resources,
+                         {"memory": 12, "licenses": 2})
+        self.assertEqual(get_config_of(tests, "lib.tb_entity.rtl").resources,
+                         {"memory": 1})
+
     def test_test_case_add_config(self):
         design_unit = Entity('tb_entity', contents='''
 if run("test 1")
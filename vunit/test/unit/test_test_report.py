@@ -12,7 +12,8 @@ from unittest import TestCase
 from xml.etree import ElementTree
 from os.path import join, dirname
 import os
-from vunit.test_report import TestReport, PASSED, SKIPPED, FAILED
+import pickle
+from vunit.test_report import TestReport, PASSED, SKIPPED, FAILED, TIMED_OUT
 
 
 class TestTestReport(TestCase):
@@ -58,6 +59,61 @@ Elapsed time was 1.0 seconds
         self.assertRaises(KeyError,
                           report.result_of, "invalid_test")
 
+    def test_report_with_cached_tests(self):
+        report = self._new_report()
+        report.add_result("passed_test0", PASSED, time=1.0,
+                          output_file_name=self.output_file_name)
+        report.add_result("cached_test1", PASSED, time=0.0,
+                          output_file_name=self.output_file_name, cached=True)
+        report.set_expected_num_tests(2)
+        report.set_real_total_time(1.0)
+        self.assertEqual(self.report_to_str(report), """\
+==== Summary ========================
+{gi}pass{x} passed_test0 (1.0 seconds)
+{gi}pass{x} cached_test1 (0.0 seconds, cached)
+=====================================
+{gi}pass{x} 2 of 2 (1 cached)
+=====================================
+Total time was 1.0 seconds
+Elapsed time was 1.0 seconds
+=====================================
+{gi}All passed!{x}
+""")
+        self.assertTrue(report.all_ok())
+        self.assertTrue(report.result_of("cached_test1").cached)
+
+    def test_report_with_timed_out_tests(self):
+        report = self._new_report()
+        report.add_result("passed_test0", PASSED, time=1.0,
+                          output_file_name=self.output_file_name)
+        report.add_result("timed_out_test1", TIMED_OUT, time=2.0,
+                          output_file_name=self.output_file_name)
+        report.set_expected_num_tests(2)
+        report.set_real_total_time(3.0)
+        self.assertEqual(self.report_to_str(report), """\
+==== Summary ===========================
+{gi}pass{x} passed_test0    (1.0 seconds)
+{ri}fail{x} timed_out_test1 (2.0 seconds, timed out)
+========================================
+{gi}pass{x} 1 of 2
+{ri}fail{x} 1 of 2 (1 timed out)
+========================================
+Total time was 3.0 seconds
+Elapsed time was 3.0 seconds
+========================================
+{ri}Some failed!{x}
+""")
+        self.assertFalse(report.all_ok())
+        self.assertTrue(report.result_of("timed_out_test1").failed)
+        self.assertTrue(report.result_of("timed_out_test1").timed_out)
+
+        root = ElementTree.fromstring(report.to_junit_xml_str())
+        self.assertEqual(root.attrib["failures"], "1")
+        self.assert_has_test(root, "timed_out_test1", time="2.0", status="failed")
+        failure = [test for test in root.findall("testcase")
+                   if test.attrib["name"] == "timed_out_test1"][0].find("failure")
+        self.assertEqual(failure.attrib["message"], "Timed out")
+
     def test_report_with_missing_tests(self):
         report = self._report_with_missing_tests()
         report.set_real_total_time(1.0)
@@ -215,6 +271,14 @@ Elapsed time was 3.0 seconds
                                      ("lib.entity", "test"),
                                      ("lib.entity.config", "test")]))
 
+    def test_unpickled_status_compares_equal(self):
+        status = pickle.loads(pickle.dumps(PASSED))
+        self.assertIsNot(status, PASSED)
+        self.assertTrue(status == PASSED)
+        self.assertFalse(status != PASSED)
+        self.assertTrue(status != FAILED)
+        self.assertEqual(set([status, PASSED]), set([PASSED]))
+
     def _report_with_all_passed_tests(self):
         " @returns A report with all passed tests "
         report = self._new_report()
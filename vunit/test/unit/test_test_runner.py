@@ -12,16 +12,27 @@ Test the test runner
 from __future__ import print_function
 
 import unittest
+import os
+import sys
+import time
+import threading
 from os.path import join, dirname
 
-from vunit.test_runner import TestRunner, create_output_path
-from vunit.test_report import TestReport
+from vunit.test_runner import (TestRunner,
+                               TestScheduler,
+                               create_output_path,
+                               predict_makespan,
+                               select_shard,
+                               read_test_results,
+                               RUNTIME_HISTORY_KEY,
+                               _get_fork_context)
+from vunit.test_report import TestReport, PASSED, FAILED, SKIPPED
 from vunit.test_list import TestList
-from vunit.ostools import renew_path
+from vunit.ostools import renew_path, get_time, Process
 from vunit.test.mock_2or3 import mock
 
 
-class TestTestRunner(unittest.TestCase):
+class TestTestRunner(unittest.TestCase):  # pylint: disable=too-many-public-methods
     """
     Test the test runner
     """
@@ -73,6 +84,306 @@ class TestTestRunner(unittest.TestCase):
         self.assertTrue(self.report.result_of("test").passed)
         self.assertEqual(self.report.result_of("test").output, output)
 
+    def test_runs_longest_expected_runtime_first(self):
+        database = {RUNTIME_HISTORY_KEY: {"test1": 1.0, "test2": 5.0, "test3": 3.0}}
+        runner = TestRunner(self.report, self.output_path, database=database)
+        test_list = TestList()
+        for name in ["test1", "test2", "test3", "test4"]:
+            test_list.add_test(self.create_test(name, True))
+        runner.run(test_list)
+        self.assertEqual(self._tests, ["test4", "test2", "test3", "test1"])
+
+    def test_stores_runtime_history(self):
+        database = {RUNTIME_HISTORY_KEY: {"old_test": 1.0}}
+        runner = TestRunner(self.report, self.output_path, database=database)
+        test_list = TestList()
+        test_list.add_test(self.create_test("test", True))
+        runner.run(test_list)
+        self.assertEqual(set(database[RUNTIME_HISTORY_KEY].keys()), set(["old_test", "test"]))
+        self.assertEqual(database[RUNTIME_HISTORY_KEY]["test"], self.report.result_of("test").time)
+
+    def test_skips_test_suites_passed_with_same_fingerprint(self):
+        database = {}
+        fingerprints = {"test1": "a", "test2": "b"}
+
+        def run(test_list, fingerprints):
+            self._tests = []
+            self.report = TestReport()
+            runner = TestRunner(self.report, self.output_path, database=database, fingerprints=fingerprints)
+            runner.run(test_list)
+
+        test_list = TestList()
+        test_list.add_test(self.create_test("test1", True))
+        test_list.add_test(self.create_test("test2", False))
+
+        run(test_list, fingerprints)
+        self.assertEqual(self._tests, ["test1", "test2"])
+        self.assertFalse(self.report.result_of("test1").cached)
+
+        run(test_list, fingerprints)
+        self.assertEqual(self._tests, ["test2"])
+        self.assertTrue(self.report.result_of("test1").passed)
+        self.assertTrue(self.report.result_of("test1").cached)
+        self.assertTrue(self.report.result_of("test2").failed)
+
+        run(test_list, {"test1": "c", "test2": "b"})
+        self.assertEqual(sorted(self._tests), ["test1", "test2"])
+
+        run(test_list, None)
+        self.assertEqual(sorted(self._tests), ["test1", "test2"])
+
+    def test_failure_without_fingerprints_clears_cached_pass(self):
+        database = {}
+        fingerprints = {"test": "a"}
+
+        def run(passed, fingerprints):
+            """
+            Run the test with the outcome passed
+            """
+            self._tests = []
+            self.report = TestReport()
+            test_list = TestList()
+            test_list.add_test(self.create_test("test", passed))
+            runner = TestRunner(self.report, self.output_path, database=database, fingerprints=fingerprints)
+            runner.run(test_list)
+
+        run(True, fingerprints)
+        run(False, None)
+        run(False, fingerprints)
+        self.assertEqual(self._tests, ["test"])
+        self.assertTrue(self.report.result_of("test").failed)
+
+    def test_merges_test_results_into_database(self):
+        database = {}
+
+        def run(*tests):
+            runner = TestRunner(TestReport(), self.output_path, database=database)
+            test_list = TestList()
+            for name, passed in tests:
+                test_list.add_test(self.create_test(name, passed))
+            runner.run(test_list)
+
+        self.assertEqual(read_test_results(database), {})
+        run(("test1", True), ("test2", False), ("test3", False))
+        self.assertEqual(read_test_results(database), {"test1": "passed", "test2": "failed", "test3": "failed"})
+        run(("test2", True))
+        self.assertEqual(read_test_results(database), {"test1": "passed", "test2": "passed", "test3": "failed"})
+
+    @unittest.skipIf(_get_fork_context() is None, "Requires forking worker processes")
+    def test_process_runner(self):
+        runner = TestRunner(self.report, self.output_path, num_threads=2, runner="process")
+        test_list = TestList()
+        test_cases = [self.create_test(name, passed)
+                      for name, passed in [("test1", True), ("test2", False), ("test3", True)]]
+        for test_case in test_cases:
+            test_list.add_test(test_case)
+
+        def print_side_effect(*args, **kwargs):  # pylint: disable=unused-argument
+            """
+            Side effect that print output to stdout
+            """
+            print("Output of test3")
+            return True
+
+        test_cases[2].run.side_effect = print_side_effect
+        runner.run(test_list)
+        self.assertTrue(self.report.result_of("test1").passed)
+        self.assertTrue(self.report.result_of("test2").failed)
+        self.assertTrue(self.report.result_of("test3").passed)
+        self.assertEqual(self.report.result_of("test3").output, "Output of test3\n")
+
+    @unittest.skipIf(_get_fork_context() is None, "Requires forking worker processes")
+    def test_process_runner_fails_tests_of_dead_worker(self):
+        runner = TestRunner(self.report, self.output_path, num_threads=1, runner="process")
+        test_case = self.create_test("test1", True)
+        test_case.run.side_effect = lambda *args, **kwargs: os._exit(1)  # pylint: disable=protected-access
+        test_list = TestList()
+        test_list.add_test(test_case)
+        test_list.add_test(self.create_test("test2", True))
+        runner.run(test_list)
+        self.assertTrue(self.report.result_of("test1").failed)
+        self.assertTrue(self.report.result_of("test2").failed)
+
+    @unittest.skipIf(_get_fork_context() is None, "Requires forking worker processes")
+    def test_process_runner_fails_test_of_worker_dying_before_starting_it(self):
+        runner = TestRunner(self.report, self.output_path, num_threads=2, runner="process")
+        test_list = TestList()
+        for name in ["test1", "test2", "test3"]:
+            test_list.add_test(self.create_test(name, True))
+        run_process_worker = TestRunner._run_process_worker  # pylint: disable=protected-access
+
+        def die_when_handed_test1(self, test_suites, task_queue, *args):
+            """
+            Die after receiving test1 from the task queue before reporting its start
+            """
+            idx = task_queue.get()
+            if idx is not None and test_suites[idx].name == "test1":
+                os._exit(1)  # pylint: disable=protected-access
+            task_queue.put(idx)
+            run_process_worker(self, test_suites, task_queue, *args)
+
+        with mock.patch("vunit.test_runner.TestRunner._run_process_worker", new=die_when_handed_test1):
+            runner.run(test_list)
+
+        self.assertTrue(self.report.result_of("test1").failed)
+        self.assertTrue(self.report.result_of("test2").passed)
+        self.assertTrue(self.report.result_of("test3").passed)
+
+    def test_scheduler_keeps_list_order_without_expected_runtimes(self):
+        scheduler = TestScheduler(["a", "b", "c"])
+        self.assertEqual(list(scheduler), ["a", "b", "c"])
+
+        scheduler = TestScheduler(["a", "b", "c"], [None, None, None])
+        self.assertEqual(list(scheduler), ["a", "b", "c"])
+
+        scheduler = TestScheduler(["a", "b", "c", "d"], [1.0, None, 2.0, 1.0])
+        self.assertEqual(list(scheduler), ["b", "c", "a", "d"])
+
+    def test_scheduler_wait_for_finish_is_woken_up_by_last_test_done(self):
+        scheduler = TestScheduler(["a", "b"])
+        self.assertEqual(list(scheduler), ["a", "b"])
+        scheduler.test_done("a")
+        self.assertFalse(scheduler.is_finished())
+
+        thread = threading.Timer(0.01, scheduler.test_done, args=("b",))
+        thread.start()
+        start = get_time()
+        scheduler.wait_for_finish()
+        thread.join()
+        self.assertTrue(scheduler.is_finished())
+        self.assertLess(get_time() - start, 0.5)
+
+    def test_scheduler_hands_out_tests_fitting_into_free_resources(self):
+        scheduler = TestScheduler(["heavy", "light1", "light2", "huge"],
+                                  required_resources=[{"memory": 12, "licenses": 2},
+                                                      {"memory": 1},
+                                                      {"memory": 1, "cores": 4},
+                                                      {"memory": 100}],
+                                  capacities={"memory": 13, "licenses": 2})
+        self.assertEqual(scheduler.try_next(), "heavy")
+        self.assertEqual(scheduler.try_next(), "light1")
+        self.assertEqual(scheduler.try_next(), None)
+
+        scheduler.test_done("light1")
+        self.assertEqual(scheduler.try_next(), "light2")
+        scheduler.test_done("heavy")
+        self.assertEqual(scheduler.try_next(), None)
+
+        # Requires more than the capacity and waits until it can run alone
+        thread = threading.Timer(0.01, scheduler.test_done, args=("light2",))
+        thread.start()
+        self.assertEqual(scheduler.next(), "huge")
+        thread.join()
+        self.assertRaises(StopIteration, scheduler.try_next)
+
+    def test_runner_does_not_exceed_resource_capacities(self):
+        lock = threading.Lock()
+        in_use = [0]
+        max_in_use = [0]
+
+        def run_side_effect(*args, **kwargs):  # pylint: disable=unused-argument
+            """
+            Record the maximum memory in use by concurrently running tests
+            """
+            with lock:
+                in_use[0] += 4
+                max_in_use[0] = max(max_in_use[0], in_use[0])
+            time.sleep(0.02)
+            with lock:
+                in_use[0] -= 4
+            return True
+
+        test_list = TestList()
+        for idx in range(6):
+            test_case = self.create_test("test%i" % idx, True)
+            test_case.run.side_effect = run_side_effect
+            test_case.config.resources = {"memory": 4}
+            test_list.add_test(test_case)
+
+        runner = TestRunner(self.report, self.output_path, num_threads=4, resource_capacities={"memory": 8})
+        runner.run(test_list)
+        self.assertTrue(self.report.all_ok())
+        self.assertEqual(self.report.num_tests(), 6)
+        self.assertEqual(max_in_use[0], 8)
+
+    def test_kills_test_suite_exceeding_its_timeout(self):
+        class SlowTestSuite(object):
+            """
+            A test suite where the second test hangs in the simulator
+            """
+            name = "slow"
+            test_cases = ["slow.test1", "slow.test2", "slow.test3"]
+
+            @staticmethod
+            def run(output_path):  # pylint: disable=unused-argument
+                """
+                Hang in a simulator process until killed
+                """
+                try:
+                    Process([sys.executable, "-c", "import time; time.sleep(60)"]).consume_output()
+                except Process.NonZeroExitCode:
+                    pass
+                # The partial results of a simulation where test2 was started but not done
+                return {"slow.test1": PASSED, "slow.test2": FAILED, "slow.test3": SKIPPED}
+
+        test_list = TestList()
+        test_list.add_suite(SlowTestSuite())
+        test_list.add_test(self.create_test("fast", True))
+
+        runner = TestRunner(self.report, self.output_path, timeouts={"slow": 0.1, "fast": 0.1})
+        start = get_time()
+        runner.run(test_list)
+        self.assertLess(get_time() - start, 10.0)
+        self.assertTrue(self.report.result_of("slow.test1").passed)
+        self.assertTrue(self.report.result_of("slow.test2").failed)
+        self.assertTrue(self.report.result_of("slow.test2").timed_out)
+        self.assertTrue(self.report.result_of("slow.test3").skipped)
+        self.assertTrue(self.report.result_of("fast").passed)
+        self.assertIn("after its timeout of 0.1 seconds", self.report.result_of("slow.test1").output)
+
+    def test_timeout_firing_after_test_suite_completed(self):
+        class LateTimer(object):
+            """
+            A timer which fires after the test suite has completed when being cancelled
+            """
+            def __init__(self, interval, function):  # pylint: disable=unused-argument
+                self._function = function
+                self.daemon = False
+
+            def start(self):
+                pass
+
+            def cancel(self):
+                self._function()
+
+        test_list = TestList()
+        test_list.add_test(self.create_test("test", False))
+        runner = TestRunner(self.report, self.output_path, timeouts={"test": 10.0})
+        with mock.patch("vunit.test_runner.threading.Timer", new=LateTimer):
+            runner.run(test_list)
+        self.assertTrue(self.report.result_of("test").failed)
+        self.assertFalse(self.report.result_of("test").timed_out)
+
+    def test_select_shard(self):
+        test_suites = [mock.Mock() for _ in range(6)]
+        for idx, test_suite in enumerate(test_suites):
+            test_suite.name = "test%i" % idx
+        runtimes = [10.0, 1.0, 1.0, 4.0, None, 3.0]
+
+        shards = [select_shard(test_suites, runtimes, shard, 3) for shard in range(1, 4)]
+        self.assertEqual([names(shard) for shard in shards],
+                         [["test0"], ["test1", "test2", "test3"], ["test4", "test5"]])
+        self.assertEqual([names(select_shard(test_suites, runtimes, shard, 3)) for shard in range(1, 4)],
+                         [names(shard) for shard in shards])
+        self.assertEqual(names(select_shard(test_suites, runtimes, 1, 1)), names(test_suites))
+        self.assertEqual(names(select_shard(test_suites, [None] * 6, 1, 2)), ["test0", "test2", "test4"])
+
+    def test_predict_makespan(self):
+        self.assertEqual(predict_makespan([], 2), 0.0)
+        self.assertEqual(predict_makespan([1.0, 2.0, 3.0], 1), 6.0)
+        self.assertEqual(predict_makespan([1.0, 2.0, 3.0], 2), 3.0)
+        self.assertEqual(predict_makespan([4.0, 3.0, 3.0, 2.0], 2), 6.0)
+
     def create_test(self, name, passed):
         """
         Utility function to create a mocked test with name
@@ -92,9 +403,14 @@ class TestTestRunner(unittest.TestCase):
         return test_case
 
 
+def names(test_suites):
+    return [test_suite.name for test_suite in test_suites]
+
+
 class TestCaseMockSpec(object):  # pylint: disable=no-init
     """
     A test case mock specification class
     """
     name = None
     run = None
+    config = None
@@ -13,7 +13,7 @@ from __future__ import print_function
 import unittest
 from string import Template
 import os
-from os.path import join, dirname, basename, exists, abspath
+from os.path import join, dirname, basename, exists, abspath, isdir
 import re
 from re import MULTILINE
 from shutil import rmtree
@@ -667,6 +667,14 @@ endmodule
         lib.add_source_file(tb_file_name)
         self.assertRaises(ValueError, lib.test_bench("tb_top").scan_tests_from_file, "missing.sv")
 
+    def test_database_format_is_selectable(self):
+        database_path = join(self._output_path, "project_database")
+        for database_format in ["directory", "log", "directory"]:
+            with mock.patch("vunit.ui.SimulatorFactory", new=MockSimulatorFactory):
+                VUnit.from_argv(argv=["--output-path=%s" % self._output_path, "--database", database_format],
+                                compile_builtins=False)
+            self.assertEqual(isdir(database_path), database_format == "directory")
+
     def test_can_list_tests_without_simulator(self):
         with set_env(PATH=""):
             ui = self._create_ui("--list")
@@ -0,0 +1,154 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014-2017, Lars Asplund lars.anders.asplund@gmail.com
+
+"""
+Test the reuse of preprocessing and parse results between runs of the VUnit public interface class
+"""
+
+import unittest
+from string import Template
+import os
+from os.path import join, dirname, basename, exists
+from shutil import rmtree
+from vunit.ui import VUnit
+from vunit.test.mock_2or3 import mock
+from vunit.ostools import renew_path
+from vunit.test.unit.test_ui import MockSimulatorFactory, VUnitfier
+
+
+class TestUiPreprocessing(unittest.TestCase):
+    """
+    Testing the reuse of preprocessing and parse results between runs
+    """
+    def setUp(self):
+        self.tmp_path = join(dirname(__file__), "test_ui_preprocessing_tmp")
+        renew_path(self.tmp_path)
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_path)
+
+        self._output_path = join(self.tmp_path, 'output')
+        self._preprocessed_path = join(self._output_path, "preprocessed")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        if exists(self.tmp_path):
+            rmtree(self.tmp_path)
+
+    def test_preprocessed_files_are_reused_between_runs(self):
+        file_name = self.create_entity_file()
+        pp_file_name = join(self._preprocessed_path, 'lib', basename(file_name))
+
+        def add_source_files():
+            """
+            Add the file with location preprocessing in a new run without clean
+            """
+            with mock.patch("vunit.ui.SimulatorFactory", new=MockSimulatorFactory):
+                ui = VUnit.from_argv(argv=["--output-path=%s" % self._output_path], compile_builtins=False)
+            ui.add_library('lib')
+            ui.enable_location_preprocessing()
+            with mock.patch("vunit.ui.LocationPreprocessor.run", autospec=True,
+                            side_effect=lambda _, code, file_name: code + "-- preprocessed\n") as run:
+                ui.add_source_files(file_name, 'lib')
+            return run.call_count
+
+        self.assertEqual(add_source_files(), 1)
+        mtime = os.stat(pp_file_name).st_mtime
+        self.assertEqual(add_source_files(), 0)
+        self.assertEqual(os.stat(pp_file_name).st_mtime, mtime)
+
+        with open(file_name, "a") as fptr:
+            fptr.write("-- modified\n")
+        self.assertEqual(add_source_files(), 1)
+        with open(pp_file_name) as fread:
+            self.assertTrue(fread.read().endswith("-- modified\n-- preprocessed\n"))
+
+    def test_preprocessed_files_without_cache_key_are_not_reused(self):
+        file_name = self.create_entity_file()
+
+        def add_source_files(*preprocessors):
+            """
+            Add the file with location preprocessing and the preprocessors in a new run without clean
+            """
+            with mock.patch("vunit.ui.SimulatorFactory", new=MockSimulatorFactory):
+                ui = VUnit.from_argv(argv=["--output-path=%s" % self._output_path], compile_builtins=False)
+            ui.add_library('lib')
+            for preprocessor in preprocessors:
+                ui.add_preprocessor(preprocessor)
+            ui.enable_location_preprocessing()
+            with mock.patch("vunit.ui.LocationPreprocessor.run", autospec=True,
+                            side_effect=lambda _, code, file_name: code) as run:
+                ui.add_source_files(file_name, 'lib')
+            return run.call_count
+
+        self.assertEqual(add_source_files(), 1)
+        self.assertEqual(add_source_files(VUnitfier()), 1)
+        self.assertEqual(add_source_files(VUnitfier()), 1)
+        self.assertEqual(add_source_files(), 1)
+        self.assertEqual(add_source_files(), 0)
+
+    def test_runs_sharing_the_output_path_keep_each_others_parse_results(self):
+        file_names = [self.create_entity_file(idx) for idx in range(2)]
+
+        def create_ui():
+            """
+            Create a run using the output path without clean as distributed workers do
+            """
+            with mock.patch("vunit.ui.SimulatorFactory", new=MockSimulatorFactory):
+                ui = VUnit.from_argv(argv=["--output-path=%s" % self._output_path], compile_builtins=False)
+            ui.add_library('lib')
+            return ui
+
+        uis = [create_ui() for _ in file_names]
+        for ui, file_name in zip(uis, file_names):
+            ui.add_source_files(file_name, 'lib')
+
+        ui = create_ui()
+        with mock.patch("vunit.vhdl_parser.VHDLDesignFile.parse", autospec=True) as parse:
+            ui.add_source_files(file_names, 'lib')
+            self.assertEqual(parse.call_count, 0)
+
+    def _run_main(self, ui, code=0):
+        """
+        Run ui.main and expect exit code
+        """
+        try:
+            ui.main()
+        except SystemExit as exc:
+            self.assertEqual(exc.code, code)
+
+    def create_entity_file(self, idx=0, file_suffix='.vhd'):
+        """
+        Create and a temporary file containing the same source code
+        but with different entity names depending on the index
+        """
+        source = Template("""
+library vunit_lib;
+context vunit_lib.vunit_context;
+
+entity $entity is
+end entity;
+
+architecture arch of $entity is
+begin
+    log("Hello World");
+    check_relation(1 /= 2);
+    report "Here I am!";
+end architecture;
+""")
+
+        entity_name = "ent%i" % idx
+        file_name = entity_name + file_suffix
+        self.create_file(file_name,
+                         source.substitute(entity=entity_name))
+        return file_name
+
+    @staticmethod
+    def create_file(file_name, contents=""):
+        """
+        Creata file in the temporary path with given contents
+        """
+        with open(file_name, "w") as fptr:
+            fptr.write(contents)
@@ -0,0 +1,231 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014-2017, Lars Asplund lars.anders.asplund@gmail.com
+
+"""
+Test the selection of what to compile and run by the VUnit public interface class
+"""
+
+import unittest
+import os
+import re
+from os.path import join, dirname, basename, exists
+from shutil import rmtree
+from vunit.ui import VUnit
+from vunit.test.mock_2or3 import mock
+from vunit.ostools import renew_path
+from vunit.test.unit.test_ui import MockSimulatorFactory
+
+
+class TestUiTestSelection(unittest.TestCase):
+    """
+    Testing the selection of what to compile and run
+    """
+    def setUp(self):
+        self.tmp_path = join(dirname(__file__), "test_ui_test_selection_tmp")
+        renew_path(self.tmp_path)
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_path)
+
+        self._output_path = join(self.tmp_path, 'output')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        if exists(self.tmp_path):
+            rmtree(self.tmp_path)
+
+    def test_shard_runs_and_compiles_only_selected_test_benches(self):
+        file_names = [self.create_test_bench_file(name) for name in ["tb_a", "tb_b"]]
+
+        for shard, expected in [("1/2", "tb_a"), ("2/2", "tb_b")]:
+            ui, simif = self._create_ui_with_test_benches(file_names, "--clean", "--shard", shard)
+            self._run_main(ui, 1)
+            self.assertEqual(compiled_target_files(simif), [expected + ".vhd"])
+            self.assertEqual(simulated_test_suites(simif), ["lib.%s.all" % expected])
+
+    def test_compiles_only_what_selected_test_benches_depend_on(self):
+        file_names = [self.create_test_bench_file(name) for name in ["tb_a", "tb_b"]]
+
+        for args, expected in [(["lib.tb_a.*"], ["tb_a.vhd"]),
+                               (["lib.tb_a.*", "--compile-all"], None)]:
+            ui, simif = self._create_ui_with_test_benches(file_names, "--clean", *args)
+            self._run_main(ui, 1)
+            self.assertEqual(compiled_target_files(simif), expected)
+            self.assertEqual(simulated_test_suites(simif), ["lib.tb_a.all"])
+
+    def test_skip_unchanged(self):
+        file_names = [self.create_test_bench_file("tb_a")]
+
+        def simulate_side_effect(output_path, *args, **kwargs):  # pylint: disable=unused-argument
+            self.create_file(join(dirname(output_path), "vunit_results"), "test_suite_done\n")
+            return True
+
+        def run(*args):
+            """
+            Run the test bench returning the names of the simulated test suites
+            """
+            ui, simif = self._create_ui_with_test_benches(file_names, *args)
+            simif.simulate.side_effect = simulate_side_effect
+            self._run_main(ui)
+            return simulated_test_suites(simif)
+
+        self.assertEqual(run("--skip-unchanged"), ["lib.tb_a.all"])
+        self.assertEqual(run("--skip-unchanged"), [])
+        self.assertEqual(run(), ["lib.tb_a.all"])
+
+        self.create_test_bench_file("tb_a", "  -- Changed")
+        self.assertEqual(run("--skip-unchanged"), ["lib.tb_a.all"])
+
+    def test_prestarts_simulations_only_for_test_suites_to_run(self):
+        file_names = [self.create_test_bench_file(name) for name in ["tb_a", "tb_b"]]
+
+        def simulate_side_effect(output_path, *args, **kwargs):  # pylint: disable=unused-argument
+            self.create_file(join(dirname(output_path), "vunit_results"), "test_suite_done\n")
+            return True
+
+        def run():
+            """
+            Run the test benches returning the number of prestarted simulations
+            """
+            ui, simif = self._create_ui_with_test_benches(file_names, "--skip-unchanged", "-p", "4")
+            simif.simulate.side_effect = simulate_side_effect
+            self._run_main(ui)
+            return simif._prestart_simulations.call_args[0][0]  # pylint: disable=protected-access
+
+        self.assertEqual(run(), 2)
+        self.assertEqual(run(), 0)
+        self.create_test_bench_file("tb_b", "  -- Changed")
+        self.assertEqual(run(), 1)
+
+    @mock.patch("vunit.ui.TestRunner", autospec=True)
+    @mock.patch("vunit.ui.Worker", autospec=True)
+    def test_worker_sharing_the_output_path_prestarts_simulations_without_compiling(self, worker, _):
+        worker.return_value.shares_output_path = True
+        file_names = [self.create_test_bench_file(name) for name in ["tb_a", "tb_b"]]
+        ui, simif = self._create_ui_with_test_benches(file_names, "--clean", "--worker", "localhost:1234", "-p", "4")
+        self._run_main(ui)
+        simif._prestart_simulations.assert_called_once_with(  # pylint: disable=protected-access
+            2, compiled=True)
+        self.assertFalse(simif.compile_project.called)
+
+    def test_rerun_failed(self):
+        file_names = [self.create_test_bench_file("tb_a", """\
+  -- vunit_pragma run_all_in_same_sim
+  main : process
+  begin
+    test_runner_setup(runner, runner_cfg);
+    while test_suite loop
+      if run("test1") then
+      elsif run("test2") then
+      elsif run("test3") then
+      end if;
+    end loop;
+    test_runner_cleanup(runner);
+  end process;"""),
+                      self.create_test_bench_file("tb_b")]
+
+        def run(failed, *args):
+            """
+            Run the test benches failing the given test and return the simulated tests and compiled files
+            """
+            def simulate_side_effect(output_path, test_suite_name, config,
+                                     elaborate_only):  # pylint: disable=unused-argument
+                """
+                Pass the tests of the test suite up to the failing test
+                """
+                enabled_test_cases = re.search(r"enabled_test_cases : ((?:[^,]|,,)*)",
+                                               config.generics["runner_cfg"]).group(1).split(",,")
+                lines = []
+                for test_name in filter(None, enabled_test_cases):
+                    lines.append("test_start:%s\n" % test_name)
+                    if "%s.%s" % (test_suite_name, test_name) == failed:
+                        break
+                else:
+                    lines.append("test_suite_done\n")
+                self.create_file(join(dirname(output_path), "vunit_results"), "".join(lines))
+                return True
+
+            ui, simif = self._create_ui_with_test_benches(file_names, *args)
+            simif.simulate.side_effect = simulate_side_effect
+            self._run_main(ui, 0 if failed is None else 1)
+            return simulated_test_suites(simif), compiled_target_files(simif)
+
+        self.assertEqual(run("lib.tb_a.test2"),
+                         (["lib.tb_a", "lib.tb_b.all"], ["tb_a.vhd", "tb_b.vhd"]))
+        self.assertEqual(run("lib.tb_a.test3", "--rerun-failed"),
+                         (["lib.tb_a"], ["tb_a.vhd"]))
+        self.assertEqual(run(None, "--rerun-failed"),
+                         (["lib.tb_a"], ["tb_a.vhd"]))
+        self.assertEqual(run(None, "--rerun-failed"),
+                         ([], []))
+
+    def _create_ui_with_test_benches(self, file_names, *args):
+        """
+        Create an instance of the VUnit public interface class with the test bench files added to
+        library lib, returns the instance and its mocked simulator interface.
+        The database is kept between runs unless args contains --clean
+        """
+        with mock.patch("vunit.ui.SimulatorFactory", new=MockSimulatorFactory):
+            ui = VUnit.from_argv(argv=["--output-path=%s" % self._output_path] + list(args),
+                                 compile_builtins=False)
+        lib = ui.add_library("lib")
+        for file_name in file_names:
+            lib.add_source_file(file_name)
+        simif = ui._simulator_factory.mocksim  # pylint: disable=protected-access
+        simif.name = "mocksim"
+        simif.get_identity.return_value = "mocksim"
+        return ui, simif
+
+    def create_test_bench_file(self, name, body=""):
+        """
+        Create a file containing a test bench entity with the given architecture body
+        """
+        file_name = name + ".vhd"
+        self.create_file(file_name, """
+entity %s is
+  generic (runner_cfg : string);
+end entity;
+
+architecture a of %s is
+begin
+%s
+end architecture;
+""" % (name, name, body))
+        return file_name
+
+    def _run_main(self, ui, code=0):
+        """
+        Run ui.main and expect exit code
+        """
+        try:
+            ui.main()
+        except SystemExit as exc:
+            self.assertEqual(exc.code, code)
+
+    @staticmethod
+    def create_file(file_name, contents=""):
+        """
+        Creata file in the temporary path with given contents
+        """
+        with open(file_name, "w") as fptr:
+            fptr.write(contents)
+
+
+def simulated_test_suites(simif):
+    """
+    Return the names of the test suites simulated by the mocked simulator interface
+    """
+    return [call[0][1] for call in simif.simulate.call_args_list]
+
+
+def compiled_target_files(simif):
+    """
+    Return the base names of the target files compiled by the mocked simulator interface
+    or None when the whole project was compiled
+    """
+    target_files = simif.compile_project.call_args[1]["target_files"]
+    if target_files is None:
+        return None
+    return [basename(source_file.name) for source_file in target_files]
@@ -78,6 +78,13 @@ class TestSuiteWrapper(object):
     def name(self):
         return self._test_case.name
 
+    @property
+    def config(self):
+        """
+        The configuration of the test case
+        """
+        return self._test_case.config
+
     def keep_matches(self, test_filter):
         return test_filter(self._test_case.name)
 
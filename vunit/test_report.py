@@ -27,6 +27,7 @@ class TestReport(object):
         self._test_names_in_order = []
         self._printer = printer
         self._real_total_time = 0.0
+        self._predicted_total_time = None
         self._expected_num_tests = 0
 
     def set_real_total_time(self, real_total_time):
@@ -35,6 +36,12 @@ class TestReport(object):
         """
         self._real_total_time = real_total_time
 
+    def set_predicted_total_time(self, predicted_total_time):
+        """
+        Set the real total execution time predicted from previous runs
+        """
+        self._predicted_total_time = predicted_total_time
+
     def set_expected_num_tests(self, expected_num_tests):
         """
         Set the number of tests that we expect to run
@@ -90,10 +97,11 @@ class TestReport(object):
         args.append("F=%i" % len(failed))
         args.append("T=%i" % total_tests)
 
-        self._printer.write(" (%s) %s (%.1f seconds)\n" %
+        self._printer.write(" (%s) %s (%.1f seconds%s)\n" %
                             (" ".join(args),
                              result.name,
-                             result.time))
+                             result.time,
+                             result.time_suffix))
 
     def all_ok(self):
         """
@@ -130,10 +138,15 @@ class TestReport(object):
         n_failed = len(failures)
         n_skipped = len(skipped)
         n_passed = len(passed)
+        n_cached = len([result for result in passed if result.cached])
+        n_timed_out = len([result for result in failures if result.timed_out])
         total = len(all_tests)
 
         self._printer.write("pass", fg='gi')
-        self._printer.write(" %i of %i\n" % (n_passed, total))
+        self._printer.write(" %i of %i" % (n_passed, total))
+        if n_cached > 0:
+            self._printer.write(" (%i cached)" % n_cached)
+        self._printer.write("\n")
 
         if n_skipped > 0:
             self._printer.write("skip", fg='rgi')
@@ -141,12 +154,17 @@ class TestReport(object):
 
         if n_failed > 0:
             self._printer.write("fail", fg='ri')
-            self._printer.write(" %i of %i\n" % (n_failed, total))
+            self._printer.write(" %i of %i" % (n_failed, total))
+            if n_timed_out > 0:
+                self._printer.write(" (%i timed out)" % n_timed_out)
+            self._printer.write("\n")
         self._printer.write("%s\n" % ("=" * (max(max_len + 25, 0))))
 
         total_time = sum((result.time for result in self._test_results.values()))
         self._printer.write("Total time was %.1f seconds\n" % total_time)
         self._printer.write("Elapsed time was %.1f seconds\n" % self._real_total_time)
+        if self._predicted_total_time is not None:
+            self._printer.write("Predicted elapsed time was %.1f seconds\n" % self._predicted_total_time)
 
         self._printer.write("%s\n" % ("=" * (max(max_len + 25, 0))))
 
@@ -221,6 +239,12 @@ class TestStatus(object):
     def __eq__(self, other):
         return isinstance(other, type(self)) and self.name == other.name
 
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._name)
+
     def __repr__(self):
         return "TestStatus(%r)" % self._name
 
@@ -228,6 +252,8 @@ class TestStatus(object):
 PASSED = TestStatus("passed")
 SKIPPED = TestStatus("skipped")
 FAILED = TestStatus("failed")
+# A failure because the test did not finish within its timeout
+TIMED_OUT = TestStatus("timed_out")
 
 
 class TestResult(object):
@@ -235,14 +261,19 @@ class TestResult(object):
     Represents the result of a single test case
     """
 
-    def __init__(self, name, status, time, output_file_name):
+    def __init__(self, name, status, time, output_file_name, cached=False):  # pylint: disable=too-many-arguments
+        """
+        cached -- True when the result was not simulated but taken from a previous run
+        """
         assert status in (PASSED,
                           FAILED,
-                          SKIPPED)
+                          SKIPPED,
+                          TIMED_OUT)
         self.name = name
         self._status = status
         self.time = time
         self._output_file_name = output_file_name
+        self.cached = cached
 
     @property
     def output(self):
@@ -266,7 +297,14 @@ class TestResult(object):
 
     @property
     def failed(self):
-        return self._status == FAILED
+        return self._status == FAILED or self._status == TIMED_OUT
+
+    @property
+    def timed_out(self):
+        """
+        Returns True if the test was killed for exceeding its timeout
+        """
+        return self._status == TIMED_OUT
 
     def print_status(self, printer, padding=0):
         """
@@ -284,7 +322,18 @@ class TestResult(object):
 
         my_padding = max(padding - len(self.name), 0)
 
-        printer.write("%s (%.1f seconds)\n" % (self.name + (" " * my_padding), self.time))
+        printer.write("%s (%.1f seconds%s)\n" % (self.name + (" " * my_padding), self.time, self.time_suffix))
+
+    @property
+    def time_suffix(self):
+        """
+        Return the remark printed after the time
+        """
+        if self.cached:
+            return ", cached"
+        elif self.timed_out:
+            return ", timed out"
+        return ""
 
     def to_xml(self):
         """
@@ -300,7 +349,7 @@ class TestResult(object):
         test.attrib["time"] = "%.1f" % self.time
         if self.failed:
             failure = ElementTree.SubElement(test, "failure")
-            failure.attrib["message"] = "Failed"
+            failure.attrib["message"] = "Timed out" if self.timed_out else "Failed"
         elif self.skipped:
             skipped = ElementTree.SubElement(test, "skipped")
             skipped.attrib["message"] = "Skipped"
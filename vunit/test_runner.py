@@ -12,31 +12,69 @@ Provided functionality to run a suite of test in a robust way
 from __future__ import print_function
 
 import os
+import io
 from os.path import join, exists
 import traceback
 import threading
 import sys
-import time
 import logging
+import heapq
+import multiprocessing
 import vunit.ostools as ostools
-from vunit.test_report import PASSED, FAILED
+from vunit.test_report import PASSED, FAILED, SKIPPED, TIMED_OUT
 from vunit.hashing import hash_string
+
+try:
+    # Python 3
+    from queue import Empty
+except ImportError:
+    # Python 2
+    from Queue import Empty  # pylint: disable=import-error
+
 LOGGER = logging.getLogger(__name__)
 
+STATUS_BY_NAME = dict((status.name, status) for status in (PASSED, FAILED, SKIPPED, TIMED_OUT))
+
 
 class TestRunner(object):  # pylint: disable=too-many-instance-attributes
     """
     Administer the execution of a list of test suites
     """
-    def __init__(self, report, output_path, verbose=False, num_threads=1):
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 report, output_path, verbose=False, num_threads=1, database=None, runner="thread",
+                 coordinator=None, fingerprints=None, resource_capacities=None, timeouts=None):
+        """
+        runner -- Run test suites in worker "thread"s of this process or in worker "process"es
+        coordinator -- A distributed.Coordinator handing out the test suites to remote workers
+        fingerprints -- A mapping from test suite name to a fingerprint of its inputs. When given a test suite
+                        which passed with the same fingerprint before is reported as a cached pass without running it
+        resource_capacities -- A mapping from resource name to the capacity of this host. When given test suites
+                               are only started when the resources required by their configuration are free
+        timeouts -- A mapping from test suite name to the time in seconds after which its simulator processes
+                    are killed and the tests which were not done are reported as timed out
+        """
         self._lock = threading.Lock()
         self._local = threading.local()
         self._report = report
         self._output_path = output_path
         self._verbose = verbose
         self._num_threads = num_threads
+        self._database = database
+        self._runtime_history = {}
+        self._test_results = {}
         self._stdout = sys.stdout
         self._stderr = sys.stderr
+        self._coordinator = coordinator
+        self._fingerprints = fingerprints
+        self._resource_capacities = resource_capacities
+        self._timeouts = timeouts
+
+        assert runner in ("thread", "process")
+        self._process_context = None
+        if runner == "process":
+            self._process_context = _get_fork_context()
+            if self._process_context is None:
+                LOGGER.warning("Worker processes are not supported on this platform, using threads")
 
     def run(self, test_suites):
         """
@@ -61,13 +99,42 @@ class TestRunner(object):  # pylint: disable=too-many-instance-attributes
 
         self._report.set_expected_num_tests(num_tests)
 
-        scheduler = TestScheduler(test_suites)
-
-        threads = []
+        self._runtime_history = self._read_runtime_history()
+        self._test_results = read_test_results(self._database)
+        test_suites = self._add_cached_results(test_suites, num_tests)
+        expected_runtimes = [self._expected_runtime(test_suite) for test_suite in test_suites]
+        if None not in expected_runtimes:
+            self._report.set_predicted_total_time(predict_makespan(expected_runtimes, self._num_threads))
 
         # Disable continuous output in parallel mode
         write_stdout = self._verbose and self._num_threads == 1
 
+        try:
+            if self._coordinator is not None:
+                self._run_coordinator(list(TestScheduler(test_suites, expected_runtimes)), num_tests)
+            elif self._process_context is not None:
+                self._run_processes(test_suites, self._create_scheduler(test_suites, expected_runtimes),
+                                    write_stdout, num_tests)
+            else:
+                self._run_threads(self._create_scheduler(test_suites, expected_runtimes), write_stdout, num_tests)
+        finally:
+            self._write_history()
+
+    def _create_scheduler(self, test_suites, expected_runtimes):
+        """
+        Create the scheduler handing out the test suites to the local worker threads or processes
+        """
+        required_resources = None
+        if self._resource_capacities:
+            required_resources = [test_suite.config.resources for test_suite in test_suites]
+        return TestScheduler(test_suites, expected_runtimes, required_resources, self._resource_capacities)
+
+    def _run_threads(self, scheduler, write_stdout, num_tests):
+        """
+        Run the test suites in worker threads
+        """
+        threads = []
+
         try:
             sys.stdout = ThreadLocalOutput(self._local, self._stdout)
             sys.stderr = ThreadLocalOutput(self._local, self._stdout)
@@ -97,6 +164,24 @@ class TestRunner(object):  # pylint: disable=too-many-instance-attributes
             sys.stderr = self._stderr
             LOGGER.debug("TestRunner: Leaving")
 
+    def _read_runtime_history(self):
+        """
+        Read the test runtimes of previous runs from the database
+        """
+        return read_runtime_history(self._database)
+
+    def _write_history(self):
+        """
+        Write the test runtimes and results of this and previous runs to the database
+        """
+        if self._database is None:
+            return
+        self._database[RUNTIME_HISTORY_KEY] = self._runtime_history
+        self._database[TEST_RESULTS_KEY] = self._test_results
+
+    def _expected_runtime(self, test_suite):
+        return expected_runtime(self._runtime_history, test_suite)
+
     def _run_thread(self, write_stdout, scheduler, num_tests, is_main):
         """
         Run worker thread
@@ -126,28 +211,45 @@ class TestRunner(object):  # pylint: disable=too-many-instance-attributes
 
             finally:
                 if test_suite is not None:
-                    scheduler.test_done()
+                    scheduler.test_done(test_suite)
 
     def _run_test_suite(self, test_suite, write_stdout, num_tests):
         """
         Run the actual test suite
         """
+        start_time = ostools.get_time()
+        results, output_file_name = self._run_test_suite_with_output(test_suite, write_stdout)
+        if results is None:
+            # The output could not be created
+            with self._lock:  # pylint: disable=not-context-manager
+                self._add_results(test_suite, self._fail_suite(test_suite), start_time, num_tests, output_file_name)
+            return
+
+        any_not_passed = any(value != PASSED for value in results.values())
+
+        with self._lock:  # pylint: disable=not-context-manager
+            if (not write_stdout) and (any_not_passed or self._verbose):
+                self._print_output(output_file_name)
+            self._add_results(test_suite, results, start_time, num_tests, output_file_name)
+
+    def _run_test_suite_with_output(self, test_suite, write_stdout):
+        """
+        Run the test suite with the output of this thread redirected to the output file
+        Returns the results or None if the output file could not be created and the output file name
+        """
         output_path = create_output_path(self._output_path, test_suite.name)
         output_file_name = join(output_path, "output.txt")
-        start_time = ostools.get_time()
 
         try:
             # If we could not clean output path, fail all tests
             ostools.renew_path(output_path)
-            output_file = open(output_file_name, "w")
+            output_file = _open_output_file(output_file_name)
         except KeyboardInterrupt:
             raise
         except:  # pylint: disable=bare-except
-            results = self._fail_suite(test_suite)
             with self._lock:  # pylint: disable=not-context-manager
                 traceback.print_exc()
-                self._add_results(test_suite, results, start_time, num_tests, output_file_name)
-            return
+            return None, output_file_name
 
         try:
             if write_stdout:
@@ -155,7 +257,7 @@ class TestRunner(object):  # pylint: disable=too-many-instance-attributes
             else:
                 self._local.output = TeeToFile([output_file])
 
-            results = test_suite.run(output_path)
+            results = self._run_with_timeout(test_suite, output_path)
         except KeyboardInterrupt:
             raise
         except:  # pylint: disable=bare-except
@@ -166,12 +268,286 @@ class TestRunner(object):  # pylint: disable=too-many-instance-attributes
             output_file.flush()
             output_file.close()
 
+        return results, output_file_name
+
+    def _run_with_timeout(self, test_suite, output_path):
+        """
+        Run the test suite killing the process groups of the simulator processes it started when it
+        exceeds its timeout. The failed tests of a killed test suite are timed out, tests which passed
+        before the timeout according to the partial results keep their status.
+        """
+        timeout = None if self._timeouts is None else self._timeouts.get(test_suite.name)
+        if timeout is None:
+            return test_suite.run(output_path)
+
+        watch = ostools.ProcessWatch()
+        timer = threading.Timer(timeout, watch.kill)
+        timer.daemon = True
+        completed_in_time = False
+        start_time = ostools.get_time()
+        with watch:
+            timer.start()
+            try:
+                results = test_suite.run(output_path)
+                # The timer may fire after the test suite has completed but before it is cancelled
+                completed_in_time = ostools.get_time() - start_time < timeout
+            except Exception:  # pylint: disable=broad-except
+                if not watch.killed:
+                    raise
+                traceback.print_exc()
+                results = self._fail_suite(test_suite)
+            finally:
+                # Stop watching before cancelling such that a late timer does not kill anything
+                watch.stop()
+                timer.cancel()
+
+        if completed_in_time or not watch.killed:
+            return results
+
+        print("Killed the simulation of %s after its timeout of %g seconds" % (test_suite.name, timeout))
+        return dict((test_name, TIMED_OUT if status == FAILED else status)
+                    for test_name, status in results.items())
+
+    def _run_coordinator(self, test_suites, num_tests):
+        """
+        Run the test suites on remote workers handed out by the coordinator
+        """
+        test_suites_by_name = dict((test_suite.name, test_suite) for test_suite in test_suites)
+        start_times = {}
+
+        def on_start(name):
+            start_times[name] = ostools.get_time()
+            if self._verbose:
+                print("Starting %s" % name)
+
+        def on_done(name, results, output):
+            """
+            Add the results of a test suite from a worker writing its output into the output path
+            """
+            test_suite = test_suites_by_name[name]
+            output_path = create_output_path(self._output_path, name)
+            if output is not None:
+                ostools.renew_path(output_path)
+                ostools.write_file(join(output_path, "output.txt"), output)
+
+            if results is None or set(results.keys()) != set(test_suite.test_cases):
+                results = self._fail_suite(test_suite)
+            else:
+                results = dict((test_name, STATUS_BY_NAME[status]) for test_name, status in results.items())
+
+            self._add_process_results(test_suite, results, start_times.pop(name, ostools.get_time()),
+                                      False, num_tests)
+
+        try:
+            self._coordinator.run([test_suite.name for test_suite in test_suites], on_start, on_done)
+        except KeyboardInterrupt:
+            LOGGER.debug("TestRunner: Caught Ctrl-C shutting down")
+            ostools.PROGRAM_STATUS.shutdown()
+            raise
+
+    def run_worker(self, test_suites, worker):
+        """
+        Run the test suites handed out by a distributed coordinator to the worker
+        """
+        test_suites_by_name = dict((test_suite.name, test_suite) for test_suite in test_suites)
+
+        def run_test_suite(name):
+            """
+            Run the test suite returning the results by status name and the output if not shared
+            """
+            if name not in test_suites_by_name:
+                LOGGER.error("Coordinator handed out unknown test suite %s", name)
+                return None, None
+
+            results, output_file_name = self._run_test_suite_with_output(test_suites_by_name[name], False)
+            if results is None:
+                return None, None
+
+            output = None
+            if not worker.shares_output_path:
+                output = ostools.read_file(output_file_name)
+            return dict((test_name, status.name) for test_name, status in results.items()), output
+
+        if not exists(self._output_path):
+            os.makedirs(self._output_path)
+
+        try:
+            sys.stdout = ThreadLocalOutput(self._local, self._stdout)
+            sys.stderr = ThreadLocalOutput(self._local, self._stdout)
+            worker.run(run_test_suite)
+        finally:
+            sys.stdout = self._stdout
+            sys.stderr = self._stderr
+
+    def _run_processes(self,  # pylint: disable=too-many-locals, too-many-arguments
+                       test_suites, scheduler, write_stdout, num_tests):
+        """
+        Run the test suites in worker processes which receive the index of the
+        next test suite to run and send back only the results.
+        The worker processes are forked to inherit the test suites.
+        Test suites are handed out by the scheduler when a worker process is idle.
+        Each worker process has its own task queue such that the test suite of a
+        worker process which dies is known even if it died before starting it.
+        """
+        context = self._process_context
+        result_queue = context.Queue()
+        indices = dict((id(test_suite), idx) for idx, test_suite in enumerate(test_suites))
+
+        workers = []
+        for _ in range(self._num_threads):
+            task_queue = context.Queue()
+            worker = context.Process(target=self._run_process_worker,
+                                     args=(test_suites, task_queue, result_queue, write_stdout))
+            worker.start()
+            workers.append((worker, task_queue))
+
+        # Mapping from worker pid to the index and start time of the test suite handed out to it
+        running = {}
+        done = set()
+
+        try:
+            while len(done) < len(test_suites):
+                self._hand_out_to_processes(scheduler, indices, workers, running)
+
+                try:
+                    message = result_queue.get(timeout=1.0)
+                except Empty:
+                    for idx in self._fail_test_suites_of_dead_workers(test_suites, workers, running, done, num_tests):
+                        scheduler.test_done(test_suites[idx])
+                    continue
+
+                if message[0] == "start":
+                    _, pid, idx, start_time = message
+                    running[pid] = idx, start_time
+                    for test_name in test_suites[idx].test_cases:
+                        print("Starting %s" % test_name)
+                else:
+                    _, pid, idx, results = message
+                    _, start_time = running.pop(pid)
+                    done.add(idx)
+                    scheduler.test_done(test_suites[idx])
+                    self._add_process_results(test_suites[idx], results, start_time, write_stdout, num_tests)
+
+        except KeyboardInterrupt:
+            LOGGER.debug("TestRunner: Caught Ctrl-C shutting down")
+            ostools.PROGRAM_STATUS.shutdown()
+            for worker, _ in workers:
+                worker.terminate()
+            raise
+
+        finally:
+            for _, task_queue in workers:
+                task_queue.put(None)
+            for worker, _ in workers:
+                worker.join()
+            LOGGER.debug("TestRunner: Leaving")
+
+    @staticmethod
+    def _hand_out_to_processes(scheduler, indices, workers, running):
+        """
+        Hand out the test suites which fit into the free resources to the idle worker processes
+        """
+        for worker, task_queue in workers:
+            if worker.pid in running or not worker.is_alive():
+                continue
+
+            try:
+                test_suite = scheduler.try_next()
+            except StopIteration:
+                return
+
+            if test_suite is None:
+                return
+
+            idx = indices[id(test_suite)]
+            running[worker.pid] = idx, ostools.get_time()
+            task_queue.put(idx)
+
+    def _fail_test_suites_of_dead_workers(self,  # pylint: disable=too-many-arguments
+                                          test_suites, workers, running, done, num_tests):
+        """
+        Fail the test suites of worker processes which died while running them
+        and all remaining test suites if there are no worker processes left
+        Returns the indices of the failed test suites which were running
+        """
+        alive_pids = set(worker.pid for worker, _ in workers if worker.is_alive())
+
+        lost = []
+        for pid in list(running.keys()):
+            if pid not in alive_pids:
+                idx, start_time = running.pop(pid)
+                LOGGER.error("Worker process died while running %s", test_suites[idx].name)
+                done.add(idx)
+                lost.append(idx)
+                self._add_results(test_suites[idx], self._fail_suite(test_suites[idx]), start_time, num_tests,
+                                  join(create_output_path(self._output_path, test_suites[idx].name), "output.txt"))
+
+        if not alive_pids:
+            for idx, test_suite in enumerate(test_suites):
+                if idx not in done:
+                    done.add(idx)
+                    self._add_results(test_suite, self._fail_suite(test_suite), ostools.get_time(), num_tests,
+                                      join(create_output_path(self._output_path, test_suite.name), "output.txt"))
+
+        return lost
+
+    def _add_process_results(self,  # pylint: disable=too-many-arguments
+                             test_suite, results, start_time, write_stdout, num_tests):
+        """
+        Add the results of a test suite run in a worker process
+        """
+        output_file_name = join(create_output_path(self._output_path, test_suite.name), "output.txt")
         any_not_passed = any(value != PASSED for value in results.values())
+        if (not write_stdout) and (any_not_passed or self._verbose) and exists(output_file_name):
+            self._print_output(output_file_name)
+        self._add_results(test_suite, results, start_time, num_tests, output_file_name)
 
-        with self._lock:  # pylint: disable=not-context-manager
-            if (not write_stdout) and (any_not_passed or self._verbose):
-                self._print_output(output_file_name)
-            self._add_results(test_suite, results, start_time, num_tests, output_file_name)
+    def _run_process_worker(self, test_suites, task_queue, result_queue, write_stdout):
+        """
+        Run test suites within a worker process until there are no more test suites
+        """
+        pid = os.getpid()
+        try:
+            while True:
+                idx = task_queue.get()
+                if idx is None:
+                    return
+                result_queue.put(("start", pid, idx, ostools.get_time()))
+                results = self._run_test_suite_in_process(test_suites[idx], write_stdout)
+                result_queue.put(("done", pid, idx, results))
+        except KeyboardInterrupt:
+            pass
+
+    def _run_test_suite_in_process(self, test_suite, write_stdout):
+        """
+        Run the test suite writing all output directly to the output file and return the results
+        """
+        output_path = create_output_path(self._output_path, test_suite.name)
+        output_file_name = join(output_path, "output.txt")
+
+        try:
+            # If we could not clean output path, fail all tests
+            ostools.renew_path(output_path)
+            output_file = _open_output_file(output_file_name)
+        except Exception:  # pylint: disable=broad-except
+            traceback.print_exc()
+            return self._fail_suite(test_suite)
+
+        try:
+            if write_stdout:
+                sys.stdout = sys.stderr = TeeToFile([self._stdout, output_file])
+            else:
+                sys.stdout = sys.stderr = output_file
+
+            return self._run_with_timeout(test_suite, output_path)
+        except Exception:  # pylint: disable=broad-except
+            traceback.print_exc()
+            return self._fail_suite(test_suite)
+        finally:
+            sys.stdout = self._stdout
+            sys.stderr = self._stderr
+            output_file.flush()
+            output_file.close()
 
     def _create_test_mapping_file(self, test_suites):
         """
@@ -217,6 +593,8 @@ class TestRunner(object):  # pylint: disable=too-many-instance-attributes
 
         for test_name in test_suite.test_cases:
             status = results[test_name]
+            self._runtime_history[test_name] = time_per_test
+            self._test_results[test_name] = status.name
             self._report.add_result(test_name,
                                     status,
                                     time_per_test,
@@ -224,6 +602,37 @@ class TestRunner(object):  # pylint: disable=too-many-instance-attributes
             self._report.print_latest_status(total_tests=num_tests)
         print()
 
+        if self._database is not None:
+            all_passed = all(results[test_name] == PASSED for test_name in test_suite.test_cases)
+            if not all_passed:
+                # Also cleared without fingerprints such that a stale pass is never reported
+                self._database[_passed_fingerprint_key(test_suite)] = None
+            elif self._fingerprints is not None:
+                self._database[_passed_fingerprint_key(test_suite)] = self._fingerprints.get(test_suite.name)
+
+    def _add_cached_results(self, test_suites, num_tests):
+        """
+        Add cached passed results of the test suites which have passed before with the same fingerprint
+        Returns the test suites which need to be run
+        """
+        if self._fingerprints is None or self._database is None:
+            return test_suites
+
+        remaining = []
+        for test_suite in test_suites:
+            if not passed_with_same_fingerprint(self._database, test_suite, self._fingerprints):
+                remaining.append(test_suite)
+                continue
+
+            output_file_name = join(create_output_path(self._output_path, test_suite.name), "output.txt")
+            for test_name in test_suite.test_cases:
+                self._test_results[test_name] = PASSED.name
+                self._report.add_result(test_name, PASSED, 0.0, output_file_name, cached=True)
+                self._report.print_latest_status(total_tests=num_tests)
+            print()
+
+        return remaining
+
     @staticmethod
     def _fail_suite(test_suite):
         """ Return failure for all tests in suite """
@@ -233,6 +642,16 @@ class TestRunner(object):  # pylint: disable=too-many-instance-attributes
         return results
 
 
+def _open_output_file(file_name):
+    """
+    Open the output file of a test suite for writing
+    """
+    if sys.version_info.major == 2:
+        # For Python 2 the output is written as str
+        return open(file_name, "w")
+    return io.open(file_name, "w", encoding="utf-8")
+
+
 class TeeToFile(object):
     """
     Provide a write method which writes to multiple files
@@ -272,17 +691,66 @@ class ThreadLocalOutput(object):
             self._stdout.flush()
 
 
-class TestScheduler(object):
+class TestScheduler(object):  # pylint: disable=too-many-instance-attributes
     """
     Schedule tests to different treads
+
+    Tests with an expected runtime are handed out longest first to
+    minimize the total runtime. Tests without an expected runtime are
+    handed out first in list order.
+
+    When tests require resources with a limited capacity the first test
+    in order which fits into the free capacities is handed out. Tests
+    which do not fit wait until enough running tests are done.
     """
 
-    def __init__(self, tests):
+    def __init__(self, tests, expected_runtimes=None, required_resources=None, capacities=None):
+        """
+        required_resources -- A dict with the required amount of each resource for each test
+        capacities -- A dict with the capacity of each resource, resources without a capacity are not limited
+        """
         self._lock = threading.Lock()
-        self._tests = tests
-        self._idx = 0
+        self._condition = threading.Condition(self._lock)
+        self._tests = list(tests)
+        self._pending = self._sort_tests(range(len(self._tests)), expected_runtimes)
+        self._capacities = {} if capacities is None else capacities
+        self._required = [self._limit_to_capacities(self._tests[idx], self._capacities,
+                                                    {} if required_resources is None else required_resources[idx])
+                          for idx in range(len(self._tests))]
+        self._in_use = dict((name, 0) for name in self._capacities)
+        self._running = []
         self._num_done = 0
 
+    @staticmethod
+    def _limit_to_capacities(test, capacities, required):
+        """
+        Return the required amount of the limited resources where a test requiring more
+        than the capacity of a resource requires the entire capacity and runs alone
+        """
+        limited = {}
+        for name, amount in required.items():
+            if name not in capacities:
+                continue
+            if amount > capacities[name]:
+                LOGGER.warning("%s requires %g %s which exceeds the capacity of %g, running it alone",
+                               getattr(test, "name", test), amount, name, capacities[name])
+                amount = capacities[name]
+            limited[name] = amount
+        return limited
+
+    @staticmethod
+    def _sort_tests(tests, expected_runtimes):
+        """
+        Sort tests by descending expected runtime with unknown tests first
+        """
+        if expected_runtimes is None:
+            return list(tests)
+
+        unknown = [test for test, runtime in zip(tests, expected_runtimes) if runtime is None]
+        known = [(runtime, test) for test, runtime in zip(tests, expected_runtimes) if runtime is not None]
+        known = [test for _, test in sorted(known, key=lambda item: item[0], reverse=True)]
+        return unknown + known
+
     def __iter__(self):
         return self
 
@@ -290,27 +758,60 @@ class TestScheduler(object):
         """
         Iterator in Python 3
         """
-        return self.__next__()
+        return self.next()
 
     def next(self):
         """
         Iterator in Python 2
+
+        Blocks until the resources of a test are available
+        """
+        with self._lock:  # pylint: disable=not-context-manager
+            while True:
+                ostools.PROGRAM_STATUS.check_for_shutdown()
+                test = self._take()
+                if test is not None:
+                    return test
+                self._condition.wait(ostools.INTERRUPT_CHECK_INTERVAL)
+
+    def try_next(self):
+        """
+        Return the next test or None if no test fits into the free resources without blocking
         """
-        ostools.PROGRAM_STATUS.check_for_shutdown()
         with self._lock:  # pylint: disable=not-context-manager
-            if self._idx < len(self._tests):
-                idx = self._idx
-                self._idx += 1
+            return self._take()
+
+    def _take(self):
+        """
+        Take the first pending test which fits into the free resources or return None, must hold the lock
+        """
+        if not self._pending:
+            raise StopIteration
+
+        for pos, idx in enumerate(self._pending):
+            required = self._required[idx]
+            if all(self._in_use[name] + amount <= self._capacities[name] for name, amount in required.items()):
+                del self._pending[pos]
+                for name, amount in required.items():
+                    self._in_use[name] += amount
+                self._running.append(idx)
                 return self._tests[idx]
-            else:
-                raise StopIteration
 
-    def test_done(self):
+        return None
+
+    def test_done(self, test):
         """
-        Signal that a test has been done
+        Signal that a test has been done releasing its resources
         """
         with self._lock:  # pylint: disable=not-context-manager
+            for pos, idx in enumerate(self._running):
+                if self._tests[idx] is test:
+                    del self._running[pos]
+                    for name, amount in self._required[idx].items():
+                        self._in_use[name] -= amount
+                    break
             self._num_done += 1
+            self._condition.notify_all()
 
     def is_finished(self):
         with self._lock:  # pylint: disable=not-context-manager
@@ -319,9 +820,120 @@ class TestScheduler(object):
     def wait_for_finish(self):
         """
         Block until all tests have been done
+
+        Woken up by test_done, the timeout only bounds the time
+        to react to Ctrl-C where the wait cannot be interrupted by signals
         """
-        while not self.is_finished():
-            time.sleep(0.05)
+        with self._lock:  # pylint: disable=not-context-manager
+            while self._num_done < len(self._tests):
+                ostools.PROGRAM_STATUS.check_for_shutdown()
+                self._condition.wait(ostools.INTERRUPT_CHECK_INTERVAL)
+
+
+def predict_makespan(runtimes, num_threads):
+    """
+    Predict the total runtime when running tests with runtimes
+    longest first on num_threads threads
+    """
+    loads = [0.0] * num_threads
+    for runtime in sorted(runtimes, reverse=True):
+        heapq.heappush(loads, heapq.heappop(loads) + runtime)
+    return max(loads)
+
+
+def select_shard(test_suites, expected_runtimes, shard, num_shards):
+    """
+    Return the test suites of shard 1 <= shard <= num_shards when partitioning
+    the test suites into num_shards parts with balanced expected runtime
+
+    Test suites without an expected runtime are assumed to take the mean of the known runtimes.
+    The partition only depends on the names and expected runtimes of the test suites such that
+    separate invocations with the same runtime history select disjoint shards.
+    """
+    assert 1 <= shard <= num_shards
+    known = [runtime for runtime in expected_runtimes if runtime is not None]
+    default = sum(known) / len(known) if known else 1.0
+    runtimes = [default if runtime is None else runtime for runtime in expected_runtimes]
+
+    # Longest first onto the shard with the least load where ties are broken by name and shard index
+    order = sorted(range(len(test_suites)), key=lambda idx: (-runtimes[idx], test_suites[idx].name))
+    loads = [(0.0, idx) for idx in range(num_shards)]
+    selected = set()
+    for idx in order:
+        load, shard_idx = heapq.heappop(loads)
+        if shard_idx == shard - 1:
+            selected.add(idx)
+        heapq.heappush(loads, (load + runtimes[idx], shard_idx))
+
+    return [test_suite for idx, test_suite in enumerate(test_suites) if idx in selected]
+
+
+def read_runtime_history(database):
+    """
+    Read the test runtimes of previous runs from the database
+    """
+    if database is None or RUNTIME_HISTORY_KEY not in database:
+        return {}
+    return database[RUNTIME_HISTORY_KEY]
+
+
+def expected_runtime(runtime_history, test_suite):
+    """
+    Return the expected runtime of the test suite from the runtime history
+    or None when any of its test cases has not been run before
+    """
+    runtime = 0.0
+    for test_name in test_suite.test_cases:
+        if test_name not in runtime_history:
+            return None
+        runtime += runtime_history[test_name]
+    return runtime
+
+
+def read_test_results(database):
+    """
+    Read the status name of each test in the latest run it was part of from the database
+    """
+    if database is None or TEST_RESULTS_KEY not in database:
+        return {}
+    return database[TEST_RESULTS_KEY]
+
+
+RUNTIME_HISTORY_KEY = b"TestRunner.runtime_history"
+TEST_RESULTS_KEY = b"TestRunner.test_results"
+
+
+def passed_with_same_fingerprint(database, test_suite, fingerprints):
+    """
+    Returns True if the test suite passed the last time it was run with its fingerprint in fingerprints
+    """
+    key = _passed_fingerprint_key(test_suite)
+    fingerprint = fingerprints.get(test_suite.name)
+    return fingerprint is not None and key in database and database[key] == fingerprint
+
+
+def _passed_fingerprint_key(test_suite):
+    """
+    Database key of the fingerprint of the last run of the test suite if it passed
+    """
+    return ("TestRunner.passed_fingerprint(%s)" % test_suite.name).encode()
+
+
+def _get_fork_context():
+    """
+    Return a multiprocessing context creating worker processes by forking
+    or None if forking is not supported
+    """
+    if hasattr(multiprocessing, "get_all_start_methods"):
+        # Python 3
+        if "fork" not in multiprocessing.get_all_start_methods():
+            return None
+        return multiprocessing.get_context("fork")
+
+    # Python 2 always forks except on Windows
+    if os.name == "nt":
+        return None
+    return multiprocessing
 
 
 def create_output_path(output_file, test_suite_name):
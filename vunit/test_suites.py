@@ -40,6 +40,13 @@ class IndependentSimTestCase(object):
     def name(self):
         return self._name
 
+    @property
+    def config(self):
+        """
+        The configuration of the test suite
+        """
+        return self._config
+
     def run(self, output_path):
         """
         Run the test case using the output_path
@@ -101,6 +108,13 @@ class SameSimTestSuite(object):
     def name(self):
         return self._name
 
+    @property
+    def config(self):
+        """
+        The configuration of the test suite
+        """
+        return self._config
+
     def _full_name(self, name):  # pylint: disable=missing-docstring
         if name == "":
             return self._name
@@ -96,6 +96,11 @@ The following simulation options are known.
   A list of PLI files
   A list of file names
 
+``timeout``
+  Wall-clock time in seconds after which the test runner kills the simulator processes of the
+  test and reports the tests which were not done as timed out. Takes precedence over ``--timeout``.
+  A positive number
+
 ``ghdl.flags``
    Extra arguments passed to ``ghdl --elab-run`` command *before* executable specific flags. Must be a list of strings.
    Must be a list of strings.
@@ -198,7 +203,8 @@ import os
 from os.path import exists, abspath, join, basename, splitext
 from glob import glob
 from fnmatch import fnmatch
-from vunit.database import PickledDataBase, DataBase
+from vunit.database import PickledDataBase, DataBase, LogDataBase
+from vunit.hashing import hash_string
 import vunit.ostools as ostools
 from vunit.vunit_cli import VUnitCLI
 from vunit.simulator_factory import SimulatorFactory
@@ -208,13 +214,21 @@ from vunit.project import (Project,
                            file_type_of,
                            check_vhdl_standard,
                            HDL_FILE_ENCODING)
-from vunit.test_runner import TestRunner
+from vunit.test_runner import (TestRunner,
+                               select_shard,
+                               read_runtime_history,
+                               read_test_results,
+                               expected_runtime,
+                               passed_with_same_fingerprint)
+from vunit.test_list import TestList
+from vunit.distributed import Coordinator, Worker
 from vunit.test_report import TestReport
 from vunit.test_bench_list import TestBenchList
 from vunit.exceptions import CompileError
 from vunit.location_preprocessor import LocationPreprocessor
 from vunit.check_preprocessor import CheckPreprocessor
 from vunit.vhdl_parser import CachedVHDLParser
+from vunit.content_hash_cache import ContentHashCache
 from vunit.parsing.verilog.parser import VerilogParser
 from vunit.builtins import (add_vhdl_builtins,
                             add_verilog_include_dir,
@@ -222,9 +236,14 @@ from vunit.builtins import (add_vhdl_builtins,
                             add_osvvm,
                             add_com)
 from vunit.com import codec_generator
+from vunit.about import version
 
 LOGGER = logging.getLogger(__name__)
 
+# The classes of the --database formats of the project database
+DATABASE_FORMATS = {"log": LogDataBase,
+                    "directory": DataBase}
+
 
 class VUnit(object):  # pylint: disable=too-many-instance-attributes, too-many-public-methods
     """
@@ -285,10 +304,24 @@ class VUnit(object):  # pylint: disable=too-many-instance-attributes, too-many-p
                    list_files_only=args.files,
                    compile_only=args.compile,
                    keep_compiling=args.keep_compiling,
+                   compile_jobs=args.compile_jobs,
+                   compile_all=args.compile_all,
+                   batch_compile=args.batch_compile,
+                   hash_cache=not args.no_hash_cache,
+                   database_format=args.database,
+                   parse_jobs=args.parse_jobs,
                    elaborate_only=args.elaborate,
                    compile_builtins=compile_builtins,
                    simulator_factory=SimulatorFactory(args),
                    num_threads=args.num_threads,
+                   runner=args.runner,
+                   coordinator=args.coordinator,
+                   worker=args.worker,
+                   shard=args.shard,
+                   skip_unchanged=args.skip_unchanged,
+                   rerun_failed=args.rerun_failed,
+                   resource_capacities=dict(args.resource or []),
+                   timeout=args.timeout,
                    exit_0=args.exit_0)
 
     def __init__(self,  # pylint: disable=too-many-locals, too-many-arguments
@@ -305,10 +338,24 @@ class VUnit(object):  # pylint: disable=too-many-instance-attributes, too-many-p
                  list_files_only=False,
                  compile_only=False,
                  keep_compiling=False,
+                 compile_jobs=1,
+                 compile_all=False,
+                 batch_compile=False,
+                 hash_cache=True,
+                 database_format="log",
+                 parse_jobs=1,
                  elaborate_only=False,
                  vhdl_standard='2008',
                  compile_builtins=True,
                  num_threads=1,
+                 runner="thread",
+                 coordinator=None,
+                 worker=None,
+                 shard=None,
+                 skip_unchanged=False,
+                 rerun_failed=False,
+                 resource_capacities=None,
+                 timeout=None,
                  exit_0=False):
 
         self._configure_logging(log_level)
@@ -328,6 +375,12 @@ class VUnit(object):  # pylint: disable=too-many-instance-attributes, too-many-p
         self._list_files_only = list_files_only
         self._compile_only = compile_only
         self._keep_compiling = keep_compiling
+        self._compile_jobs = compile_jobs
+        self._compile_all = compile_all
+        self._batch_compile = batch_compile
+        self._hash_cache = hash_cache
+        self._database_format = database_format
+        self._parse_jobs = parse_jobs
         self._vhdl_standard = vhdl_standard
 
         self._external_preprocessors = []
@@ -339,8 +392,20 @@ class VUnit(object):  # pylint: disable=too-many-instance-attributes, too-many-p
         self._create_output_path(clean)
 
         self._project = None
+        self._database = None
+        self._content_hash_cache = None
+        # Mapping from preprocessed file name to original file name
+        self._preprocessed_file_names = {}
         self._create_project()
         self._num_threads = num_threads
+        self._runner = runner
+        self._coordinator = coordinator
+        self._worker = worker
+        self._shard = shard
+        self._skip_unchanged = skip_unchanged
+        self._rerun_failed = rerun_failed
+        self._resource_capacities = resource_capacities
+        self._timeout = timeout
         self._exit_0 = exit_0
 
         self._test_bench_list = TestBenchList()
@@ -353,9 +418,13 @@ class VUnit(object):  # pylint: disable=too-many-instance-attributes, too-many-p
         Create Project instance
         """
         database = self._create_database()
+        self._database = database
+        content_hash_cache = ContentHashCache(database=database if self._hash_cache else None)
+        self._content_hash_cache = content_hash_cache
         self._project = Project(
             vhdl_parser=CachedVHDLParser(database=database),
-            verilog_parser=VerilogParser(database=database),
+            verilog_parser=VerilogParser(database=database, content_hash_cache=content_hash_cache),
+            content_hash_cache=content_hash_cache,
             depend_on_package_body=self._simulator_factory.package_users_depend_on_bodies())
 
     def _create_database(self):
@@ -366,13 +435,21 @@ class VUnit(object):  # pylint: disable=too-many-instance-attributes, too-many-p
         same as the running python instance or re-create
         """
         project_database_file_name = join(self._output_path, "project_database")
+        database_class = DATABASE_FORMATS[self._database_format]
         create_new = False
         key = b"version"
-        version = str((6, sys.version)).encode()
+        database_version = str((6, sys.version)).encode()
         database = None
         try:
-            database = DataBase(project_database_file_name)
-            create_new = (key not in database) or (database[key] != version)
+            database = database_class(project_database_file_name)
+            if key in database:
+                create_new = database[key] != database_version
+            elif not database.keys():
+                # Only set the version of an empty database such that runs of distributed
+                # workers sharing the output path do not replace each others database
+                database[key] = database_version
+            else:
+                create_new = True
         except KeyboardInterrupt:
             raise
         except:  # pylint: disable=bare-except
@@ -380,8 +457,10 @@ class VUnit(object):  # pylint: disable=too-many-instance-attributes, too-many-p
             create_new = True
 
         if create_new:
-            database = DataBase(project_database_file_name, new=True)
-        database[key] = version
+            if database is not None:
+                database.close()
+            database = database_class(project_database_file_name, new=True)
+            database[key] = database_version
 
         return PickledDataBase(database)
 
@@ -665,25 +744,57 @@ class VUnit(object):  # pylint: disable=too-many-instance-attributes, too-many-p
         if not preprocessors:
             return file_name
 
-        code = ostools.read_file(file_name)
-        for preprocessor in preprocessors:
-            code = preprocessor.run(code, basename(file_name))
-
         pp_file_name = join(self._preprocessed_path, library_name, basename(file_name))
 
         idx = 1
-        while ostools.file_exists(pp_file_name):
-            LOGGER.debug("Preprocessed file exists '%s', adding prefix", pp_file_name)
+        while self._preprocessed_file_names.get(pp_file_name, file_name) != file_name:
+            LOGGER.debug("Preprocessed file name '%s' already used, adding prefix", pp_file_name)
             pp_file_name = join(self._preprocessed_path,
                                 library_name, "%i_%s" % (idx, basename(file_name)))
             idx += 1
+        self._preprocessed_file_names[pp_file_name] = file_name
+
+        cache_key = self._preprocess_cache_key(file_name, preprocessors)
+        database_key = ("VUnit._preprocess(%s)" % pp_file_name).encode()
+        if (cache_key is not None and
+                ostools.file_exists(pp_file_name) and
+                database_key in self._database and
+                self._database[database_key] == cache_key):
+            LOGGER.debug("Re-using preprocessed file '%s'", pp_file_name)
+            return pp_file_name
+
+        code = ostools.read_file(file_name)
+        for preprocessor in preprocessors:
+            code = preprocessor.run(code, basename(file_name))
 
-        ostools.write_file(pp_file_name, code, encoding=HDL_FILE_ENCODING)
+        # Only write changed files to keep the modification time stable
+        if (not ostools.file_exists(pp_file_name) or
+                ostools.read_file(pp_file_name, encoding=HDL_FILE_ENCODING) != code):
+            ostools.write_file(pp_file_name, code, encoding=HDL_FILE_ENCODING)
+
+        # None never matches a cache key and marks the preprocessed file as unknown
+        self._database[database_key] = cache_key
         return pp_file_name
 
+    def _preprocess_cache_key(self, file_name, preprocessors):
+        """
+        Returns a key identifying the contents of file_name and the preprocessors
+        or None if any preprocessor does not have a cache_key method
+        """
+        cache_keys = [self._content_hash_cache.content_hash(file_name)]
+        for preprocessor in preprocessors:
+            if not hasattr(preprocessor, "cache_key"):
+                return None
+            cache_keys.append(preprocessor.cache_key())
+        return hash_string(repr(cache_keys))
+
     def add_preprocessor(self, preprocessor):
         """
         Add a custom preprocessor to be used on all files, must be called before adding any files
+
+        Preprocessed files are kept between runs. If all preprocessors have a
+        ``cache_key()`` method returning a string which changes whenever their
+        output could change, files with unchanged contents are not preprocessed again.
         """
         self._external_preprocessors.append(preprocessor)
 
@@ -748,8 +859,94 @@ avoid location preprocessing of other functions sharing name with a VUnit log or
         self._test_bench_list.warn_when_empty()
         test_list = self._test_bench_list.create_tests(simulator_if, self._elaborate_only)
         test_list.keep_matches(self._test_filter)
+
+        if self._rerun_failed:
+            self._keep_failed(test_list)
+
+        if self._shard is not None:
+            test_list = self._select_shard(test_list)
+
         return test_list
 
+    def _keep_failed(self, test_list):
+        """
+        Keep only the tests which did not pass the latest time they were run
+        """
+        test_results = read_test_results(self._database)
+        if not test_results:
+            LOGGER.warning("No results of a previous run found, running all tests")
+            return
+
+        test_list.keep_matches(lambda name: test_results.get(name, "passed") != "passed")
+
+    def _select_shard(self, test_list):
+        """
+        Return a test list with the test suites of the selected shard
+        """
+        shard, num_shards = self._shard
+        runtime_history = read_runtime_history(self._database)
+        test_suites = list(test_list)
+        expected_runtimes = [expected_runtime(runtime_history, test_suite) for test_suite in test_suites]
+
+        shard_list = TestList()
+        for test_suite in select_shard(test_suites, expected_runtimes, shard, num_shards):
+            shard_list.add_suite(test_suite)
+        return shard_list
+
+    def _fingerprint_test_suites(self, simulator_if, test_list):
+        """
+        Return a mapping from test suite name to a fingerprint of the inputs of the test suite.
+        The inputs are the content hashes of all files required to simulate the test bench,
+        the configuration, the test cases, the simulator and the VUnit version
+        """
+        test_bench_hashes = {}
+        fingerprints = {}
+        common = "%s %s %s" % (version(), simulator_if.get_identity(), self._elaborate_only)
+
+        for test_suite in test_list:
+            test_bench_name = tuple(test_suite.name.split(".")[:2])
+            if test_bench_name not in test_bench_hashes:
+                source_files = self._project.get_dependencies_in_compile_order(
+                    self._get_test_bench_source_files([test_suite]), implementation_dependencies=True)
+                test_bench_hashes[test_bench_name] = hash_string("".join(
+                    "%s %s %s\n" % (source_file.library.name, source_file.name, source_file.content_hash)
+                    for source_file in source_files))
+
+            fingerprints[test_suite.name] = hash_string(repr((common,
+                                                              test_bench_hashes[test_bench_name],
+                                                              test_suite.config.fingerprint(),
+                                                              test_suite.test_cases)))
+        return fingerprints
+
+    def _num_test_suites_to_run(self, test_list, fingerprints):
+        """
+        Return the number of test suites which are not reported as cached passes
+        """
+        if fingerprints is None:
+            return len(test_list)
+
+        return len([test_suite for test_suite in test_list
+                    if not passed_with_same_fingerprint(self._database, test_suite, fingerprints)])
+
+    def _get_test_bench_source_files(self, test_list):
+        """
+        Return the source files of the test benches of the test suites in test_list
+        """
+        test_bench_names = set(tuple(test_suite.name.split(".")[:2]) for test_suite in test_list)
+        source_files = []
+        for test_bench in self._test_bench_list.get_test_benches():
+            if (test_bench.library_name, test_bench.name) not in test_bench_names:
+                continue
+
+            design_unit = test_bench.design_unit
+            source_files.append(design_unit.source_file)
+            if design_unit.is_entity:
+                library = design_unit.source_file.library
+                source_files += [library.get_source_file(file_name)
+                                 for file_name in design_unit.architecture_names.values()
+                                 if file_name != design_unit.file_name]
+        return source_files
+
     def _main(self):
         """
         Base vunit main function without performing exit
@@ -772,12 +969,31 @@ avoid location preprocessing of other functions sharing name with a VUnit log or
         """
         simulator_if = self._simulator_factory.create()
         test_list = self._create_tests(simulator_if)
-        self._compile(simulator_if)
+
+        target_files = None
+        if not self._compile_all:
+            # Only compile what is needed to simulate the selected test benches
+            target_files = self._get_test_bench_source_files(test_list)
+
+        if self._worker is not None:
+            return self._main_worker(simulator_if, test_list, target_files)
+
+        fingerprints = None
+        if self._skip_unchanged:
+            fingerprints = self._fingerprint_test_suites(simulator_if, test_list)
+
+        if self._runner == "thread" and self._coordinator is None:
+            # Start the simulators while compiling, worker processes start their own simulators
+            num_test_suites = self._num_test_suites_to_run(test_list, fingerprints)
+            simulator_if._prestart_simulations(  # pylint: disable=protected-access
+                min(self._num_threads, num_test_suites), num_test_suites=num_test_suites)
+
+        self._compile(simulator_if, target_files)
 
         start_time = ostools.get_time()
         report = TestReport(printer=self._printer)
         try:
-            self._run_test(test_list, report)
+            self._run_test(test_list, report, fingerprints)
             simulator_if.post_process(self._simulator_factory.simulator_output_path)
         except KeyboardInterrupt:
             print()
@@ -791,6 +1007,37 @@ avoid location preprocessing of other functions sharing name with a VUnit log or
 
         return report.all_ok()
 
+    def _main_worker(self, simulator_if, test_list, target_files):
+        """
+        Main function when running the tests handed out by a distributed coordinator
+        """
+        output_path = join(self._output_path, "test_output")
+        try:
+            worker = Worker(self._worker, output_path, num_threads=self._num_threads)
+            num_simulations = min(self._num_threads, len(test_list))
+            if worker.shares_output_path:
+                # The coordinator has already compiled into the shared output path
+                simulator_if._prestart_simulations(num_simulations, compiled=True)  # pylint: disable=protected-access
+            else:
+                simulator_if._prestart_simulations(num_simulations)  # pylint: disable=protected-access
+                self._compile(simulator_if, target_files)
+
+            runner = TestRunner(TestReport(printer=self._printer),
+                                output_path,
+                                verbose=self._verbose,
+                                num_threads=self._num_threads,
+                                database=self._database,
+                                timeouts=self._get_timeouts(test_list))
+            runner.run_worker(test_list, worker)
+        except KeyboardInterrupt:
+            print()
+            LOGGER.debug("_main: Caught Ctrl-C shutting down")
+        finally:
+            del test_list
+            del simulator_if
+
+        return True
+
     def _main_list_only(self):
         """
         Main function when only listing test cases
@@ -829,7 +1076,8 @@ avoid location preprocessing of other functions sharing name with a VUnit log or
         elif not exists(self._output_path):
             os.makedirs(self._output_path)
 
-        ostools.renew_path(self._preprocessed_path)
+        if not exists(self._preprocessed_path):
+            os.makedirs(self._preprocessed_path)
 
     @property
     def vhdl_standard(self):
@@ -847,23 +1095,44 @@ avoid location preprocessing of other functions sharing name with a VUnit log or
     def use_debug_codecs(self):
         return self._use_debug_codecs
 
-    def _compile(self, simulator_if):
+    def _compile(self, simulator_if, target_files=None):
         """
-        Compile entire project
+        Compile entire project or only the files required to simulate the target files
         """
         simulator_if.compile_project(self._project,
-                                     continue_on_error=self._keep_compiling)
+                                     continue_on_error=self._keep_compiling,
+                                     num_threads=self._compile_jobs,
+                                     target_files=target_files,
+                                     batch_compile=self._batch_compile)
 
-    def _run_test(self, test_cases, report):
+    def _run_test(self, test_cases, report, fingerprints=None):
         """
         Run the test suites and return the report
         """
+        output_path = join(self._output_path, "test_output")
+        coordinator = None
+        if self._coordinator is not None:
+            coordinator = Coordinator(self._coordinator, output_path)
+
         runner = TestRunner(report,
-                            join(self._output_path, "test_output"),
+                            output_path,
                             verbose=self._verbose,
-                            num_threads=self._num_threads)
+                            num_threads=self._num_threads,
+                            database=self._database,
+                            runner=self._runner,
+                            coordinator=coordinator,
+                            fingerprints=fingerprints,
+                            resource_capacities=self._resource_capacities,
+                            timeouts=self._get_timeouts(test_cases))
         runner.run(test_cases)
 
+    def _get_timeouts(self, test_list):
+        """
+        Return a mapping from test suite name to its timeout from the timeout sim option or the command line
+        """
+        return dict((test_suite.name, test_suite.config.sim_options.get("timeout", self._timeout))
+                    for test_suite in test_list)
+
     def _post_process(self, report):
         """
         Print the report to stdout and optionally write it to an XML file
@@ -1123,9 +1392,18 @@ class Library(object):
                                   "Use allow_empty=True to avoid exception,") % pattern_instance)
             file_names += new_file_names
 
+        prepared_files = [self._prepare_source_file(file_name, preprocessors, include_dirs)
+                          for file_name in file_names]
+
+        if not no_parse:
+            self._project.fill_parse_cache(
+                [(file_name, file_type, file_include_dirs, defines)
+                 for file_name, file_type, file_include_dirs in prepared_files],
+                num_processes=self._parent._parse_jobs)  # pylint: disable=protected-access
+
         return SourceFileList(source_files=[
-            self.add_source_file(file_name, preprocessors, include_dirs, defines, vhdl_standard, no_parse=no_parse)
-            for file_name in file_names])
+            self._add_prepared_source_file(file_name, file_type, file_include_dirs, defines, vhdl_standard, no_parse)
+            for file_name, file_type, file_include_dirs in prepared_files])
 
     def add_source_file(self,  # pylint: disable=too-many-arguments
                         file_name, preprocessors=None, include_dirs=None, defines=None,
@@ -1147,7 +1425,13 @@ class Library(object):
            library.add_source_file("file.vhd")
 
         """
+        file_name, file_type, include_dirs = self._prepare_source_file(file_name, preprocessors, include_dirs)
+        return self._add_prepared_source_file(file_name, file_type, include_dirs, defines, vhdl_standard, no_parse)
 
+    def _prepare_source_file(self, file_name, preprocessors, include_dirs):
+        """
+        Preprocess file and determine file type and include directories
+        """
         file_type = file_type_of(file_name)
 
         if file_type == "verilog":
@@ -1157,6 +1441,13 @@ class Library(object):
         file_name = self._parent._preprocess(  # pylint: disable=protected-access
             self._library_name, abspath(file_name), preprocessors)
 
+        return file_name, file_type, include_dirs
+
+    def _add_prepared_source_file(self,  # pylint: disable=too-many-arguments
+                                  file_name, file_type, include_dirs, defines, vhdl_standard, no_parse):
+        """
+        Add already preprocessed source file to library
+        """
         source_file = self._project.add_source_file(file_name,
                                                     self._library_name,
                                                     file_type=file_type,
@@ -1327,8 +1618,30 @@ class TestBench(object):
         """
         self._test_bench.set_post_check(value)
 
+    def set_resource(self, name, value):
+        """
+        Set the amount of a resource required to run the test suites of all |configurations|
+        of this test bench or test cases within it
+
+        :param name: The name of the resource
+        :param value: The required amount, a non-negative number
+
+        Test suites are only started when the resources they require fit into the capacities
+        given by the ``--resource`` command line argument. Resources without a capacity are not limited.
+
+        :example:
+
+        .. code-block:: python
+
+           test_bench.set_resource("memory_gb", 12)
+           test_bench.set_resource("licenses", 2)
+
+        """
+        self._test_bench.set_resource(name, value)
+
     def add_config(self,  # pylint: disable=too-many-arguments
-                   name, generics=None, parameters=None, pre_config=None, post_check=None, sim_options=None):
+                   name, generics=None, parameters=None, pre_config=None, post_check=None, sim_options=None,
+                   resources=None):
         """
         Add a configuration of this test bench or to all test cases within it by copying the default configuration.
 
@@ -1351,6 +1664,8 @@ class TestBench(object):
            directory where test outputs are stored.
            The function must return `True` or the test will fail
         :param sim_options: A `dict` containing the sim_options to be set in addition to the default configuration
+        :param resources: A `dict` containing the amount of each resource required to run the configuration
+           in addition to the default configuration, see :meth:`.set_resource`
 
         :example:
 
@@ -1384,7 +1699,8 @@ class TestBench(object):
                                     generics=generics,
                                     pre_config=pre_config,
                                     post_check=post_check,
-                                    sim_options=sim_options)
+                                    sim_options=sim_options,
+                                    resources=resources)
 
     def test(self, name):
         """
@@ -1481,7 +1797,8 @@ class Test(object):
         return self._test_case.name
 
     def add_config(self,  # pylint: disable=too-many-arguments
-                   name, generics=None, parameters=None, pre_config=None, post_check=None, sim_options=None):
+                   name, generics=None, parameters=None, pre_config=None, post_check=None, sim_options=None,
+                   resources=None):
         """
         Add a configuration to this test copying the default configuration.
 
@@ -1500,6 +1817,8 @@ class Test(object):
            directory where test outputs are stored.
            The function must return `True` or the test will fail
         :param sim_options: A `dict` containing the sim_options to be set in addition to the default configuration.
+        :param resources: A `dict` containing the amount of each resource required to run the configuration
+           in addition to the default configuration, see :meth:`.TestBench.set_resource`
 
         :example:
 
@@ -1532,7 +1851,8 @@ class Test(object):
                                    generics=generics,
                                    pre_config=pre_config,
                                    post_check=post_check,
-                                   sim_options=sim_options)
+                                   sim_options=sim_options,
+                                   resources=resources)
 
     def set_generic(self, name, value):
         """
@@ -1598,6 +1918,16 @@ class Test(object):
         """
         self._test_case.set_post_check(value)
 
+    def set_resource(self, name, value):
+        """
+        Set the amount of a resource required to run all |configurations| of this test,
+        see :meth:`.TestBench.set_resource`
+
+        :param name: The name of the resource
+        :param value: The required amount, a non-negative number
+        """
+        self._test_case.set_resource(name, value)
+
 
 class SourceFileList(list):
     """
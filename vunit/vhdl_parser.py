@@ -12,6 +12,7 @@ import re
 from os.path import abspath
 import logging
 from vunit.hashing import hash_string
+from vunit.ostools import read_file, HDL_FILE_ENCODING
 LOGGER = logging.getLogger(__name__)
 
 
@@ -27,7 +28,10 @@ class VHDLParser(object):
     def parse(code, file_name, content_hash=None):  # pylint: disable=unused-argument
         """
         Parse the VHDL code and return a VHDLDesignFile parse result
+        The code is read from file_name when None
         """
+        if code is None:
+            code = read_file(file_name, encoding=HDL_FILE_ENCODING)
         return VHDLDesignFile.parse(code)
 
 
@@ -43,12 +47,30 @@ class CachedVHDLParser(object):
         """
         Parse the VHDL code and return a VHDLDesignFile parse result
         parse result is re-used if content hash found in database
+        The code is read from file_name when None and not found in the database
         """
-        file_name = abspath(file_name)
+        if code is None and content_hash is None:
+            code = read_file(file_name, encoding=HDL_FILE_ENCODING)
 
         if content_hash is None:
             content_hash = "sha1:" + hash_string(code)
-        key = ("CachedVHDLParser.parse(%s)" % file_name).encode()
+
+        design_file = self.lookup(file_name, content_hash)
+        if design_file is not None:
+            return design_file
+
+        if code is None:
+            code = read_file(file_name, encoding=HDL_FILE_ENCODING)
+        design_file = VHDLDesignFile.parse(code)
+        self.store(file_name, content_hash, design_file)
+        return design_file
+
+    def lookup(self, file_name, content_hash):
+        """
+        Return cached parse result of file_name or None if there is no parse result with the same content hash
+        """
+        file_name = abspath(file_name)
+        key = self._key(file_name)
 
         if key in self._database:
             design_file, old_content_hash = self._database[key]
@@ -56,10 +78,18 @@ class CachedVHDLParser(object):
                 LOGGER.debug("Re-using cached VHDL parse results for %s with content_hash=%s",
                              file_name, content_hash)
                 return design_file
+        return None
 
-        design_file = VHDLDesignFile.parse(code)
-        self._database[key] = design_file, content_hash
-        return design_file
+    def store(self, file_name, content_hash, design_file):
+        """
+        Store parse result of file_name into the database
+        """
+        self._database[self._key(abspath(file_name))] = design_file, content_hash
+
+    @staticmethod
+    def _key(file_name):
+        """ Returns the database key for parse results of file_name """
+        return ("CachedVHDLParser.parse(%s)" % file_name).encode()
 
 
 class VHDLDesignFile(object):  # pylint: disable=too-many-instance-attributes
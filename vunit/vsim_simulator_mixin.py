@@ -9,11 +9,16 @@ Shared simulation logic between vsim based simulators such as ModelSim
 and RivieraPRO
 """
 
+from __future__ import print_function
 import sys
 import os
-from os.path import join, dirname, abspath
+import io
+import threading
+from os.path import join, dirname, abspath, basename, splitext
 from vunit.ostools import (write_file,
-                           Process)
+                           Process,
+                           get_time)
+from vunit.hashing import hash_string
 from vunit.persistent_tcl_shell import PersistentTclShell
 
 
@@ -23,7 +28,13 @@ class VsimSimulatorMixin(object):
     simulators such as modelsim and rivierapro
     """
 
-    def __init__(self, prefix, persistent, gui, sim_cfg_file_name):
+    # Extra characters appended to the runner_cfg generic of a re-usable design
+    # such that the runner_cfg of following test cases fit when they are longer
+    runner_cfg_slack = 256
+
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 prefix, persistent, gui, sim_cfg_file_name, persistent_compile=False, reuse_design=False,
+                 recycle_after=None):
         self._prefix = prefix
         sim_cfg_file_name = abspath(sim_cfg_file_name)
         self._gui = gui
@@ -37,13 +48,87 @@ class VsimSimulatorMixin(object):
                             "-l", join(dirname(sim_cfg_file_name), "transcript%i" % ident),
                             "-do", abspath(join(dirname(__file__), "tcl_read_eval_loop.tcl"))],
                            cwd=dirname(sim_cfg_file_name),
-                           env=env)
+                           env=env,
+                           raw_output=True)
 
         if persistent:
-            self._persistent_shell = PersistentTclShell(create_process=create_process)
+            self._persistent_shell = PersistentTclShell(create_process=create_process,
+                                                        max_tests=recycle_after)
         else:
             self._persistent_shell = None
 
+        def create_compile_process(ident):
+            # Run in the current working directory like a compiler process such that relative paths are valid
+            return Process([join(prefix, "vsim"), "-c",
+                            "-l", join(dirname(sim_cfg_file_name), "compile_transcript%i" % ident),
+                            "-do", abspath(join(dirname(__file__), "tcl_read_eval_loop.tcl"))],
+                           cwd=os.getcwd(),
+                           env=env,
+                           raw_output=True)
+
+        if persistent_compile:
+            self._compile_shell = PersistentTclShell(create_process=create_compile_process)
+        else:
+            self._compile_shell = None
+
+        self._num_prestarted_simulations = 0
+        # None unless designs are re-used between test cases
+        self._load_times = _LoadTimes() if reuse_design else None
+
+    def _prestart_simulations(self, num_simulations, compiled=False, num_test_suites=None):
+        """
+        Start the persistent vsim processes in the background when compilation starts
+        such that they see the mapped libraries or right away when already compiled
+        """
+        if self._persistent_shell is None:
+            return
+
+        if num_test_suites is not None:
+            # Do not start a process to replace a recycled one after the last test suite
+            self._persistent_shell.set_num_tests(num_test_suites)
+
+        if compiled:
+            self._persistent_shell.start_in_background(num_simulations)
+        else:
+            self._num_prestarted_simulations = num_simulations
+
+    def compile_source_files(self, *args, **kwargs):
+        """
+        Compile the source files and stop the persistent compile processes when done
+        """
+        if self._num_prestarted_simulations > 0:
+            self._persistent_shell.start_in_background(self._num_prestarted_simulations)
+            self._num_prestarted_simulations = 0
+
+        try:
+            super(VsimSimulatorMixin, self).compile_source_files(*args, **kwargs)
+        finally:
+            if self._compile_shell is not None:
+                self._compile_shell.teardown()
+
+    def _run_compile_command(self, command, **kwargs):
+        """
+        Run the vcom or vlog command in the persistent compile process when enabled
+        """
+        if self._compile_shell is None:
+            return super(VsimSimulatorMixin, self)._run_compile_command(command, **kwargs)
+
+        output = io.StringIO()
+        try:
+            tool = splitext(basename(command[0]))[0]
+            self._compile_shell.execute("set vunit_compile_failed [catch {%s}]"
+                                        % " ".join([tool] + ["{%s}" % arg for arg in command[1:]]),
+                                        output=output)
+            success = self._compile_shell.read_var("vunit_compile_failed") == "0"
+        except Process.NonZeroExitCode:
+            success = False
+
+        callback = kwargs.get("callback", print)
+        if callback is not None:
+            for line in output.getvalue().splitlines():
+                callback(line)
+        return success
+
     @staticmethod
     def _create_restart_function():
         """"
@@ -193,8 +278,8 @@ proc vunit_help {} {
                     "-l", join(dirname(batch_file_name), "transcript"),
                     '-do', "source \"%s\"" % fix_path(batch_file_name)]
 
-            proc = Process(args, cwd=dirname(self._sim_cfg_file_name))
-            proc.consume_output()
+            proc = Process(args, cwd=dirname(self._sim_cfg_file_name), raw_output=True)
+            proc.consume_output_raw(sys.stdout)
         except Process.NonZeroExitCode:
             return False
         return True
@@ -204,6 +289,8 @@ proc vunit_help {} {
         Run a test bench using the persistent vsim process
         """
         try:
+            if self._load_times is not None:
+                self._unload_design()
             self._persistent_shell.execute('source "%s"' % fix_path(common_file_name))
             self._persistent_shell.execute("set failed [vunit_load]")
             if self._persistent_shell.read_var("failed") == '1':
@@ -218,6 +305,117 @@ proc vunit_help {} {
         except Process.NonZeroExitCode:
             return False
 
+    def _can_reuse_design(self, config, elaborate_only):
+        """
+        Return True when the loaded design may be kept for following test cases of the configuration
+
+        The runner_cfg generic is changed after restarting the simulation which only works for VHDL
+        """
+        return (self._load_times is not None and
+                self._persistent_shell is not None and
+                not self._gui and
+                not elaborate_only and
+                getattr(self, "_coverage", None) is None and
+                config.architecture_name is not None and
+                "runner_cfg" in config.generics)
+
+    @staticmethod
+    def _get_design_key(config):
+        """
+        Return a key which is equal for test cases which can share the loaded design
+        """
+        return hash_string(repr((config.library_name,
+                                 config.entity_name,
+                                 config.architecture_name,
+                                 sorted((name, repr(value)) for name, value in config.generics.items()
+                                        if name != "runner_cfg"),
+                                 sorted((name, repr(value)) for name, value in config.sim_options.items()),
+                                 config.vhdl_assert_stop_level)))
+
+    def _get_loaded_design(self):
+        """
+        Return the key and runner_cfg length of the design loaded in the persistent vsim process
+        of this thread, None if there is none such as when the process has been re-started
+        """
+        self._persistent_shell.execute("if {![info exists vunit_loaded_design]} {set vunit_loaded_design none}")
+        fields = (self._persistent_shell.read_var("vunit_loaded_design") or "").split()
+        if len(fields) != 2:
+            return None
+        return fields[0], int(fields[1])
+
+    def _unload_design(self):
+        """
+        Quit the simulation of a design kept loaded in the persistent vsim process of this thread
+        """
+        self._persistent_shell.execute("if {[info exists vunit_loaded_design] && "
+                                       "![string equal ${vunit_loaded_design} none]} "
+                                       "{quit -sim; set vunit_loaded_design none}")
+
+    def _run_persistent_reusing_design(self, common_file_name, key, runner_cfg):
+        """
+        Run a test case by restarting the loaded design with the new runner_cfg
+
+        Returns None when the design could not be re-used
+        """
+        loaded_design = self._get_loaded_design()
+        if loaded_design is None or loaded_design[0] != key or len(runner_cfg) > loaded_design[1]:
+            self._unload_design()
+            return None
+
+        start = get_time()
+        self._persistent_shell.execute('source "%s"' % fix_path(common_file_name))
+        self._persistent_shell.execute("set failed [vunit_restart_with_runner_cfg {%s}]"
+                                       % runner_cfg.ljust(loaded_design[1]))
+        if self._persistent_shell.read_var("failed") != '0':
+            self._unload_design()
+            return None
+
+        load_time = self._load_times.get(key)
+        if load_time is not None:
+            print("Re-used the loaded design saving %.1f seconds of load time"
+                  % max(load_time - (get_time() - start), 0.0))
+
+        self._persistent_shell.execute("set failed [vunit_run]")
+        return self._persistent_shell.read_var("failed") != '1'
+
+    def _run_persistent_keeping_design(self, common_file_name, key, runner_cfg_length):
+        """
+        Run a test case loading the design which is kept loaded for following test cases
+        """
+        start = get_time()
+        self._persistent_shell.execute('source "%s"' % fix_path(common_file_name))
+        self._persistent_shell.execute("set failed [vunit_load]")
+        if self._persistent_shell.read_var("failed") == '1':
+            return False
+
+        self._load_times.set(key, get_time() - start)
+        self._persistent_shell.execute("set vunit_loaded_design {%s %i}" % (key, runner_cfg_length))
+
+        self._persistent_shell.execute("set failed [vunit_run]")
+        return self._persistent_shell.read_var("failed") != '1'
+
+    @staticmethod
+    def _create_restart_with_runner_cfg_function(config):
+        """
+        Create the vunit_restart_with_runner_cfg function which restarts the loaded design
+        with a new value of the runner_cfg generic
+
+        Values elaborated from runner_cfg, such as constants, are not updated by change
+        which is a documented limitation of --reuse-design
+        """
+        return """
+proc vunit_restart_with_runner_cfg {runner_cfg} {
+    if {[catch {
+        _vunit_sim_restart
+        change {/%s/runner_cfg} "\"${runner_cfg}\""
+    } error_msg]} {
+        echo "Failed to re-use the loaded design: ${error_msg}"
+        return 1
+    }
+    return 0
+}
+""" % config.entity_name
+
     def simulate(self, output_path, test_suite_name, config, elaborate_only):
         """
         Run a test bench
@@ -227,10 +425,20 @@ proc vunit_help {} {
         gui_file_name = join(sim_output_path, "gui.do")
         batch_file_name = join(sim_output_path, "batch.do")
 
-        write_file(common_file_name,
-                   self._create_common_script(test_suite_name,
-                                              config,
-                                              sim_output_path))
+        reuse_design = self._can_reuse_design(config, elaborate_only)
+        if reuse_design:
+            key = self._get_design_key(config)
+            runner_cfg = config.generics["runner_cfg"]
+            # Trailing spaces are stripped by the runner_cfg parser
+            config = config.copy()
+            config.generics["runner_cfg"] = runner_cfg.ljust(len(runner_cfg) + self.runner_cfg_slack)
+
+        common_script = self._create_common_script(test_suite_name,
+                                                   config,
+                                                   sim_output_path)
+        if reuse_design:
+            common_script += self._create_restart_with_runner_cfg_function(config)
+        write_file(common_file_name, common_script)
         write_file(gui_file_name,
                    self._create_gui_script(common_file_name, config))
         write_file(batch_file_name,
@@ -238,10 +446,45 @@ proc vunit_help {} {
 
         if self._gui:
             return self._run_batch_file(gui_file_name, gui=True)
-        elif self._persistent_shell is not None:
+        elif self._persistent_shell is None:
+            return self._run_batch_file(batch_file_name)
+
+        try:
+            if reuse_design:
+                result = self._run_persistent_reusing_design(common_file_name, key, runner_cfg)
+                if result is None:
+                    result = self._run_persistent_keeping_design(common_file_name, key,
+                                                                 len(config.generics["runner_cfg"]))
+                return result
             return self._run_persistent(common_file_name, load_only=elaborate_only)
+        except Process.NonZeroExitCode:
+            return False
+        finally:
+            self._persistent_shell.test_done()
 
-        return self._run_batch_file(batch_file_name)
+
+class _LoadTimes(object):
+    """
+    The time to load each re-usable design shared by the threads
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load_times = {}
+
+    def get(self, key):
+        """
+        Return the time to load the design with key, None if it has not been loaded
+        """
+        with self._lock:  # pylint: disable=not-context-manager
+            return self._load_times.get(key)
+
+    def set(self, key, load_time):
+        """
+        Set the time to load the design with key
+        """
+        with self._lock:  # pylint: disable=not-context-manager
+            self._load_times[key] = load_time
 
 
 def fix_path(path):
@@ -41,6 +41,7 @@ from os.path import join, abspath
 import os
 from vunit.simulator_factory import SimulatorFactory
 from vunit.about import version
+from vunit.distributed import parse_address
 
 
 class VUnitCLI(object):
@@ -102,6 +103,40 @@ def _create_argument_parser(description=None, for_documentation=False):
                         default=False,
                         help='Continue compiling even after errors only skipping files that depend on failed files')
 
+    parser.add_argument('-j', '--compile-jobs', type=positive_int,
+                        default=1,
+                        help=('Number of files to compile in parallel. '
+                              'A file is compiled as soon as all of its dependencies have been compiled'))
+
+    parser.add_argument('--batch-compile', action='store_true',
+                        default=False,
+                        help=('Compile consecutive files of the same library with identical compile options '
+                              'in a single command when compiling one file at a time. '
+                              'The files of a failing command are compiled again one at a time. '
+                              'Ignored with a warning when compiling files in parallel'))
+
+    parser.add_argument('--compile-all', action='store_true',
+                        default=False,
+                        help=('Compile the entire project before running tests. '
+                              'By default only the files required to simulate the selected test benches are compiled'))
+
+    parser.add_argument('--parse-jobs', type=positive_int,
+                        default=1,
+                        help=('Number of processes used to parse source files without cached parse results '
+                              'when adding many files at once'))
+
+    parser.add_argument('--no-hash-cache', action='store_true',
+                        default=False,
+                        help=('Always read source files to compute their content hash. '
+                              'By default files with unchanged size, modification time and inode are not read again. '
+                              'Use on file systems with unreliable modification times'))
+
+    parser.add_argument('--database', choices=["log", "directory"],
+                        default="log",
+                        help=('Format of the project database in the output path. '
+                              'The log format is a single file which concurrent runs can share. '
+                              'The directory format stores each entry in a separate file'))
+
     parser.add_argument('--elaborate', action='store_true',
                         default=False,
                         help='Only elaborate test benches without running')
@@ -143,11 +178,82 @@ def _create_argument_parser(description=None, for_documentation=False):
                         help=('Number of tests to run in parallel. '
                               'Test output is not continuously written in verbose mode with p > 1'))
 
+    parser.add_argument('--runner', choices=['thread', 'process'],
+                        default='thread',
+                        help=('Run tests in worker threads of the VUnit process or in separate worker processes. '
+                              'Worker processes avoid the single core bottleneck of handling the output of many '
+                              'parallel simulations but are only supported where processes can be forked'))
+
+    parser.add_argument('--timeout', type=positive_float, metavar='SECONDS',
+                        default=None,
+                        help=('Kill the simulator processes of a test suite still running after SECONDS and '
+                              'report its unfinished tests as timed out. '
+                              'The timeout sim option of a test takes precedence'))
+
+    parser.add_argument('--resource', type=resource, metavar='NAME=AMOUNT',
+                        action='append', default=None,
+                        help=('Set the capacity of a resource such as memory or simulator licenses on this host. '
+                              'Tests are only started when the resources required by their configuration '
+                              'fit into the capacities left by the running tests. '
+                              'May be given multiple times, resources without a capacity are not limited. '
+                              'Not applied to tests run by distributed workers'))
+
+    parser.add_argument('--coordinator', type=address, metavar='HOST:PORT',
+                        default=None,
+                        help=('Do not run tests locally but listen on HOST:PORT for workers started with --worker '
+                              'and hand out the tests to them. '
+                              'The test output of the workers is collected into the output path'))
+
+    parser.add_argument('--worker', type=address, metavar='HOST:PORT',
+                        default=None,
+                        help=('Run the tests handed out by the coordinator listening on HOST:PORT. '
+                              'The worker must be started with the same run script and test patterns '
+                              'as the coordinator, -p sets the number of tests run in parallel. '
+                              'Compilation is skipped when sharing the output path with the coordinator'))
+
+    parser.add_argument('--shard', type=shard, metavar='K/N',
+                        default=None,
+                        help=('Only run shard K of N disjoint shards of the tests. '
+                              'The shards are balanced by the test runtimes of previous runs '
+                              'and are only disjoint when all N invocations use the same runtime history'))
+
+    parser.add_argument('--skip-unchanged', action='store_true',
+                        default=False,
+                        help=('Do not simulate test suites which passed in a previous run when neither the files '
+                              'required to simulate the test bench, the configuration nor the simulator have changed. '
+                              'They are reported as cached passes'))
+
+    parser.add_argument('--rerun-failed', action='store_true',
+                        default=False,
+                        help=('Only run the tests which failed or were skipped the latest time they were run. '
+                              'The results of each run are merged into the results of previous runs'))
+
     parser.add_argument("-u", "--unique-sim",
                         action="store_true",
                         default=False,
                         help="Do not re-use the same simulator process for running different test cases (slower)")
 
+    parser.add_argument("--persistent-compile",
+                        action="store_true",
+                        default=False,
+                        help=("Compile by sending vcom and vlog commands to a re-used simulator process "
+                              "instead of starting a compiler process per file. Works with ModelSim and RivieraPRO."))
+
+    parser.add_argument("--reuse-design",
+                        action="store_true",
+                        default=False,
+                        help=("Keep the design loaded in the re-used simulator process and restart it "
+                              "when the next test case has the same configuration. Works with ModelSim. "
+                              "Only the runner_cfg generic is updated on restart, constants or signals "
+                              "initialized from runner_cfg during elaboration, such as "
+                              "output_path(runner_cfg), keep the values of the first test case. "
+                              "Do not use with test benches which do so."))
+
+    parser.add_argument("--recycle-sim-after", type=positive_int, metavar="N",
+                        default=None,
+                        help=("Replace a re-used simulator process after it has run N test suites "
+                              "to bound its memory usage. Works with ModelSim and RivieraPRO."))
+
     parser.add_argument("--coverage",
                         default=None,
                         nargs="?",
@@ -178,6 +284,62 @@ def positive_int(val):
         raise argparse.ArgumentTypeError("'%s' is not a valid positive int" % val)
 
 
+def positive_float(val):
+    """
+    ArgumentParse positive float check
+    """
+    try:
+        fval = float(val)
+    except ValueError:
+        fval = 0.0
+
+    if not fval > 0:
+        raise argparse.ArgumentTypeError("'%s' is not a valid positive number" % val)
+    return fval
+
+
+def address(val):
+    """
+    ArgumentParse HOST:PORT check
+    """
+    try:
+        return parse_address(val)
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError("'%s' is not a valid HOST:PORT address" % val)
+
+
+def shard(val):
+    """
+    ArgumentParse K/N shard check
+    """
+    try:
+        index, _, count = val.partition("/")
+        index, count = int(index), int(count)
+    except ValueError:
+        index, count = 0, 0
+
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError("'%s' is not a valid K/N shard with 1 <= K <= N" % val)
+    return index, count
+
+
+def resource(val):
+    """
+    ArgumentParse NAME=AMOUNT resource capacity check
+    """
+    try:
+        name, _, amount = val.partition("=")
+        amount = float(amount)
+    except ValueError:
+        name, amount = "", -1
+
+    # Also rejects NaN
+    if not name or not amount >= 0:
+        raise argparse.ArgumentTypeError("'%s' is not a valid NAME=AMOUNT resource capacity" % val)
+    return name, amount
+
+
 def _parser_for_documentation():
     """
     Returns an argparse object used by sphinx for documentation in user_guide.rst